@@ -1,3 +1,3 @@
-from app.api.routes import chat, products, health
+from app.api.routes import chat, products, health, analytics, metrics
 
-__all__ = ["chat", "products", "health"]
+__all__ = ["chat", "products", "health", "analytics", "metrics"]
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.database import get_read_db
+from app.models.schemas import LatencyReport, RollupResponse
+from app.repositories.analytics_repository import AnalyticsRepository
+
+
+router = APIRouter()
+
+
+@router.get("/latency", response_model=LatencyReport)
+async def get_latency_report(
+    hours: float = Query(24, gt=0, le=24 * 30, description="Look-back window in hours"),
+    limit: int = Query(10000, ge=1, le=100000, description="Maximum turns to aggregate"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Latency percentiles of recent chat turns.
+
+    Returns p50/p95/p99 of the total response time and of every traced
+    stage (safety, intent, llm_params, retrieval, generation, ...), overall
+    and per intent.
+    """
+    analytics_repo = AnalyticsRepository(db)
+    return await analytics_repo.get_latency_report(hours=hours, limit=limit)
+
+
+@router.get("/rollups", response_model=RollupResponse)
+async def get_rollups(
+    minutes: int = Query(60, ge=1, le=60 * 24 * 7, description="Look-back window in minutes"),
+    intent: Optional[str] = Query(None, description="Only this intent"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Per-minute query counts and latency percentiles per intent.
+
+    Reads the rollup table maintained by the analytics buffer, so it is
+    cheap regardless of how many raw analytics rows exist.
+    """
+    analytics_repo = AnalyticsRepository(db)
+    since = datetime.utcnow().replace(second=0, microsecond=0) - timedelta(minutes=minutes)
+    return {"rollups": await analytics_repo.get_rollups(since, intent)}
@@ -1,16 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 import uuid
 import logging
 
-from app.models.database import get_db
+from app.models.database import get_db, get_read_db
 from app.models.schemas import (
     ChatRequest, ChatResponse,
     ConversationResponse, MessageResponse
 )
 from app.core.agent import ShoppingAgent
+from app.observability.metrics import CHAT_IN_FLIGHT
 from app.repositories.conversation_repository import ConversationRepository
+from app.services.product_service import FieldSelection, get_product_service
 
 
 logger = logging.getLogger(__name__)
@@ -20,7 +22,8 @@ router = APIRouter()
 @router.post("/message", response_model=ChatResponse)
 async def send_message(
     request: ChatRequest,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db)
 ):
     """
     Send a chat message and get AI response.
@@ -28,28 +31,30 @@ async def send_message(
     - **session_id**: Unique identifier for the conversation session
     - **message**: The user's message/query
     - **context**: Optional additional context
+    - **fields** / **compact**: Sparse or compact products, as on the product list endpoints
     """
-    logger.info("=" * 60)
-    logger.info(f"[CHAT ROUTE] Incoming request")
-    logger.info(f"[CHAT ROUTE] Session ID: {request.session_id}")
-    logger.info(f"[CHAT ROUTE] User message: {request.message}")
-    logger.info(f"[CHAT ROUTE] Context: {request.context}")
-    logger.info("=" * 60)
+    logger.debug("[CHAT ROUTE] session=%s message=%r context=%r",
+                 request.session_id, request.message, request.context)
+    try:
+        selection = FieldSelection(request.fields, request.compact) if request.fields or request.compact else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     try:
-        agent = ShoppingAgent(db)
-        response = await agent.process_message(
-            message=request.message,
-            session_id=request.session_id,
-            context=request.context
-        )
-        logger.info(f"[CHAT ROUTE] Response intent: {response.intent}")
-        logger.info(f"[CHAT ROUTE] Response text (first 200 chars): {response.response[:200]}...")
-        logger.info(f"[CHAT ROUTE] Products returned: {len(response.products)}")
-        logger.info("=" * 60)
+        agent = ShoppingAgent(db, read_db=read_db)
+        with CHAT_IN_FLIGHT.track_inprogress():
+            response = await agent.process_message(
+                message=request.message,
+                session_id=request.session_id,
+                context=request.context
+            )
+        logger.debug("[CHAT ROUTE] Response text: %.200s", response.response)
+        if selection is not None:
+            body = get_product_service().chat_response_json(response, selection)
+            return Response(content=body, media_type="application/json")
         return response
     except Exception as e:
-        logger.error(f"[CHAT ROUTE] Error processing message: {str(e)}", exc_info=True)
+        logger.error("[CHAT ROUTE] Error processing message: %s", e, exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"Error processing message: {str(e)}"
@@ -60,7 +65,7 @@ async def send_message(
 async def get_chat_history(
     session_id: str,
     limit: int = 20,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get chat history for a session.
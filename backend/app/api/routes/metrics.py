@@ -0,0 +1,44 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.intent_classifier import get_intent_classifier
+from app.core.safety_filter import get_safety_filter
+from app.observability.metrics import CACHE_LOOKUPS, REGISTRY
+from app.repositories.history_cache import get_session_history_cache
+from app.repositories.result_cache import get_phone_result_cache
+from app.services.product_service import get_product_service
+
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def collect_cache_stats():
+    """Mirror the caches' own hit/miss tallies into cache_lookups_total."""
+    caches = {
+        "safety_verdict": get_safety_filter().verdict_cache,
+        "intent_verdict": get_intent_classifier().verdict_cache,
+        "session_history": get_session_history_cache(),
+        "phone_response": get_product_service().response_cache,
+        "phone_result": get_phone_result_cache(),
+    }
+    for name, cache in caches.items():
+        stats = cache.stats()
+        CACHE_LOOKUPS.set_total(name, "hit", value=stats["hits"])
+        CACHE_LOOKUPS.set_total(name, "miss", value=stats["misses"])
+
+
+REGISTRY.add_collector(collect_cache_stats)
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """
+    Prometheus metrics.
+
+    Request latency per route, LLM call latency and errors, DB statement
+    timings, cache hit ratios, event loop lag and chat turns in flight,
+    merged across workers when a metrics directory is configured.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
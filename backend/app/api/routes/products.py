@@ -1,62 +1,204 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional, List
+from typing import AsyncIterator, Optional, List, Tuple
+import base64
+import hashlib
 
-from app.models.database import get_db
+from app.config import get_settings
+from app.models.database import AsyncReadSessionLocal, get_read_db
+from app.models.records import PhoneRecord
 from app.models.schemas import (
-    PhoneResponse, PhoneListResponse,
+    PhoneResponse, PhoneListResponse, PhonePageResponse, FacetSearchResponse,
     SearchRequest, SearchResponse,
     CompareRequest, CompareResponse
 )
 from app.core.agent import ShoppingAgent
+from app.repositories.category_index import CATEGORY_RULES
 from app.repositories.phone_repository import PhoneRepository
-from app.services.product_service import get_product_service
+from app.services.product_service import FieldSelection, get_product_service
 
 
 router = APIRouter()
+settings = get_settings()
 
 
-@router.get("", response_model=PhoneListResponse)
+async def _catalog_etag(request: Request, phone_repo: PhoneRepository) -> str:
+    """
+    ETag for a catalog read: the catalog version plus a digest of the path and
+    query. Also moves the response cache to that version.
+    """
+    version = await phone_repo.get_catalog_version()
+    get_product_service().sync_catalog_version(version)
+    query = "&".join(f"{key}={value}" for key, value in sorted(request.query_params.multi_items()))
+    digest = hashlib.blake2b(f"{request.url.path}?{query}".encode(), digest_size=8).hexdigest()
+    return f'"{version}-{digest}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in candidates or "*" in candidates
+
+
+def _cache_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": settings.product_cache_control}
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=_cache_headers(etag))
+
+
+def _json_response(body: bytes, etag: str) -> Response:
+    # Already serialized from cached fragments; skips response_model validation
+    return Response(content=body, media_type="application/json", headers=_cache_headers(etag))
+
+
+def _encode_cursor(phone: PhoneRecord) -> str:
+    return base64.urlsafe_b64encode(f"{phone.price_inr}:{phone.id}".encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[int, int]:
+    """The (price_inr, id) keyset position of a cursor from _encode_cursor()."""
+    try:
+        price, phone_id = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().split(":")
+        return int(price), int(phone_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _field_selection(
+    fields: Optional[str] = Query(None, description="Comma-separated product fields to return (id is always included)"),
+    compact: bool = Query(False, description="Return each product as an array of values in the order of a `fields` header")
+) -> Optional[FieldSelection]:
+    """Sparse fieldset and compact mode of a product list; None for full PhoneResponse objects."""
+    try:
+        return FieldSelection.parse(fields, compact)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _page_body(phones: List[PhoneRecord], limit: int, selection: Optional[FieldSelection]) -> bytes:
+    """A PhonePageResponse body from ``limit + 1`` fetched phones; the extra one only signals a next page."""
+    next_cursor = _encode_cursor(phones[limit - 1]) if len(phones) > limit else None
+    return get_product_service().phone_list_json(
+        phones[:limit], extra={"next_cursor": next_cursor}, selection=selection
+    )
+
+
+@router.get("", response_model=PhonePageResponse)
 async def get_products(
+    request: Request,
     brand: Optional[str] = Query(None, description="Filter by brand"),
     min_price: Optional[int] = Query(None, description="Minimum price in INR"),
     max_price: Optional[int] = Query(None, description="Maximum price in INR"),
     min_ram: Optional[int] = Query(None, description="Minimum RAM in GB"),
     limit: int = Query(20, ge=1, le=100, description="Maximum results"),
-    offset: int = Query(0, ge=0, description="Results offset"),
-    db: AsyncSession = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    offset: int = Query(0, ge=0, description="Results offset (ignored with a cursor; prefer cursors)"),
+    selection: Optional[FieldSelection] = Depends(_field_selection),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get list of products with optional filters.
 
-    Returns paginated list of mobile phones.
+    Returns phones most expensive first. Pass a page's ``next_cursor`` as
+    ``cursor`` to get the next one: keyset pages cost the same at any depth
+    and neither skip nor repeat phones while the catalog changes;
+    ``next_cursor`` is null on the last page. Like the other catalog reads,
+    the response carries an ETag; sending it back in If-None-Match gets a
+    304 until the catalog changes.
+
+    Every product list accepts ``fields`` (e.g. ``fields=brand,model,price_inr``)
+    to return only those fields, and ``compact=true`` to return each product
+    as an array of values in the order of a ``fields`` header in the body.
     """
+    after = _decode_cursor(cursor) if cursor else None
     phone_repo = PhoneRepository(db)
-    product_service = get_product_service()
-
-    if brand or min_price or max_price or min_ram:
-        phones = await phone_repo.search(
-            brand=brand,
-            min_price=min_price,
-            max_price=max_price,
-            min_ram=min_ram,
-            limit=limit
-        )
-    else:
-        phones = await phone_repo.get_all(limit=limit, offset=offset)
+    etag = await _catalog_etag(request, phone_repo)
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
+
+    phones = await phone_repo.search(
+        brand=brand,
+        min_price=min_price,
+        max_price=max_price,
+        min_ram=min_ram,
+        limit=limit + 1,
+        offset=0 if after else offset,
+        after=after
+    )
+    return _json_response(_page_body(phones, limit, selection), etag)
+
 
-    phone_responses = product_service.phones_to_response(phones)
+async def _export_lines(batch_size: int, session_factory=AsyncReadSessionLocal) -> AsyncIterator[bytes]:
+    # Own session: a dependency's session is closed before a streamed body is sent
+    async with session_factory() as db:
+        phone_repo = PhoneRepository(db)
+        product_service = get_product_service()
+        # Cached responses are only reused if built for the version this snapshot reads
+        product_service.sync_catalog_version(await phone_repo.get_catalog_version())
+        async for phones in phone_repo.stream_all(batch_size):
+            yield b"".join(product_service.phone_json(phone, store=False) + b"\n" for phone in phones)
 
-    return PhoneListResponse(
-        products=phone_responses,
-        count=len(phone_responses)
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_products(
+    batch_size: int = Query(500, ge=1, le=5000, description="Phones fetched per database round trip")
+):
+    """
+    Export the whole catalog as NDJSON: one PhoneResponse object per line, in ID order.
+
+    Streamed from a server-side cursor in batches, so memory use does not
+    grow with the catalog, and read in one transaction, so the export is a
+    consistent snapshot.
+    """
+    return StreamingResponse(_export_lines(batch_size), media_type="application/x-ndjson")
+
+
+@router.get("/facets", response_model=FacetSearchResponse)
+async def facet_search(
+    request: Request,
+    brand: List[str] = Query([], description="Brands (any of)"),
+    price_band: List[str] = Query([], description="Price bands (any of), e.g. under-15k, 15k-30k, 80k-plus"),
+    ram_gb: List[str] = Query([], description="RAM sizes in GB (any of)"),
+    refresh_rate: List[str] = Query([], description="Refresh rates in Hz (any of)"),
+    feature: List[str] = Query([], description="Features (all of)"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum results"),
+    offset: int = Query(0, ge=0, description="Results offset"),
+    selection: Optional[FieldSelection] = Depends(_field_selection),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Faceted search over the catalog.
+
+    Returns a page of matching phones (most expensive first), the total
+    number of matches, and for each facet the count of matches per value,
+    computed with every other facet's selection applied.
+    """
+    phone_repo = PhoneRepository(db)
+    etag = await _catalog_etag(request, phone_repo)
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
+
+    phones, found = await phone_repo.facet_search(
+        {"brand": brand, "price_band": price_band, "ram_gb": ram_gb, "refresh_rate": refresh_rate,
+         "features": feature},
+        limit=limit,
+        offset=offset
     )
+    body = get_product_service().phone_list_json(phones, extra={"total": found.total, "facets": found.facets},
+                                                 selection=selection)
+    return _json_response(body, etag)
 
 
 @router.get("/{phone_id}", response_model=PhoneResponse)
 async def get_product(
+    request: Request,
     phone_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get details for a specific phone.
@@ -64,7 +206,9 @@ async def get_product(
     - **phone_id**: The ID of the phone to retrieve
     """
     phone_repo = PhoneRepository(db)
-    product_service = get_product_service()
+    etag = await _catalog_etag(request, phone_repo)
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
 
     phone = await phone_repo.get_by_id(phone_id)
     if not phone:
@@ -73,13 +217,13 @@ async def get_product(
             detail=f"Phone with ID {phone_id} not found"
         )
 
-    return product_service.phone_to_response(phone)
+    return _json_response(get_product_service().phone_json(phone), etag)
 
 
 @router.post("/search", response_model=SearchResponse)
 async def search_products(
     request: SearchRequest,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Search products with natural language query.
@@ -103,7 +247,7 @@ async def search_products(
 @router.post("/compare", response_model=CompareResponse)
 async def compare_products(
     request: CompareRequest,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Compare multiple phones.
@@ -139,97 +283,123 @@ async def compare_products(
     )
 
 
-@router.get("/brand/{brand}", response_model=PhoneListResponse)
+@router.get("/brand/{brand}", response_model=PhonePageResponse)
 async def get_products_by_brand(
+    request: Request,
     brand: str,
     limit: int = Query(10, ge=1, le=50),
-    db: AsyncSession = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    selection: Optional[FieldSelection] = Depends(_field_selection),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
-    Get phones by brand.
+    Get phones by brand, most expensive first.
 
     - **brand**: Brand name (Samsung, OnePlus, Xiaomi, etc.)
+    - **cursor**: ``next_cursor`` of the previous page
     """
+    after = _decode_cursor(cursor) if cursor else None
     phone_repo = PhoneRepository(db)
-    product_service = get_product_service()
-
-    phones = await phone_repo.get_by_brand(brand, limit)
-    phone_responses = product_service.phones_to_response(phones)
+    etag = await _catalog_etag(request, phone_repo)
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
 
-    return PhoneListResponse(
-        products=phone_responses,
-        count=len(phone_responses)
-    )
+    phones = await phone_repo.search(brand=brand, limit=limit + 1, after=after)
+    return _json_response(_page_body(phones, limit, selection), etag)
 
 
 @router.get("/category/flagship", response_model=PhoneListResponse)
 async def get_flagship_phones(
+    request: Request,
     limit: int = Query(10, ge=1, le=50),
-    db: AsyncSession = Depends(get_db)
+    selection: Optional[FieldSelection] = Depends(_field_selection),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get flagship phones (premium tier)."""
     phone_repo = PhoneRepository(db)
-    product_service = get_product_service()
+    etag = await _catalog_etag(request, phone_repo)
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
 
     phones = await phone_repo.get_flagship_phones(limit=limit)
-    phone_responses = product_service.phones_to_response(phones)
-
-    return PhoneListResponse(
-        products=phone_responses,
-        count=len(phone_responses)
-    )
+    return _json_response(get_product_service().phone_list_json(phones, selection=selection), etag)
 
 
 @router.get("/category/budget", response_model=PhoneListResponse)
 async def get_budget_phones(
+    request: Request,
     max_price: int = Query(20000, description="Maximum price in INR"),
     limit: int = Query(10, ge=1, le=50),
-    db: AsyncSession = Depends(get_db)
+    selection: Optional[FieldSelection] = Depends(_field_selection),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get budget phones."""
     phone_repo = PhoneRepository(db)
-    product_service = get_product_service()
+    etag = await _catalog_etag(request, phone_repo)
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
 
     phones = await phone_repo.get_budget_phones(max_price, limit)
-    phone_responses = product_service.phones_to_response(phones)
-
-    return PhoneListResponse(
-        products=phone_responses,
-        count=len(phone_responses)
-    )
+    return _json_response(get_product_service().phone_list_json(phones, selection=selection), etag)
 
 
 @router.get("/category/gaming", response_model=PhoneListResponse)
 async def get_gaming_phones(
+    request: Request,
     limit: int = Query(10, ge=1, le=50),
-    db: AsyncSession = Depends(get_db)
+    selection: Optional[FieldSelection] = Depends(_field_selection),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get gaming phones (high refresh rate, good performance)."""
     phone_repo = PhoneRepository(db)
-    product_service = get_product_service()
+    etag = await _catalog_etag(request, phone_repo)
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
 
     phones = await phone_repo.get_gaming_phones(limit=limit)
-    phone_responses = product_service.phones_to_response(phones)
-
-    return PhoneListResponse(
-        products=phone_responses,
-        count=len(phone_responses)
-    )
+    return _json_response(get_product_service().phone_list_json(phones, selection=selection), etag)
 
 
 @router.get("/category/camera", response_model=PhoneListResponse)
 async def get_camera_phones(
+    request: Request,
     limit: int = Query(10, ge=1, le=50),
-    db: AsyncSession = Depends(get_db)
+    selection: Optional[FieldSelection] = Depends(_field_selection),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get camera-focused phones."""
     phone_repo = PhoneRepository(db)
-    product_service = get_product_service()
+    etag = await _catalog_etag(request, phone_repo)
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
 
     phones = await phone_repo.get_camera_phones(limit=limit)
-    phone_responses = product_service.phones_to_response(phones)
+    return _json_response(get_product_service().phone_list_json(phones, selection=selection), etag)
 
-    return PhoneListResponse(
-        products=phone_responses,
-        count=len(phone_responses)
-    )
+
+@router.get("/category/{category}", response_model=PhoneListResponse)
+async def get_category_phones(
+    request: Request,
+    category: str,
+    limit: int = Query(10, ge=1, le=50),
+    selection: Optional[FieldSelection] = Depends(_field_selection),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get phones in any declared category.
+
+    - **category**: One of the categories in CATEGORY_RULES (flagship, budget, gaming, camera, battery, ...)
+    """
+    if category not in CATEGORY_RULES:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unknown category '{category}'. Available: {', '.join(CATEGORY_RULES)}"
+        )
+
+    phone_repo = PhoneRepository(db)
+    etag = await _catalog_etag(request, phone_repo)
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
+
+    phones = await phone_repo.get_category(category, limit=limit)
+    return _json_response(get_product_service().phone_list_json(phones, selection=selection), etag)
@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
-from typing import Optional
+from typing import Dict, Optional
 
 
 class Settings(BaseSettings):
@@ -11,13 +11,71 @@ class Settings(BaseSettings):
     use_inference_api: bool = True
 
     embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    intent_prototypes_path: Optional[str] = None
+    intent_prototype_threshold: float = 0.5
     database_url: str = "sqlite+aiosqlite:////data/phone_assistant.db"
 
+    # SQLite engine profile: "wal" = WAL journal, tuned pragmas, one queued writer
+    # connection and a pool of read-only connections; "default" = one plain engine
+    db_profile: str = "wal"
+    db_busy_timeout_ms: int = 5000
+    db_synchronous: str = "NORMAL"
+    db_cache_size_kib: int = 16384
+    db_mmap_size_mb: int = 64
+    db_read_pool_size: int = 4
+    db_read_pool_overflow: int = 16
+    db_write_timeout: float = 30.0
+
     api_host: str = "0.0.0.0"
     api_port: int = 8000
     debug: bool = True
 
     rate_limit_per_minute: int = 30
+    verdict_cache_size: int = 4096
+
+    # Write-behind analytics: rows per batched INSERT / max seconds between flushes
+    analytics_batch_size: int = 200
+    analytics_flush_interval: float = 2.0
+
+    # Cache-Control sent with product catalog reads (they also carry an ETag)
+    product_cache_control: str = "public, max-age=60, stale-while-revalidate=300"
+
+    # PhoneRepository query results cached per catalog version (0 disables)
+    phone_result_cache_size: int = 1024
+    phone_result_cache_max_records: int = 100_000
+
+    # Per-session history ring buffer: messages kept (0 disables), seconds since last write, global caps
+    history_cache_messages: int = 10
+    history_cache_ttl: float = 300.0
+    history_cache_max_sessions: int = 10000
+    history_cache_max_chars: int = 20_000_000
+
+    # Conversations idle longer than this are purged (0 disables the janitor);
+    # with an archive dir they are first appended to gzip NDJSON files there
+    session_ttl_hours: float = 168.0
+    session_janitor_interval: float = 600.0
+    session_purge_batch_size: int = 500
+    session_archive_dir: Optional[str] = None
+
+    # Fraction of requests whose response body prefix is logged, and its size cap
+    access_log_sample_rate: float = 1.0
+    access_log_body_limit: int = 2000
+
+    log_level: str = "INFO"
+    # Per-logger overrides, e.g. LOG_LEVELS='{"app.core": "DEBUG"}'
+    log_levels: Dict[str, str] = {"sqlalchemy.engine": "WARNING"}
+    log_format: str = "text"  # "text" or "json"
+    # Fraction of requests whose DEBUG records are kept
+    log_trace_sample_rate: float = 0.1
+    sql_echo: bool = False
+
+    # Shared directory for per-worker metric snapshots (needed with >1 worker)
+    metrics_multiproc_dir: Optional[str] = None
+    metrics_flush_interval: float = 5.0
+    loop_lag_interval: float = 0.5
+    # Debug aid: log the loop thread's stack when the loop stalls this long
+    loop_block_detection: bool = False
+    loop_block_threshold_ms: float = 100.0
 
     cors_origins: list[str] = ["http://localhost:5173", "http://localhost:3000"]
 
@@ -1,5 +1,6 @@
 from typing import Dict, Any, List, Optional
 import time
+import asyncio
 import logging
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -8,11 +9,15 @@ from app.core.query_processor import QueryProcessor, get_query_processor
 from app.core.response_generator import ResponseGenerator, get_response_generator
 from app.core.safety_filter import SafetyFilter, get_safety_filter
 from app.services.huggingface_service import HuggingFaceService, get_huggingface_service
+from app.services.embedding_service import EmbeddingService, get_embedding_service
 from app.services.product_service import ProductService, get_product_service
+from app.services.analytics_buffer import AnalyticsBuffer, get_analytics_buffer
 from app.repositories.phone_repository import PhoneRepository
 from app.repositories.conversation_repository import ConversationRepository
-from app.models.database import Phone, QueryAnalytics
+from app.models.records import PhoneRecord
 from app.models.schemas import ChatResponse, PhoneResponse
+from app.observability.tracing import Trace, span, start_trace
+from app.utils.query_analysis import analyze_query
 
 logger = logging.getLogger(__name__)
 
@@ -22,68 +27,100 @@ class ShoppingAgent:
     def __init__(self, db: AsyncSession, intent_classifier: Optional[IntentClassifier] = None,
                  query_processor: Optional[QueryProcessor] = None, response_generator: Optional[ResponseGenerator] = None,
                  safety_filter: Optional[SafetyFilter] = None, llm_service: Optional[HuggingFaceService] = None,
-                 product_service: Optional[ProductService] = None):
+                 product_service: Optional[ProductService] = None, embedding_service: Optional[EmbeddingService] = None,
+                 analytics: Optional[AnalyticsBuffer] = None, read_db: Optional[AsyncSession] = None):
         self.db = db
-        self.phone_repo = PhoneRepository(db)
-        self.conversation_repo = ConversationRepository(db)
+        # Lookups use the read-only session so the writer connection is only held by add_turn
+        read_db = read_db if read_db is not None else db
+        self.phone_repo = PhoneRepository(read_db)
+        self.conversation_repo = ConversationRepository(db, read_db=read_db)
         self.intent_classifier = intent_classifier or get_intent_classifier()
         self.query_processor = query_processor or get_query_processor()
         self.response_generator = response_generator or get_response_generator()
         self.safety_filter = safety_filter or get_safety_filter()
         self.llm_service = llm_service or get_huggingface_service()
         self.product_service = product_service or get_product_service()
+        self.embedding_service = embedding_service or get_embedding_service()
+        self.analytics = analytics or get_analytics_buffer()
 
     async def process_message(self, message: str, session_id: str, context: Optional[Dict[str, Any]] = None) -> ChatResponse:
         start_time = time.time()
-        logger.info(f"[AGENT] Processing: {message[:100]}")
+        trace = start_trace()
+        logger.debug("[AGENT] Processing: %.100s", message)
 
-        safety_result = self.safety_filter.check_input(message)
+        # Normalize and scan the message once; every stage below reuses it
+        with span("analyze"):
+            analysis = analyze_query(message)
+
+        with span("safety"):
+            safety_result = self.safety_filter.check_input(message, analysis=analysis)
         if not safety_result["is_safe"]:
-            logger.warning(f"[AGENT] UNSAFE: {safety_result.get('reason')}")
+            logger.warning("[AGENT] UNSAFE: %s", safety_result.get("reason"))
             response = self.safety_filter.get_safe_response(safety_result)
-            await self._log_query(message, "adversarial", 0, int((time.time() - start_time) * 1000), True)
+            self._log_query(message, "adversarial", 0, int((time.time() - start_time) * 1000), True, trace)
             return ChatResponse(response=response, products=[], intent="adversarial",
                               suggestions=["Best phones under 30,000", "Compare Samsung vs OnePlus", "Explain AMOLED"], session_id=session_id)
 
-        history = await self.conversation_repo.get_conversation_history(session_id)
-        logger.info(f"[AGENT] History: {len(history)} messages")
-
-        intent = self.intent_classifier.classify(message)
-        logger.info(f"[AGENT] Intent: {intent}")
-
-        logger.info("[AGENT] Calling HuggingFace for params...")
-        llm_params = await self.llm_service.extract_search_parameters(message, intent["intent"])
-        logger.info(f"[AGENT] LLM params: {llm_params}")
+        with span("history"):
+            history = await self.conversation_repo.get_conversation_history(session_id)
+        logger.debug("[AGENT] History: %d messages", len(history))
+
+        # The query embedding is only needed when prototype routing is enabled,
+        # and not at all when the verdict is already cached
+        has_prototypes = self.intent_classifier.has_prototypes
+        with span("intent"):
+            intent = self.intent_classifier.cached_verdict(message, analysis=analysis, embedded=has_prototypes)
+        if intent is None:
+            embedding = None
+            if has_prototypes:
+                # Model inference is CPU bound: keep it off the event loop
+                with span("embed"):
+                    embedding = await asyncio.to_thread(self.embedding_service.encode, message)
+            with span("intent"):
+                intent = self.intent_classifier.classify(message, embedding=embedding, analysis=analysis, lookup=False)
+        logger.debug("[AGENT] Intent: %s", intent)
+
+        with span("llm_params"):
+            llm_params = await self.llm_service.extract_search_parameters(message, intent["intent"])
+        logger.debug("[AGENT] LLM params: %s", llm_params)
 
         if llm_params:
             intent["extracted_params"].update({k: v for k, v in llm_params.items() if v is not None})
 
-        search_criteria = self.query_processor.process(message, intent)
-        logger.info(f"[AGENT] Search criteria: {search_criteria}")
+        with span("retrieval"):
+            search_criteria = self.query_processor.process(message, intent)
+            logger.debug("[AGENT] Search criteria: %s", search_criteria)
 
-        phones = await self._get_phones_for_intent(intent, search_criteria)
-        logger.info(f"[AGENT] Found {len(phones)} phones")
+            await self._sync_catalog_version()
+            phones = await self._get_phones_for_intent(intent, search_criteria)
+            logger.debug("[AGENT] Found %d phones", len(phones))
 
-        if intent["intent"] == "compare_phones":
-            phone_ids = self.query_processor.get_comparison_phones(message, await self.phone_repo.get_all(limit=50))
-            if phone_ids:
-                phones = await self.phone_repo.get_by_ids(phone_ids)
+            if intent["intent"] == "compare_phones":
+                phone_ids = self.query_processor.get_comparison_phones(message, await self.phone_repo.get_all(limit=50), analysis)
+                if phone_ids:
+                    phones = await self.phone_repo.get_by_ids(phone_ids)
 
-        logger.info("[AGENT] Generating response...")
-        response_data = await self.response_generator.generate_response(message, intent, phones, history)
+        with span("generation"):
+            response_data = await self.response_generator.generate_response(message, intent, phones, history)
 
-        response_text = self.safety_filter.sanitize_output(response_data["response"])
+        with span("sanitize"):
+            response_text = self.safety_filter.sanitize_output(response_data["response"])
 
-        await self.conversation_repo.add_message(session_id, "user", message, {"intent": intent["intent"]})
-        await self.conversation_repo.add_message(session_id, "assistant", response_text,
-                                                 {"intent": intent["intent"], "product_ids": [p.id for p in phones] if phones else []})
+        with span("persist"):
+            await self.conversation_repo.add_turn(
+                session_id, message, response_text,
+                user_metadata={"intent": intent["intent"]},
+                assistant_metadata={"intent": intent["intent"], "product_ids": [p.id for p in phones] if phones else []}
+            )
 
-        await self._log_query(message, intent["intent"], len(phones), int((time.time() - start_time) * 1000), False)
+        elapsed_ms = int((time.time() - start_time) * 1000)
+        self._log_query(message, intent["intent"], len(phones), elapsed_ms, False, trace)
+        logger.info("[AGENT] session=%s intent=%s products=%d %dms", session_id, intent["intent"], len(phones), elapsed_ms)
 
         return ChatResponse(response=response_text, products=response_data.get("products", []),
                           intent=intent["intent"], suggestions=response_data.get("suggestions", []), session_id=session_id)
 
-    async def _get_phones_for_intent(self, intent: Dict[str, Any], search_criteria: Dict[str, Any]) -> List[Phone]:
+    async def _get_phones_for_intent(self, intent: Dict[str, Any], search_criteria: Dict[str, Any]) -> List[PhoneRecord]:
         intent_type = intent["intent"]
         filters = search_criteria.get("filters", {})
         params = intent.get("extracted_params", {})
@@ -116,19 +153,25 @@ class ShoppingAgent:
             limit=10
         )
 
-    async def _log_query(self, query: str, intent: str, products_returned: int, response_time_ms: int, was_adversarial: bool):
-        try:
-            self.db.add(QueryAnalytics(query=query, intent=intent, products_returned=products_returned,
-                                       response_time_ms=response_time_ms, was_adversarial=was_adversarial))
-            await self.db.commit()
-        except Exception as e:
-            print(f"Failed to log analytics: {e}")
+    def _log_query(self, query: str, intent: str, products_returned: int, response_time_ms: int, was_adversarial: bool,
+                   trace: Optional[Trace] = None):
+        # Buffered: written in batches off the request path
+        self.analytics.record(query=query, intent=intent, products_returned=products_returned,
+                              response_time_ms=response_time_ms, was_adversarial=was_adversarial,
+                              stage_timings=trace.stages_json() if trace else None,
+                              trace_meta=trace.meta_json() if trace else None)
+
+    async def _sync_catalog_version(self):
+        # Cached phone responses are reused only while the catalog is unchanged
+        self.product_service.sync_catalog_version(await self.phone_repo.get_catalog_version())
 
     async def get_phone_details(self, phone_id: int) -> Optional[PhoneResponse]:
+        await self._sync_catalog_version()
         phone = await self.phone_repo.get_by_id(phone_id)
         return self.product_service.phone_to_response(phone) if phone else None
 
     async def compare_phones(self, phone_ids: List[int]) -> Dict[str, Any]:
+        await self._sync_catalog_version()
         phones = await self.phone_repo.get_by_ids(phone_ids)
         if len(phones) < 2:
             return {"phones": [], "comparison": [], "summary": "Need at least 2 phones to compare."}
@@ -140,6 +183,7 @@ class ShoppingAgent:
 
     async def search_phones(self, query: str, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         filters = filters or {}
+        await self._sync_catalog_version()
         phones = await self.phone_repo.search(
             brand=filters.get("brand"), min_price=filters.get("min_price"), max_price=filters.get("max_price"),
             min_ram=filters.get("min_ram"), min_battery=filters.get("min_battery"),
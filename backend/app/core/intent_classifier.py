@@ -1,7 +1,16 @@
-import re
 import logging
 from typing import Dict, Any, Optional
+import numpy as np
+
+from app.config import get_settings
+from app.core.intent_prototypes import IntentPrototypes
+from app.core.verdict_cache import VerdictCache
+from app.observability import tracing
 from app.services.huggingface_service import HuggingFaceService
+from app.utils.query_analysis import (
+    QueryAnalysis, analyze_query, normalize_query, LEXICON_VERSION,
+    INTENT_KEYWORDS, FEATURE_KEYWORDS
+)
 
 
 logger = logging.getLogger(__name__)
@@ -10,101 +19,116 @@ logger = logging.getLogger(__name__)
 class IntentClassifier:
     """Classifies user query intent for routing."""
 
-    INTENT_KEYWORDS = {
-        "compare_phones": [
-            "compare", "vs", "versus", "difference", "better",
-            "which one", "between", "or"
-        ],
-        "explain_feature": [
-            "what is", "what's", "explain", "meaning", "means",
-            "how does", "why", "ois", "eis", "amoled", "oled",
-            "refresh rate", "mah", "processor", "chipset"
-        ],
-        "get_details": [
-            "tell me about", "details", "specs", "specifications",
-            "more about", "info", "information"
-        ],
-        "filter_by_brand": [
-            "samsung", "oneplus", "google", "pixel", "xiaomi",
-            "redmi", "realme", "vivo", "oppo", "nothing", "iqoo",
-            "poco", "motorola", "moto"
-        ],
-        "budget_search": [
-            "under", "below", "budget", "cheap", "affordable",
-            "around", "range", "less than", "within"
-        ],
-        "search_phones": [
-            "best", "recommend", "suggest", "looking for", "need",
-            "want", "find", "show", "give me", "phone", "mobile"
-        ],
-        "chitchat": [
-            "hello", "hi", "hey", "thanks", "thank you", "bye",
-            "good", "okay", "ok", "help"
-        ]
-    }
-
-    PRICE_PATTERN = re.compile(
-        r'(?:under|below|around|within|less than|budget of?|upto|up to)?\s*'
-        r'(?:rs\.?|inr|₹)?\s*(\d[\d,]*k?)\s*'
-        r'(?:rs\.?|inr|₹)?',
-        re.IGNORECASE
-    )
-
-    BRAND_PATTERN = re.compile(
-        r'\b(samsung|oneplus|one plus|google|pixel|xiaomi|mi|redmi|'
-        r'realme|vivo|oppo|nothing|iqoo|poco|motorola|moto)\b',
-        re.IGNORECASE
-    )
-
-    FEATURE_KEYWORDS = {
-        "camera": ["camera", "photo", "photography", "video", "megapixel", "mp"],
-        "gaming": ["gaming", "game", "gamer", "pubg", "fps"],
-        "battery": ["battery", "mah", "backup", "long lasting", "endurance"],
-        "fast_charging": ["fast charging", "quick charge", "turbo charge", "supercharge"],
-        "display": ["display", "screen", "amoled", "oled", "120hz", "144hz"],
-        "compact": ["compact", "small", "one hand", "one-hand", "lightweight"],
-        "5g": ["5g", "5 g"],
-        "flagship": ["flagship", "premium", "high end", "high-end", "best"]
-    }
-
-    def __init__(self, llm_service: Optional[HuggingFaceService] = None):
+    def __init__(
+        self,
+        llm_service: Optional[HuggingFaceService] = None,
+        prototypes: Optional[IntentPrototypes] = None,
+        prototype_threshold: float = 0.5,
+        cache_size: int = 4096
+    ):
         self.llm_service = llm_service
+        self.prototypes = prototypes
+        self.prototype_threshold = prototype_threshold
+        self.verdict_cache = VerdictCache(cache_size)
+
+    @property
+    def has_prototypes(self) -> bool:
+        return self.prototypes is not None
+
+    def set_prototypes(self, prototypes: Optional[IntentPrototypes]):
+        """Swap the prototype matrix in place; None disables embedding routing."""
+        self.prototypes = prototypes
+        if prototypes is not None:
+            logger.info("[INTENT] Loaded %d intent prototypes (version=%s)", len(prototypes.intents), prototypes.version)
+
+    @property
+    def cache_version(self) -> str:
+        """Identifies the lexicons, prototypes and threshold a cached result was made with."""
+        prototypes_version = self.prototypes.version if self.prototypes is not None else "-"
+        return f"{LEXICON_VERSION}:{prototypes_version}:{self.prototype_threshold}"
+
+    def load_prototypes(self, path: str):
+        """Load prototypes from disk and swap them in."""
+        self.set_prototypes(IntentPrototypes.load(path))
+
+    def cached_verdict(
+        self,
+        query: str,
+        analysis: Optional[QueryAnalysis] = None,
+        embedded: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """
+        The cached classification of a query, or None.
+
+        ``embedded`` says whether the query would be classified with an
+        embedding, so callers can skip computing one on a hit.
+        """
+        key = (analysis.key if analysis else normalize_query(query), embedded)
+        cached = self.verdict_cache.get(key, self.cache_version)
+        tracing.annotate(intent_cache_hit=cached is not None)
+        if cached is None:
+            return None
+
+        intent, confidence, params = cached
+        logger.debug("[INTENT] Verdict cache hit: %s", intent)
+        return {
+            "intent": intent,
+            "confidence": confidence,
+            "extracted_params": {k: list(v) if isinstance(v, tuple) else v for k, v in params}
+        }
 
-    def classify(self, query: str) -> Dict[str, Any]:
-        """Classify the intent of a user query."""
-        logger.info("[INTENT] classify() called")
-        logger.info(f"[INTENT] Query: {query}")
-        query_lower = query.lower().strip()
-
-        params = self._extract_parameters(query_lower)
-        logger.info(f"[INTENT] Extracted params: {params}")
-
-        scores = {}
-        for intent, keywords in self.INTENT_KEYWORDS.items():
-            score = sum(1 for keyword in keywords if keyword in query_lower)
-            if score > 0:
-                scores[intent] = score
+    def classify(
+        self,
+        query: str,
+        embedding: Optional[np.ndarray] = None,
+        analysis: Optional[QueryAnalysis] = None,
+        lookup: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Classify the intent of a user query.
+
+        If an embedding of the query is supplied and prototypes are loaded, the
+        intent is taken from the nearest prototype centroid; otherwise keyword
+        scoring is used. Pass a precomputed QueryAnalysis to skip rescanning,
+        and ``lookup=False`` when cached_verdict() has just missed.
+        """
+        logger.debug("[INTENT] classify(): %s", query)
+
+        if lookup:
+            cached = self.cached_verdict(query, analysis, embedded=embedding is not None)
+            if cached is not None:
+                return cached
+
+        key = (analysis.key if analysis else normalize_query(query), embedding is not None)
+        version = self.cache_version
+        result = self._classify(analysis or analyze_query(query), embedding)
+        params = tuple(
+            (k, tuple(v) if isinstance(v, list) else v)
+            for k, v in result["extracted_params"].items()
+        )
+        self.verdict_cache.put(key, version, (result["intent"], result["confidence"], params))
+        return result
 
-        logger.info(f"[INTENT] Intent scores: {scores}")
+    def _classify(self, analysis: QueryAnalysis, embedding: Optional[np.ndarray]) -> Dict[str, Any]:
+        params = self._extract_parameters(analysis)
+        logger.debug("[INTENT] Extracted params: %s", params)
 
-        if not scores:
-            intent = "search_phones"
-            confidence = 0.5
-            logger.info("[INTENT] No keyword matches - defaulting to search_phones")
+        prototype_match = self._match_prototype(embedding)
+        if prototype_match is not None:
+            intent, similarity = prototype_match
+            confidence = min(max(similarity, 0.5), 0.95)
+            logger.debug("[INTENT] Prototype match: %s (similarity=%.3f)", intent, similarity)
         else:
-            intent = max(scores, key=scores.get)
-            max_score = scores[intent]
-            confidence = min(0.5 + (max_score * 0.15), 0.95)
-            logger.info(f"[INTENT] Best match: {intent} (score={max_score}, confidence={confidence})")
+            intent, confidence = self._classify_by_keywords(analysis)
 
         if params.get("price_max") or params.get("price_min"):
             if intent not in ["compare_phones", "get_details"]:
-                logger.info(f"[INTENT] Adjusting intent from {intent} to budget_search (price detected)")
+                logger.debug("[INTENT] Adjusting intent from %s to budget_search (price detected)", intent)
                 intent = "budget_search"
                 confidence = max(confidence, 0.8)
 
         if params.get("brand") and intent == "search_phones":
-            logger.info(f"[INTENT] Adjusting intent from search_phones to filter_by_brand (brand={params.get('brand')})")
+            logger.debug("[INTENT] Adjusting intent from search_phones to filter_by_brand (brand=%s)", params.get("brand"))
             intent = "filter_by_brand"
             confidence = max(confidence, 0.75)
 
@@ -113,58 +137,74 @@ class IntentClassifier:
             "confidence": confidence,
             "extracted_params": params
         }
-        logger.info(f"[INTENT] Final classification: {result}")
+        logger.debug("[INTENT] Final classification: %s", result)
         return result
 
-    def _extract_parameters(self, query: str) -> Dict[str, Any]:
-        """Extract parameters from query."""
+    def _extract_parameters(self, analysis: QueryAnalysis) -> Dict[str, Any]:
+        """Extract parameters from the analysed query."""
         params = {}
 
-        price_match = self.PRICE_PATTERN.search(query)
-        if price_match:
-            price_str = price_match.group(1).replace(",", "")
-            if price_str.lower().endswith("k"):
-                price = int(price_str[:-1]) * 1000
-            else:
-                price = int(price_str)
-                if price < 1000:
-                    price *= 1000
-
-            if any(word in query for word in ["under", "below", "less than", "within", "upto", "up to"]):
+        if analysis.prices:
+            price = analysis.prices[0]
+            if analysis.has_any("price_cap"):
                 params["price_max"] = price
-            elif "around" in query:
+            elif analysis.has_any("price_around"):
                 params["price_min"] = int(price * 0.8)
                 params["price_max"] = int(price * 1.2)
             else:
                 params["price_max"] = price
 
-        brand_match = self.BRAND_PATTERN.search(query)
-        if brand_match:
-            brand = brand_match.group(1).lower()
-            # Normalize brand names
-            brand_map = {
-                "one plus": "OnePlus",
-                "oneplus": "OnePlus",
-                "mi": "Xiaomi",
-                "redmi": "Xiaomi",
-                "moto": "Motorola",
-                "pixel": "Google"
-            }
-            params["brand"] = brand_map.get(brand, brand.title())
-
-        features = []
-        for feature, keywords in self.FEATURE_KEYWORDS.items():
-            if any(kw in query for kw in keywords):
-                features.append(feature)
+        if analysis.brands:
+            params["brand"] = analysis.brands[0]
+
+        features = [
+            feature for feature in FEATURE_KEYWORDS
+            if analysis.has_any(f"feature:{feature}")
+        ]
         if features:
             params["features"] = features
 
-        ram_match = re.search(r'(\d+)\s*gb\s*(?:ram)?', query, re.IGNORECASE)
-        if ram_match:
-            params["min_ram"] = int(ram_match.group(1))
+        if analysis.ram_gb is not None:
+            params["min_ram"] = analysis.ram_gb
 
         return params
 
+    def _classify_by_keywords(self, analysis: QueryAnalysis) -> tuple:
+        """Score intents by keyword hits and return (intent, confidence)."""
+        scores = {}
+        for intent in INTENT_KEYWORDS:
+            score = len(analysis.hits_for(f"intent:{intent}"))
+            if score > 0:
+                scores[intent] = score
+
+        logger.debug("[INTENT] Intent scores: %s", scores)
+
+        if not scores:
+            logger.debug("[INTENT] No keyword matches - defaulting to search_phones")
+            return "search_phones", 0.5
+
+        intent = max(scores, key=scores.get)
+        max_score = scores[intent]
+        confidence = min(0.5 + (max_score * 0.15), 0.95)
+        logger.debug("[INTENT] Best match: %s (score=%s, confidence=%s)", intent, max_score, confidence)
+        return intent, confidence
+
+    def _match_prototype(self, embedding: Optional[np.ndarray]) -> Optional[tuple]:
+        """Return (intent, similarity) from the prototype matrix, or None to fall back to keywords."""
+        prototypes = self.prototypes
+        if embedding is None or prototypes is None:
+            return None
+
+        if np.asarray(embedding).size != prototypes.dimension:
+            logger.warning("[INTENT] Embedding dimension does not match prototypes - using keywords")
+            return None
+
+        intent, similarity = prototypes.classify(embedding)
+        if similarity < self.prototype_threshold:
+            logger.debug("[INTENT] Prototype similarity %.3f below threshold - using keywords", similarity)
+            return None
+        return intent, similarity
+
 
 _intent_classifier: Optional[IntentClassifier] = None
 
@@ -173,5 +213,14 @@ def get_intent_classifier() -> IntentClassifier:
     """Get intent classifier singleton."""
     global _intent_classifier
     if _intent_classifier is None:
-        _intent_classifier = IntentClassifier()
+        settings = get_settings()
+        _intent_classifier = IntentClassifier(
+            prototype_threshold=settings.intent_prototype_threshold,
+            cache_size=settings.verdict_cache_size
+        )
+        if settings.intent_prototypes_path:
+            try:
+                _intent_classifier.load_prototypes(settings.intent_prototypes_path)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning("[INTENT] Could not load intent prototypes: %s", e)
     return _intent_classifier
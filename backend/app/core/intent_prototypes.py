@@ -0,0 +1,79 @@
+import hashlib
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+
+class IntentPrototypes:
+    """Per-intent centroid matrix for embedding-based intent routing."""
+
+    def __init__(
+        self,
+        intents: List[str],
+        centroids: np.ndarray,
+        model_name: Optional[str] = None,
+        version: Optional[str] = None
+    ):
+        centroids = np.asarray(centroids, dtype=np.float32)
+        if centroids.ndim != 2 or centroids.shape[0] != len(intents):
+            raise ValueError("centroids must be a (num_intents, dim) matrix")
+
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+
+        self.intents = list(intents)
+        self.centroids = centroids / norms
+        self.model_name = model_name
+        self.version = version or hashlib.sha1(
+            "|".join(self.intents).encode("utf-8") + self.centroids.tobytes()
+        ).hexdigest()[:12]
+
+    @property
+    def dimension(self) -> int:
+        return self.centroids.shape[1]
+
+    def classify(self, embedding: np.ndarray) -> Tuple[str, float]:
+        """Return the closest intent and its cosine similarity."""
+        query = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return self.intents[0], 0.0
+
+        similarities = self.centroids @ (query / norm)
+        best = int(np.argmax(similarities))
+        return self.intents[best], float(similarities[best])
+
+    @classmethod
+    def from_examples(cls, examples: Dict[str, List[str]], embedding_service) -> "IntentPrototypes":
+        """Build centroids from labelled example queries."""
+        intents = []
+        centroids = []
+        for intent, texts in examples.items():
+            if not texts:
+                continue
+            vectors = embedding_service.encode_batch(texts)
+            if vectors is None:
+                raise RuntimeError("Embedding model unavailable, cannot build intent prototypes")
+
+            vectors = np.asarray(vectors, dtype=np.float32)
+            vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+            intents.append(intent)
+            centroids.append(vectors.mean(axis=0))
+
+        return cls(intents, np.vstack(centroids), getattr(embedding_service, "model_name", None))
+
+    def save(self, path: str):
+        """Save prototypes to an .npz file."""
+        np.savez(
+            path,
+            intents=np.array(self.intents),
+            centroids=self.centroids,
+            model_name=np.array(self.model_name or ""),
+            version=np.array(self.version)
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "IntentPrototypes":
+        """Load prototypes saved with save()."""
+        with np.load(path) as data:
+            model_name = str(data["model_name"]) or None
+            return cls([str(i) for i in data["intents"]], data["centroids"], model_name, str(data["version"]))
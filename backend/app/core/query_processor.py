@@ -1,5 +1,6 @@
 from typing import Dict, Any, List, Optional
-from app.models.database import Phone
+from app.models.records import PhoneLike
+from app.utils.query_analysis import QueryAnalysis
 
 
 class QueryProcessor:
@@ -46,9 +47,14 @@ class QueryProcessor:
 
         return search_criteria
 
-    def extract_phone_ids(self, query: str, phones: List[Phone]) -> List[int]:
+    def extract_phone_ids(
+        self,
+        query: str,
+        phones: List[PhoneLike],
+        analysis: Optional[QueryAnalysis] = None
+    ) -> List[int]:
         """Extract phone IDs mentioned in query."""
-        query_lower = query.lower()
+        query_lower = analysis.normalized if analysis else query.lower()
         mentioned_ids = []
 
         for phone in phones:
@@ -63,10 +69,11 @@ class QueryProcessor:
     def get_comparison_phones(
         self,
         query: str,
-        available_phones: List[Phone]
+        available_phones: List[PhoneLike],
+        analysis: Optional[QueryAnalysis] = None
     ) -> List[int]:
         """Identify phones to compare from query."""
-        mentioned = self.extract_phone_ids(query, available_phones)
+        mentioned = self.extract_phone_ids(query, available_phones, analysis)
         if len(mentioned) >= 2:
             return mentioned[:4]  # Max 4 for comparison
 
@@ -79,10 +86,10 @@ class QueryProcessor:
 
     def _find_similar_phones(
         self,
-        target: Phone,
-        phones: List[Phone],
+        target: PhoneLike,
+        phones: List[PhoneLike],
         count: int = 2
-    ) -> List[Phone]:
+    ) -> List[PhoneLike]:
         """Find phones similar to target by price range."""
         price_range = 0.25  # 25% price difference
         min_price = target.price_inr * (1 - price_range)
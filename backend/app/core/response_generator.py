@@ -2,7 +2,7 @@ from typing import List, Dict, Any, Optional
 import json
 import logging
 
-from app.models.database import Phone
+from app.models.records import PhoneLike
 from app.services.huggingface_service import HuggingFaceService, get_huggingface_service
 from app.services.product_service import ProductService
 
@@ -15,31 +15,31 @@ class ResponseGenerator:
         self.llm_service = llm_service or get_huggingface_service()
         self.product_service = product_service or ProductService()
 
-    async def generate_response(self, query: str, intent: Dict[str, Any], phones: List[Phone], conversation_history: List[Dict[str, str]] = None) -> Dict[str, Any]:
+    async def generate_response(self, query: str, intent: Dict[str, Any], phones: List[PhoneLike], conversation_history: List[Dict[str, str]] = None) -> Dict[str, Any]:
         intent_type = intent.get("intent", "search_phones")
-        logger.info(f"[RESPONSE_GEN] Intent: {intent_type}, Query: {query[:50]}..., Phones: {len(phones)}")
+        logger.debug("[RESPONSE_GEN] Intent: %s, Query: %.50s, Phones: %d", intent_type, query, len(phones))
 
         if intent_type == "adversarial":
-            logger.info("[RESPONSE_GEN] HARDCODED refusal")
+            logger.debug("[RESPONSE_GEN] HARDCODED refusal")
             return self._generate_refusal_response()
 
         if intent_type == "chitchat":
-            logger.info("[RESPONSE_GEN] LLM chitchat")
+            logger.debug("[RESPONSE_GEN] LLM chitchat")
             return await self._generate_llm_chitchat_response(query, conversation_history)
 
         if intent_type == "explain_feature":
-            logger.info("[RESPONSE_GEN] LLM feature explanation")
+            logger.debug("[RESPONSE_GEN] LLM feature explanation")
             return await self._generate_llm_feature_explanation(query)
 
         if intent_type == "compare_phones":
-            logger.info("[RESPONSE_GEN] LLM comparison")
+            logger.debug("[RESPONSE_GEN] LLM comparison")
             return await self._generate_llm_comparison_response(query, phones)
 
         if intent_type == "get_details" and phones:
-            logger.info("[RESPONSE_GEN] LLM details")
+            logger.debug("[RESPONSE_GEN] LLM details")
             return await self._generate_llm_details_response(query, phones[0])
 
-        logger.info("[RESPONSE_GEN] LLM search")
+        logger.debug("[RESPONSE_GEN] LLM search")
         return await self._generate_llm_search_response(query, intent, phones)
 
     def _generate_refusal_response(self) -> Dict[str, Any]:
@@ -79,7 +79,7 @@ class ResponseGenerator:
                        "I can explain OIS, AMOLED, refresh rate, mAh, 5G, IP68, and more. Which feature?")
         return {"response": response, "products": [], "intent": "explain_feature", "suggestions": ["What is AMOLED?", "Explain refresh rate", "What does IP68 mean?"]}
 
-    def _generate_comparison_response(self, phones: List[Phone]) -> Dict[str, Any]:
+    def _generate_comparison_response(self, phones: List[PhoneLike]) -> Dict[str, Any]:
         if len(phones) < 2:
             return {"response": "Please specify at least two phones to compare.", "products": [], "intent": "compare_phones", "suggestions": ["Compare Samsung S24 vs OnePlus 12"]}
         summary = self.product_service.generate_comparison_summary(phones)
@@ -87,7 +87,7 @@ class ResponseGenerator:
         phone_names = [f"{p.brand} {p.model}" for p in phones]
         return {"response": f"Comparison of {', '.join(phone_names)}:\n\n{summary}", "products": phone_responses, "intent": "compare_phones", "suggestions": ["Which has better camera?", "Which is better value?"]}
 
-    def _generate_details_response(self, phone: Phone) -> Dict[str, Any]:
+    def _generate_details_response(self, phone: PhoneLike) -> Dict[str, Any]:
         phone_response = self.product_service.phone_to_response(phone)
         features_text = ""
         if phone.features:
@@ -98,7 +98,7 @@ class ResponseGenerator:
         response = f"{phone.brand} {phone.model}: {phone.price_inr:,} | {phone.display_size}\" {phone.display_type} {phone.refresh_rate}Hz | {phone.processor} | {phone.ram_gb}GB RAM | {phone.battery_mah}mAh | {features_text}"
         return {"response": response, "products": [phone_response], "intent": "get_details", "suggestions": [f"Compare {phone.model} with alternatives"]}
 
-    def _generate_search_response(self, query: str, intent: Dict[str, Any], phones: List[Phone]) -> Dict[str, Any]:
+    def _generate_search_response(self, query: str, intent: Dict[str, Any], phones: List[PhoneLike]) -> Dict[str, Any]:
         params = intent.get("extracted_params", {})
         intent_type = intent.get("intent", "search_phones")
         if not phones:
@@ -123,10 +123,10 @@ You are a friendly mobile phone shopping assistant. Keep responses concise (2-3
 User: {query} [/INST]"""
         try:
             response = await self.llm_service.generate(prompt, max_tokens=200, temperature=0.7)
-            logger.info(f"[RESPONSE_GEN] LLM response: {response[:100]}...")
+            logger.debug("[RESPONSE_GEN] LLM response: %.100s", response)
             return {"response": response, "products": [], "intent": "chitchat", "suggestions": ["Best phones under 25,000", "Show flagship phones", "Best camera phones"]}
         except Exception as e:
-            logger.error(f"[RESPONSE_GEN] LLM failed: {e}")
+            logger.error("[RESPONSE_GEN] LLM failed: %s", e)
             return self._generate_chitchat_response(query)
 
     async def _generate_llm_feature_explanation(self, query: str) -> Dict[str, Any]:
@@ -137,13 +137,13 @@ User asks: {query}
 Explain: [/INST]"""
         try:
             response = await self.llm_service.generate(prompt, max_tokens=300, temperature=0.5)
-            logger.info(f"[RESPONSE_GEN] LLM response: {response[:100]}...")
+            logger.debug("[RESPONSE_GEN] LLM response: %.100s", response)
             return {"response": response, "products": [], "intent": "explain_feature", "suggestions": ["What is AMOLED?", "Explain refresh rate", "What does IP68 mean?"]}
         except Exception as e:
-            logger.error(f"[RESPONSE_GEN] LLM failed: {e}")
+            logger.error("[RESPONSE_GEN] LLM failed: %s", e)
             return self._generate_feature_explanation(query)
 
-    async def _generate_llm_comparison_response(self, query: str, phones: List[Phone]) -> Dict[str, Any]:
+    async def _generate_llm_comparison_response(self, query: str, phones: List[PhoneLike]) -> Dict[str, Any]:
         if len(phones) < 2:
             return {"response": "Please specify at least two phones to compare.", "products": [], "intent": "compare_phones", "suggestions": ["Compare Samsung S24 vs OnePlus 12"]}
 
@@ -159,13 +159,13 @@ Specs:
 [/INST]"""
         try:
             response = await self.llm_service.generate(prompt, max_tokens=500, temperature=0.5)
-            logger.info(f"[RESPONSE_GEN] LLM response: {response[:100]}...")
+            logger.debug("[RESPONSE_GEN] LLM response: %.100s", response)
             return {"response": response, "products": self.product_service.phones_to_response(phones), "intent": "compare_phones", "suggestions": ["Which has better camera?", "Which is better value?"]}
         except Exception as e:
-            logger.error(f"[RESPONSE_GEN] LLM failed: {e}")
+            logger.error("[RESPONSE_GEN] LLM failed: %s", e)
             return self._generate_comparison_response(phones)
 
-    async def _generate_llm_details_response(self, query: str, phone: Phone) -> Dict[str, Any]:
+    async def _generate_llm_details_response(self, query: str, phone: PhoneLike) -> Dict[str, Any]:
         features_text = ""
         if phone.features:
             try:
@@ -183,13 +183,13 @@ Phone: {phone_info}
 [/INST]"""
         try:
             response = await self.llm_service.generate(prompt, max_tokens=400, temperature=0.6)
-            logger.info(f"[RESPONSE_GEN] LLM response: {response[:100]}...")
+            logger.debug("[RESPONSE_GEN] LLM response: %.100s", response)
             return {"response": response, "products": [self.product_service.phone_to_response(phone)], "intent": "get_details", "suggestions": [f"Compare {phone.model} with alternatives"]}
         except Exception as e:
-            logger.error(f"[RESPONSE_GEN] LLM failed: {e}")
+            logger.error("[RESPONSE_GEN] LLM failed: %s", e)
             return self._generate_details_response(phone)
 
-    async def _generate_llm_search_response(self, query: str, intent: Dict[str, Any], phones: List[Phone]) -> Dict[str, Any]:
+    async def _generate_llm_search_response(self, query: str, intent: Dict[str, Any], phones: List[PhoneLike]) -> Dict[str, Any]:
         params = intent.get("extracted_params", {})
         intent_type = intent.get("intent", "search_phones")
 
@@ -209,10 +209,10 @@ Found {len(phones)} phones:
 [/INST]"""
         try:
             response = await self.llm_service.generate(prompt, max_tokens=400, temperature=0.6)
-            logger.info(f"[RESPONSE_GEN] LLM response: {response[:100]}...")
+            logger.debug("[RESPONSE_GEN] LLM response: %.100s", response)
             return {"response": response, "products": self.product_service.phones_to_response(phones), "intent": intent_type, "suggestions": self._generate_follow_up_suggestions(intent_type, params)}
         except Exception as e:
-            logger.error(f"[RESPONSE_GEN] LLM failed: {e}")
+            logger.error("[RESPONSE_GEN] LLM failed: %s", e)
             return self._generate_search_response(query, intent, phones)
 
 
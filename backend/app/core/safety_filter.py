@@ -1,10 +1,22 @@
 import re
+import hashlib
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, AsyncIterator
+
+from app.config import get_settings
+from app.core.verdict_cache import VerdictCache
+from app.observability import tracing
+from app.utils.query_analysis import QueryAnalysis, analyze_query, normalize_query
 
 
 logger = logging.getLogger(__name__)
 
+# Opening parentheses of capturing groups (not escaped, not already "(?...")
+_CAPTURING_GROUP = re.compile(r'(?<!\\)\((?!\?)')
+
+# Order of the check_input() result fields in cached verdict tuples
+_VERDICT_FIELDS = ("is_safe", "is_adversarial", "is_off_topic", "reason", "severity")
+
 
 class SafetyFilter:
     """Multi-layer safety filter for adversarial input detection."""
@@ -71,24 +83,89 @@ class SafetyFilter:
         "hack" + r"(?:athon|er\s+news)"  # hackathon, hacker news (allowed)
     ]
 
-    def __init__(self):
-        self.compiled_adversarial = [
-            re.compile(pattern, re.IGNORECASE)
-            for pattern in self.ADVERSARIAL_PATTERNS
-        ]
-        self.compiled_off_topic = [
-            re.compile(pattern, re.IGNORECASE)
-            for pattern in self.OFF_TOPIC_PATTERNS
+    ENCODING_PATTERNS = [
+        r"base64",
+        r"\\x[0-9a-f]{2}",
+        r"%[0-9a-f]{2}",
+        r"&#\d+;",
+    ]
+
+    SUSPICIOUS_CHARACTERS = "{}[]<>\\|`~^"
+
+    # Patterns that might indicate prompt leakage in model output. Each is a
+    # literal phrase with \s+ between words; StreamingSanitizer relies on that
+    # to bound its lookahead window.
+    LEAKAGE_PATTERNS = [
+        r"system\s+prompt",
+        r"my\s+instructions",
+        r"i\s+was\s+told\s+to",
+        r"i\s+am\s+programmed\s+to",
+        r"my\s+rules\s+are",
+    ]
+
+    LEAKAGE_FALLBACK = "I'm a mobile phone shopping assistant. How can I help you find your perfect phone?"
+
+    def __init__(self, cache_size: int = 4096):
+        self.verdict_cache = VerdictCache(cache_size)
+        self._compile_patterns()
+
+    def _pattern_signature(self) -> tuple:
+        return (
+            tuple(self.PHONE_RELATED_ALLOW),
+            tuple(self.ADVERSARIAL_PATTERNS),
+            tuple(self.OFF_TOPIC_PATTERNS),
+            tuple(self.ENCODING_PATTERNS),
+            tuple(self.LEAKAGE_PATTERNS),
+        )
+
+    @property
+    def pattern_version(self) -> str:
+        """Version of the compiled pattern set; recompiles if the lists changed."""
+        if self._pattern_signature() != self._signature:
+            logger.info("[SAFETY] Pattern lists changed - recompiling")
+            self._compile_patterns()
+        return self._version
+
+    def _compile_patterns(self):
+        self._signature = self._pattern_signature()
+        self._version = hashlib.sha1(repr(self._signature).encode("utf-8")).hexdigest()[:12]
+        self.allow_automaton = self._compile_automaton(self.PHONE_RELATED_ALLOW, "allow")
+        self.adversarial_automaton = self._compile_automaton(self.ADVERSARIAL_PATTERNS, "adv")
+        self.off_topic_automaton = self._compile_automaton(self.OFF_TOPIC_PATTERNS, "off")
+        self.encoding_automaton = self._compile_automaton(self.ENCODING_PATTERNS, "enc")
+        self.leakage_automaton = self._compile_automaton(self.LEAKAGE_PATTERNS, "leak")
+        self.leakage_window = max(
+            len(pattern.replace(r"\s+", " ")) for pattern in self.LEAKAGE_PATTERNS
+        )
+        # Consulted in list order only after the automaton finds a hit
+        self.adversarial_patterns = [
+            (re.compile(pattern), self._determine_severity(pattern)) for pattern in self.ADVERSARIAL_PATTERNS
         ]
-        self.compiled_allow = [
-            re.compile(pattern, re.IGNORECASE)
-            for pattern in self.PHONE_RELATED_ALLOW
+
+    @staticmethod
+    def _compile_automaton(patterns: List[str], prefix: str) -> re.Pattern:
+        """
+        Combine a pattern list into a single alternation.
+
+        Each alternative ends in an empty named group ``<prefix><index>`` so
+        ``match.lastgroup`` tells which pattern fired. Inner groups are made
+        non-capturing and the regex is compiled case-sensitive: callers pass
+        lowercased text, which lets the engine skip branches on their first
+        literal instead of case-folding every character.
+        """
+        alternatives = [
+            f"{_CAPTURING_GROUP.sub('(?:', pattern)}(?P<{prefix}{index}>)"
+            for index, pattern in enumerate(patterns)
         ]
+        return re.compile("|".join(alternatives))
 
-    def check_input(self, query: str) -> Dict[str, Any]:
+    def check_input(self, query: str, analysis: Optional[QueryAnalysis] = None) -> Dict[str, Any]:
         """
         Check if input is safe.
 
+        A precomputed QueryAnalysis can be passed to reuse its normalized text
+        and lexicon hits.
+
         Returns:
             Dict with:
             - is_safe: bool
@@ -97,8 +174,7 @@ class SafetyFilter:
             - reason: str (if not safe)
             - severity: str (low/medium/high)
         """
-        logger.info("[SAFETY] check_input() called")
-        logger.info(f"[SAFETY] Query: {query[:200]}..." if len(query) > 200 else f"[SAFETY] Query: {query}")
+        logger.debug("[SAFETY] check_input(): %.200s", query)
 
         if not query or not query.strip():
             logger.warning("[SAFETY] Empty query detected")
@@ -110,49 +186,59 @@ class SafetyFilter:
                 "severity": "low"
             }
 
-        query_lower = query.lower().strip()
+        # Verdicts depend only on the normalized text and the pattern set
+        key = analysis.key if analysis else normalize_query(query)
+        version = self.pattern_version
+        cached = self.verdict_cache.get(key, version)
+        tracing.annotate(safety_cache_hit=cached is not None)
+        if cached is not None:
+            logger.debug("[SAFETY] Verdict cache hit")
+            return dict(zip(_VERDICT_FIELDS, cached))
+
+        result = self._evaluate(analysis or analyze_query(query))
+        self.verdict_cache.put(key, version, tuple(result[field] for field in _VERDICT_FIELDS))
+        return result
+
+    def _evaluate(self, analysis: QueryAnalysis) -> Dict[str, Any]:
+        """Run the pattern checks on an analysed, non-empty query."""
+        query_lower = analysis.normalized
 
         # Check for phone-related allowlist first
-        for pattern in self.compiled_allow:
-            if pattern.search(query_lower):
-                logger.info("[SAFETY] Query matches allowlist - SAFE")
-                return {
-                    "is_safe": True,
-                    "is_adversarial": False,
-                    "is_off_topic": False,
-                    "reason": None,
-                    "severity": None
-                }
+        if self.allow_automaton.search(query_lower):
+            logger.debug("[SAFETY] Query matches allowlist - SAFE")
+            return {
+                "is_safe": True,
+                "is_adversarial": False,
+                "is_off_topic": False,
+                "reason": None,
+                "severity": None
+            }
 
-        # Check adversarial patterns
-        for pattern in self.compiled_adversarial:
-            if pattern.search(query_lower):
-                logger.warning(f"[SAFETY] ADVERSARIAL pattern matched: {pattern.pattern}")
-                return {
-                    "is_safe": False,
-                    "is_adversarial": True,
-                    "is_off_topic": False,
-                    "reason": "Potential adversarial input detected",
-                    "severity": self._determine_severity(pattern.pattern)
-                }
+        # Check adversarial patterns. The automaton only screens: severity comes
+        # from the first pattern in list order that matches anywhere, which need
+        # not be the pattern matching first in the text.
+        if self.adversarial_automaton.search(query_lower):
+            for pattern, severity in self.adversarial_patterns:
+                if pattern.search(query_lower):
+                    logger.warning("[SAFETY] ADVERSARIAL pattern matched: %s", pattern.pattern)
+                    return {
+                        "is_safe": False,
+                        "is_adversarial": True,
+                        "is_off_topic": False,
+                        "reason": "Potential adversarial input detected",
+                        "severity": severity
+                    }
 
         # Check off-topic patterns (but be lenient)
-        off_topic_matches = sum(
-            1 for pattern in self.compiled_off_topic
-            if pattern.search(query_lower)
-        )
+        off_topic_matches = len({
+            match.lastgroup for match in self.off_topic_automaton.finditer(query_lower)
+        })
 
         # Only flag as off-topic if clearly not phone-related
-        phone_keywords = [
-            "phone", "mobile", "smartphone", "device", "app",
-            "battery", "camera", "display", "screen", "processor",
-            "ram", "storage", "android", "ios", "samsung", "oneplus",
-            "google", "pixel", "xiaomi", "realme", "vivo", "oppo"
-        ]
-        has_phone_context = any(kw in query_lower for kw in phone_keywords)
+        has_phone_context = analysis.has_any("phone_context")
 
         if off_topic_matches > 0 and not has_phone_context:
-            logger.info(f"[SAFETY] Off-topic matches: {off_topic_matches}, phone context: {has_phone_context}")
+            logger.debug("[SAFETY] Off-topic matches: %d, phone context: %s", off_topic_matches, has_phone_context)
             if off_topic_matches >= 2:
                 logger.warning("[SAFETY] OFF-TOPIC query detected")
                 return {
@@ -164,8 +250,8 @@ class SafetyFilter:
                 }
 
         # Check for excessive length (potential payload)
-        if len(query) > 2000:
-            logger.warning(f"[SAFETY] Query too long: {len(query)} chars")
+        if len(query_lower) > 2000:
+            logger.warning("[SAFETY] Query too long: %d chars", len(query_lower))
             return {
                 "is_safe": False,
                 "is_adversarial": True,
@@ -174,7 +260,7 @@ class SafetyFilter:
                 "severity": "medium"
             }
 
-        if self._has_suspicious_characters(query):
+        if self._has_suspicious_characters(query_lower):
             logger.warning("[SAFETY] Suspicious characters detected")
             return {
                 "is_safe": False,
@@ -184,7 +270,7 @@ class SafetyFilter:
                 "severity": "medium"
             }
 
-        logger.info("[SAFETY] Query is SAFE")
+        logger.debug("[SAFETY] Query is SAFE")
         return {
             "is_safe": True,
             "is_adversarial": False,
@@ -211,47 +297,70 @@ class SafetyFilter:
         return "low"
 
     def _has_suspicious_characters(self, text: str) -> bool:
-        """Check for suspicious character patterns."""
-        special_chars = sum(1 for c in text if c in "{}[]<>\\|`~^")
+        """Check lowercased text for suspicious character patterns."""
+        special_chars = sum(text.count(c) for c in self.SUSPICIOUS_CHARACTERS)
         if special_chars > 10:
             return True
 
-        encoding_patterns = [
-            r"base64",
-            r"\\x[0-9a-f]{2}",
-            r"%[0-9a-f]{2}",
-            r"&#\d+;",
-        ]
-        for pattern in encoding_patterns:
-            if re.search(pattern, text, re.IGNORECASE):
-                return True
+        return self.encoding_automaton.search(text) is not None
 
-        return False
+    def check_batch(self, queries: List[str]) -> List[Dict[str, Any]]:
+        """
+        Screen a batch of messages, e.g. queued or imported content.
+
+        Duplicate messages are only screened once. Results are returned in
+        input order, one dict per message in the check_input() format.
+        """
+        verdicts: Dict[str, Dict[str, Any]] = {}
+        results = []
+        for query in queries:
+            verdict = verdicts.get(query)
+            if verdict is None:
+                verdict = verdicts[query] = self.check_input(query)
+            results.append(dict(verdict))
+        return results
 
     def sanitize_output(self, response: str) -> str:
         """Sanitize output to prevent prompt leakage."""
-        # Patterns that might indicate prompt leakage
-        leakage_patterns = [
-            r"system\s+prompt",
-            r"my\s+instructions",
-            r"I\s+was\s+told\s+to",
-            r"I\s+am\s+programmed\s+to",
-            r"my\s+rules\s+are",
-        ]
-
-        for pattern in leakage_patterns:
-            if re.search(pattern, response, re.IGNORECASE):
-                return "I'm a mobile phone shopping assistant. How can I help you find your perfect phone?"
+        if self.leakage_automaton.search(response.lower()):
+            return self.LEAKAGE_FALLBACK
 
         return response
 
+    def stream_sanitizer(self) -> "StreamingSanitizer":
+        """Create an incremental sanitizer for one streamed response."""
+        return StreamingSanitizer(self.leakage_automaton, self.leakage_window)
+
+    async def sanitize_stream(self, chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+        """
+        Sanitize a streamed response chunk by chunk.
+
+        Safe text is yielded as soon as it is outside the lookahead window. On
+        a leakage match the stream is cut and the fallback message is yielded
+        instead of the rest of the response.
+        """
+        sanitizer = self.stream_sanitizer()
+        emitted = False
+        async for chunk in chunks:
+            released = sanitizer.feed(chunk)
+            if released:
+                emitted = True
+                yield released
+            if sanitizer.tripped:
+                logger.warning("[SAFETY] Leakage detected in streamed output - cutting stream")
+                yield f"\n\n{self.LEAKAGE_FALLBACK}" if emitted else self.LEAKAGE_FALLBACK
+                return
+
+        remainder = sanitizer.close()
+        if remainder:
+            yield remainder
+
     def get_safe_response(self, check_result: Dict[str, Any]) -> str:
         """Generate appropriate response for unsafe input."""
-        logger.info("[SAFETY] get_safe_response() called")
-        logger.info(f"[SAFETY] Check result: {check_result}")
+        logger.debug("[SAFETY] get_safe_response(): %s", check_result)
 
         if check_result.get("is_adversarial"):
-            logger.warning("[SAFETY] Returning HARDCODED adversarial response")
+            logger.debug("[SAFETY] Returning HARDCODED adversarial response")
             return (
                 "I'm a mobile phone shopping assistant focused on helping you "
                 "find the perfect smartphone. I can help with phone recommendations, "
@@ -260,14 +369,14 @@ class SafetyFilter:
             )
 
         if check_result.get("is_off_topic"):
-            logger.warning("[SAFETY] Returning HARDCODED off-topic response")
+            logger.debug("[SAFETY] Returning HARDCODED off-topic response")
             return (
                 "I specialize in mobile phone shopping assistance. I can help you "
                 "find phones based on your budget, compare different models, or "
                 "explain phone features. What would you like to know about smartphones?"
             )
 
-        logger.warning("[SAFETY] Returning HARDCODED generic response")
+        logger.debug("[SAFETY] Returning HARDCODED generic response")
         return (
             "I didn't quite understand that. I'm here to help you find the perfect "
             "mobile phone. You can ask me about phone recommendations, comparisons, "
@@ -275,6 +384,58 @@ class SafetyFilter:
         )
 
 
+class StreamingSanitizer:
+    """
+    Incremental leakage check for streamed output.
+
+    Only a bounded tail of the stream is kept: the shortest suffix that spans
+    ``window`` characters once whitespace runs are collapsed, which is as long
+    as the longest leakage phrase. Everything before it can no longer be part
+    of a match and is released by feed() straight away. After a match the
+    held-back text is dropped and every later call returns "".
+    """
+
+    def __init__(self, automaton: re.Pattern, window: int):
+        self._automaton = automaton
+        self._window = window
+        self._buffer = ""
+        self.tripped = False
+
+    def feed(self, chunk: str) -> str:
+        """Add a chunk and return the text that is now safe to emit."""
+        if self.tripped or not chunk:
+            return ""
+
+        self._buffer += chunk
+        if self._automaton.search(self._buffer.lower()):
+            self.tripped = True
+            self._buffer = ""
+            return ""
+
+        cut = self._holdback_start()
+        released, self._buffer = self._buffer[:cut], self._buffer[cut:]
+        return released
+
+    def close(self) -> str:
+        """Flush the held-back tail at end of stream."""
+        if self.tripped:
+            return ""
+        released, self._buffer = self._buffer, ""
+        return released
+
+    def _holdback_start(self) -> int:
+        buffer = self._buffer
+        index = len(buffer)
+        remaining = self._window
+        while index > 0 and remaining > 0:
+            index -= 1
+            if buffer[index].isspace():
+                while index > 0 and buffer[index - 1].isspace():
+                    index -= 1
+            remaining -= 1
+        return index
+
+
 # Singleton instance
 _safety_filter: Optional[SafetyFilter] = None
 
@@ -283,5 +444,5 @@ def get_safety_filter() -> SafetyFilter:
     """Get safety filter singleton."""
     global _safety_filter
     if _safety_filter is None:
-        _safety_filter = SafetyFilter()
+        _safety_filter = SafetyFilter(cache_size=get_settings().verdict_cache_size)
     return _safety_filter
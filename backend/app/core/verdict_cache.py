@@ -0,0 +1,63 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class VerdictCache:
+    """
+    Bounded LRU cache for pure per-message decisions.
+
+    ``key`` is the normalized message and ``version`` identifies the pattern
+    set the decision was made with. All entries belong to one version: a
+    lookup with a new version empties the cache, so a pattern change never
+    serves stale verdicts. Values are compact tuples; callers expand them
+    back into their result dicts.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._version: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, version: str) -> Optional[tuple]:
+        if version != self._version:
+            # Pattern set changed: drop everything made with the old one
+            self._entries.clear()
+            self._version = version
+
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: Hashable, version: str, value: tuple):
+        if self.maxsize <= 0 or version != self._version:
+            return
+
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "version": self._version,
+        }
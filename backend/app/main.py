@@ -1,93 +1,63 @@
-import json
+import asyncio
 import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
 from app.config import get_settings
-from app.api.routes import chat, products, health
+from app.api.routes import chat, products, health, analytics, metrics
+from app.middleware import AccessLogMiddleware, MetricsMiddleware, RequestContextMiddleware
 from app.models.database import init_db
-
-# Configure root logging to capture all module logs
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(name)s] %(levelname)s: %(message)s",
-    handlers=[logging.StreamHandler()]
+from app.services.analytics_buffer import get_analytics_buffer
+from app.services.session_janitor import get_session_janitor
+from app.observability import configure_logging, shutdown_logging
+from app.observability.loop_monitor import LoopLagMonitor
+from app.observability.metrics import (
+    EVENT_LOOP_LAG, REGISTRY, configure_metrics, write_snapshots_periodically
 )
 
-# Set specific loggers to INFO level to ensure our logs show
-for logger_name in ["app", "app.api", "app.core", "app.services"]:
-    logging.getLogger(logger_name).setLevel(logging.INFO)
+settings = get_settings()
+
+# Records are formatted and written by a background thread
+configure_logging(settings.log_level, settings.log_levels, settings.log_format)
+configure_metrics(settings.metrics_multiproc_dir)
 
 logger = logging.getLogger("app")
 
 
-class ResponseLoggerMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        # call the actual route handler
-        response = await call_next(request)
-
-        # try to capture the response body (works for normal JSON responses;
-        # for streaming responses we rebuild the Response)
-        body_text = "<unavailable>"
-        try:
-            if hasattr(response, "body_iterator"):
-                body = b""
-                async for chunk in response.body_iterator:
-                    # append chunks instead of overwriting
-                    if isinstance(chunk, (bytes, bytearray)):
-                        body += chunk
-                    else:
-                        body += str(chunk).encode("utf-8")
-                # rebuild response so body is preserved for client
-                resp = Response(content=body, status_code=response.status_code,
-                                headers=dict(response.headers), media_type=response.media_type)
-                response = resp
-                body_text = body.decode("utf-8", errors="replace")
-            else:
-                # many Response objects expose .body or can be awaited
-                if hasattr(response, "body"):
-                    body = response.body
-                    if isinstance(body, (bytes, bytearray)):
-                        body_text = body.decode("utf-8", errors="replace")
-                    else:
-                        body_text = str(body)
-                else:
-                    # fallback: try to await .body()
-                    body_bytes = await response.body()
-                    body_text = body_bytes.decode("utf-8", errors="replace")
-        except Exception:
-            body_text = "<error reading body>"
-
-        # truncate long bodies
-        if len(body_text) > 2000:
-            body_text = body_text[:2000] + "...(truncated)"
-
-        # try to extract a 'source' field from JSON if present
-        source_tag = ""
-        try:
-            j = json.loads(body_text)
-            if isinstance(j, dict) and "source" in j:
-                source_tag = f" source={j['source']}"
-        except Exception:
-            pass
-
-        logger.info(f"{request.method} {request.url.path} -> status={response.status_code}{source_tag} body={body_text}")
-
-        return response
-    
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Handle startup and shutdown events."""
     # Startup
     await init_db()
-    print("✓ Database initialized")
+    logger.info("Database initialized")
+    analytics_buffer = get_analytics_buffer()
+    analytics_buffer.start()
+    session_janitor = get_session_janitor() if settings.session_ttl_hours > 0 else None
+    if session_janitor is not None:
+        session_janitor.start()
+
+    loop_monitor = LoopLagMonitor(
+        settings.loop_lag_interval,
+        on_sample=lambda lag: EVENT_LOOP_LAG.set(value=lag),
+        block_threshold=settings.loop_block_threshold_ms / 1000 if settings.loop_block_detection else None
+    )
+    loop_monitor.start()
+    snapshot_writer = None
+    if settings.metrics_multiproc_dir:
+        snapshot_writer = asyncio.create_task(write_snapshots_periodically(settings.metrics_flush_interval))
+
     yield
     # Shutdown
-    print("Shutting down...")
+    logger.info("Shutting down...")
+    await loop_monitor.stop()
+    if session_janitor is not None:
+        await session_janitor.stop()
+    await analytics_buffer.stop()
+    if snapshot_writer is not None:
+        snapshot_writer.cancel()
+        REGISTRY.write_snapshot()
+    shutdown_logging()
 
 
 app = FastAPI(
@@ -97,8 +67,13 @@ app = FastAPI(
      lifespan=lifespan
  )
 
-app.add_middleware(ResponseLoggerMiddleware)
-settings = get_settings()
+app.add_middleware(MetricsMiddleware)
+
+app.add_middleware(
+    AccessLogMiddleware,
+    sample_rate=settings.access_log_sample_rate,
+    body_limit=settings.access_log_body_limit,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -108,9 +83,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Added last so it wraps everything: all log lines of a request carry its ID
+app.add_middleware(
+    RequestContextMiddleware,
+    trace_sample_rate=settings.log_trace_sample_rate,
+)
+
 app.include_router(health.router, prefix="/api/v1", tags=["Health"])
 app.include_router(chat.router, prefix="/api/v1/chat", tags=["Chat"])
 app.include_router(products.router, prefix="/api/v1/products", tags=["Products"])
+app.include_router(analytics.router, prefix="/api/v1/analytics", tags=["Analytics"])
+app.include_router(metrics.router, tags=["Metrics"])
 
 
 @app.get("/")
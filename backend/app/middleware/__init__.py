@@ -0,0 +1,9 @@
+from app.middleware.access_log import AccessLogMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.request_context import RequestContextMiddleware
+
+__all__ = [
+    "AccessLogMiddleware",
+    "MetricsMiddleware",
+    "RequestContextMiddleware"
+]
@@ -0,0 +1,103 @@
+import logging
+import random
+import re
+import time
+from typing import Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+# Cheap stand-in for json.loads(body)["source"]: only the captured prefix is searched
+SOURCE_PATTERN = re.compile(rb'"source"\s*:\s*"([^"\\]{0,64})"')
+
+# Only bodies that are readable in a log line are captured
+TEXT_CONTENT_TYPES = (b"application/json", b"text/", b"application/x-ndjson")
+
+
+class AccessLogMiddleware:
+    """
+    Pure ASGI access log middleware.
+
+    Wraps ``send`` and observes the response messages as they pass through:
+    nothing is buffered or rebuilt, so streaming responses keep streaming.
+    Every request gets a one-line status/latency entry; a sampled fraction
+    (``sample_rate``) also logs the first ``body_limit`` bytes of text
+    bodies, so logging cost is bounded regardless of payload size. Records
+    are only ever built from immutable arguments, so the queue handler set
+    up by configure_logging() formats and writes them off the event loop.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        sample_rate: float = 1.0,
+        body_limit: int = 2000,
+        logger_name: str = "app.access"
+    ):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.body_limit = max(body_limit, 0)
+        self.logger = logging.getLogger(logger_name)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self.logger.isEnabledFor(logging.INFO):
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        capture = self.body_limit > 0 and (
+            self.sample_rate >= 1.0 or random.random() < self.sample_rate
+        )
+        status_code = 500
+        captured = bytearray()
+        body_bytes = 0
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code, capture, body_bytes
+
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if capture:
+                    content_type = b""
+                    for name, value in message.get("headers", ()):
+                        if name.lower() == b"content-type":
+                            content_type = value.lower()
+                            break
+                    capture = content_type.startswith(TEXT_CONTENT_TYPES)
+
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                body_bytes += len(chunk)
+                room = self.body_limit - len(captured)
+                if capture and room > 0 and chunk:
+                    captured.extend(chunk[:room])
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self._emit(scope, status_code, body_bytes, captured if capture else None, start)
+
+    def _emit(self, scope: Scope, status_code: int, body_bytes: int, captured: Optional[bytearray], start: float):
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        method = scope.get("method", "")
+        path = scope.get("path", "")
+
+        if captured is None:
+            self.logger.info(
+                "%s %s -> status=%d bytes=%d %.1fms",
+                method, path, status_code, body_bytes, elapsed_ms
+            )
+            return
+
+        source_match = SOURCE_PATTERN.search(captured)
+        source_tag = f" source={source_match.group(1).decode('utf-8', 'replace')}" if source_match else ""
+        body_text = captured.decode("utf-8", errors="replace")
+        if body_bytes > len(captured):
+            body_text += "...(truncated)"
+
+        self.logger.info(
+            "%s %s -> status=%d%s bytes=%d %.1fms body=%s",
+            method, path, status_code, source_tag, body_bytes, elapsed_ms, body_text
+        )
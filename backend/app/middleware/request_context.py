@@ -0,0 +1,51 @@
+import re
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.observability.logs import begin_request, end_request, request_id_var
+
+
+# Incoming IDs are echoed into logs and headers, so only accept plain tokens
+VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+class RequestContextMiddleware:
+    """
+    Binds a correlation ID to every HTTP request.
+
+    Reuses a well-formed incoming ``X-Request-ID`` header or generates one,
+    makes it visible to every log record of the request (via a context
+    variable) and returns it in the response headers. Also decides once per
+    request whether its DEBUG trace records are kept.
+    """
+
+    def __init__(self, app: ASGIApp, header: str = "X-Request-ID", trace_sample_rate: float = 1.0):
+        self.app = app
+        self.header = header.lower().encode("latin-1")
+        self.trace_sample_rate = trace_sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = None
+        for name, value in scope.get("headers", ()):
+            if name == self.header:
+                candidate = value.decode("latin-1")
+                if VALID_REQUEST_ID.match(candidate):
+                    incoming = candidate
+                break
+
+        tokens = begin_request(incoming, self.trace_sample_rate)
+        request_id = request_id_var.get().encode("latin-1")
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", ())) + [(self.header, request_id)]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            end_request(tokens)
@@ -1,4 +1,5 @@
 from app.models.database import Phone, Conversation, Message, QueryAnalytics
+from app.models.records import PhoneRecord
 from app.models.schemas import (
     PhoneBase, PhoneResponse, PhoneCreate,
     ChatRequest, ChatResponse,
@@ -8,7 +9,7 @@ from app.models.schemas import (
 )
 
 __all__ = [
-    "Phone", "Conversation", "Message", "QueryAnalytics",
+    "Phone", "Conversation", "Message", "QueryAnalytics", "PhoneRecord",
     "PhoneBase", "PhoneResponse", "PhoneCreate",
     "ChatRequest", "ChatResponse",
     "CompareRequest", "CompareResponse",
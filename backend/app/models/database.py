@@ -1,46 +1,143 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, Text, ForeignKey, DateTime, LargeBinary
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy import Column, Integer, String, Float, Boolean, Text, ForeignKey, DateTime, LargeBinary, UniqueConstraint, Index, event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import sessionmaker, relationship, validates
 from datetime import datetime
+from typing import List, Tuple
 
 from app.config import get_settings
+from app.observability.metrics import instrument_engine
 
 settings = get_settings()
 
-engine = create_async_engine(
+
+def _is_sqlite_file(database_url: str) -> bool:
+    url = make_url(database_url)
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def _sqlite_pragmas(busy_timeout_ms: int, synchronous: str, cache_size_kib: int, mmap_size_mb: int,
+                    read_only: bool) -> List[str]:
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(busy_timeout_ms)}",
+        f"PRAGMA synchronous = {synchronous}",
+        f"PRAGMA cache_size = -{int(cache_size_kib)}",
+        f"PRAGMA mmap_size = {int(mmap_size_mb) * 1024 * 1024}",
+        "PRAGMA temp_store = MEMORY",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only = ON")
+    else:
+        # Persistent in the database file; readers then never wait for the writer
+        pragmas.insert(0, "PRAGMA journal_mode = WAL")
+    return pragmas
+
+
+def _set_pragmas_on_connect(engine: AsyncEngine, pragmas: List[str]):
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+def create_engines(
+    database_url: str,
+    profile: str = "wal",
+    echo: bool = False,
+    busy_timeout_ms: int = 5000,
+    synchronous: str = "NORMAL",
+    cache_size_kib: int = 16384,
+    mmap_size_mb: int = 64,
+    read_pool_size: int = 4,
+    read_pool_overflow: int = 16,
+    write_timeout: float = 30.0
+) -> Tuple[AsyncEngine, AsyncEngine]:
+    """
+    Create the (writer, reader) engines for ``database_url``.
+
+    With the "wal" profile on a file SQLite database, writes go through a
+    pool of exactly one connection: SQLite allows a single writer anyway,
+    and queueing for the pool (up to ``write_timeout`` seconds) is cheaper
+    and fairer than retrying on SQLITE_BUSY. Reads use a separate pool of
+    ``query_only`` connections which, in WAL mode, never wait for the
+    writer. Any other profile or database returns one engine for both.
+    """
+    if profile != "wal" or not _is_sqlite_file(database_url):
+        shared = create_async_engine(database_url, echo=echo, future=True)
+        return shared, shared
+
+    tuning = (busy_timeout_ms, synchronous, cache_size_kib, mmap_size_mb)
+    writer = create_async_engine(database_url, echo=echo, future=True, poolclass=AsyncAdaptedQueuePool,
+                                 pool_size=1, max_overflow=0, pool_timeout=write_timeout)
+    _set_pragmas_on_connect(writer, _sqlite_pragmas(*tuning, read_only=False))
+    reader = create_async_engine(database_url, echo=echo, future=True, poolclass=AsyncAdaptedQueuePool,
+                                 pool_size=read_pool_size, max_overflow=read_pool_overflow)
+    _set_pragmas_on_connect(reader, _sqlite_pragmas(*tuning, read_only=True))
+    return writer, reader
+
+
+engine, read_engine = create_engines(
     settings.database_url,
-    echo=settings.debug,
-    future=True
+    profile=settings.db_profile,
+    echo=settings.sql_echo,
+    busy_timeout_ms=settings.db_busy_timeout_ms,
+    synchronous=settings.db_synchronous,
+    cache_size_kib=settings.db_cache_size_kib,
+    mmap_size_mb=settings.db_mmap_size_mb,
+    read_pool_size=settings.db_read_pool_size,
+    read_pool_overflow=settings.db_read_pool_overflow,
+    write_timeout=settings.db_write_timeout
 )
 
+instrument_engine(engine)
+if read_engine is not engine:
+    instrument_engine(read_engine)
+
 AsyncSessionLocal = sessionmaker(
     engine,
     class_=AsyncSession,
     expire_on_commit=False
 )
 
+AsyncReadSessionLocal = sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False
+)
+
 Base = declarative_base()
 
 
+def normalize_brand(brand: str) -> str:
+    """Case-folded brand used for exact, indexed brand lookups."""
+    return brand.strip().casefold()
+
+
 class Phone(Base):
     """Phone model for storing mobile phone information."""
     __tablename__ = "phones"
+    # Brand lookups are exact on brand_key and ordered by price
+    __table_args__ = (Index("ix_phones_brand_key_price", "brand_key", "price_inr"),)
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     brand = Column(String(100), nullable=False, index=True)
+    brand_key = Column(String(100))  # normalize_brand(brand), kept in sync on assignment
     model = Column(String(200), nullable=False)
     price_inr = Column(Integer, nullable=False, index=True)
     display_size = Column(Float)
     display_type = Column(String(50))
     display_resolution = Column(String(50))
-    refresh_rate = Column(Integer)
+    refresh_rate = Column(Integer, index=True)
     processor = Column(String(200))
-    ram_gb = Column(Integer)
+    ram_gb = Column(Integer, index=True)
     storage_gb = Column(Integer)
     rear_camera = Column(String(200))
     front_camera = Column(String(100))
-    battery_mah = Column(Integer)
+    battery_mah = Column(Integer, index=True)
     fast_charging_w = Column(Integer)
     wireless_charging = Column(Boolean, default=False)
     os = Column(String(100))
@@ -57,6 +154,11 @@ class Phone(Base):
     # Relationship to embeddings
     embeddings = relationship("PhoneEmbedding", back_populates="phone")
 
+    @validates("brand")
+    def _set_brand_key(self, key, brand):
+        self.brand_key = normalize_brand(brand) if brand is not None else None
+        return brand
+
 
 class PhoneEmbedding(Base):
     """Phone embedding for semantic search."""
@@ -78,7 +180,7 @@ class Conversation(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     session_id = Column(String(100), unique=True, nullable=False, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
-    last_activity = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    last_activity = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     messages = relationship("Message", back_populates="conversation")
 
@@ -86,6 +188,8 @@ class Conversation(Base):
 class Message(Base):
     """Message model for conversation history."""
     __tablename__ = "messages"
+    # get_messages() filters on conversation_id and orders by created_at
+    __table_args__ = (Index("ix_messages_conversation_created", "conversation_id", "created_at"),)
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     conversation_id = Column(Integer, ForeignKey("conversations.id"), nullable=False)
@@ -107,13 +211,113 @@ class QueryAnalytics(Base):
     products_returned = Column(Integer)
     response_time_ms = Column(Integer)
     was_adversarial = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    stage_timings = Column(Text)  # JSON: stage name -> milliseconds
+    trace_meta = Column(Text)  # JSON: token counts, cache-hit flags
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class QueryRollup(Base):
+    """Per-minute, per-intent aggregate of QueryAnalytics (one row per worker)."""
+    __tablename__ = "query_rollups"
+    __table_args__ = (UniqueConstraint("minute", "intent", "source", name="uq_query_rollups_minute_intent_source"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    minute = Column(DateTime, nullable=False, index=True)
+    intent = Column(String(100), nullable=False)
+    source = Column(String(50), nullable=False, default="")  # worker that produced the row
+    count = Column(Integer, nullable=False, default=0)
+    adversarial_count = Column(Integer, nullable=False, default=0)
+    products_returned_sum = Column(Integer, nullable=False, default=0)
+    latency_sum_ms = Column(Integer, nullable=False, default=0)
+    latency_max_ms = Column(Integer)
+    p50_ms = Column(Integer)
+    p95_ms = Column(Integer)
+    p99_ms = Column(Integer)
+
+
+class CatalogState(Base):
+    """Single row (id 1) whose version changes whenever the phones table does."""
+    __tablename__ = "catalog_state"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+CATALOG_STATE_ID = 1
+
+# Every INSERT, UPDATE or DELETE on phones bumps the catalog version in the same
+# transaction, whichever code path (repository, seed script, raw SQL) made it
+_CATALOG_VERSION_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS trg_phones_catalog_version_{operation.lower()}
+    AFTER {operation} ON phones
+    BEGIN
+        UPDATE catalog_state SET version = version + 1 WHERE id = {CATALOG_STATE_ID};
+    END"""
+    for operation in ("INSERT", "UPDATE", "DELETE")
+]
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _install_catalog_version(target, conn, **kw):
+    """Seed the catalog_state row and the phones triggers (idempotent)."""
+    # Start from a random version so a recreated database is unlikely to reuse
+    # the versions (and so the ETags) of the one it replaced; in-process caches
+    # treat any version other than their own as a change, lower ones included
+    conn.execute(text(
+        f"INSERT OR IGNORE INTO catalog_state (id, version) VALUES ({CATALOG_STATE_ID}, random() & {2 ** 40 - 1})"
+    ))
+    for trigger in _CATALOG_VERSION_TRIGGERS:
+        conn.execute(text(trigger))
+
+
+def _backfill_brand_key(conn):
+    rows = conn.execute(text("SELECT id, brand FROM phones")).all()
+    if rows:
+        conn.execute(
+            text("UPDATE phones SET brand_key = :brand_key WHERE id = :id"),
+            [{"id": row.id, "brand_key": normalize_brand(row.brand)} for row in rows]
+        )
+
+
+# Fill derived columns of existing rows when the column is first added
+_BACKFILLS = {
+    ("phones", "brand_key"): _backfill_brand_key,
+}
+
+
+def _upgrade_schema(conn):
+    """Add columns and indexes introduced after a table was first created.
+
+    create_all() only creates missing tables, so databases from earlier
+    versions are brought up to date here. Only additive changes are applied.
+    """
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing_columns:
+                column_type = column.type.compile(dialect=conn.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}'))
+                backfill = _BACKFILLS.get((table.name, column.name))
+                if backfill is not None:
+                    backfill(conn)
+
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(conn, checkfirst=True)
 
 
 async def init_db():
     """Initialize database tables."""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_upgrade_schema)
 
 
 async def get_db():
@@ -123,3 +327,12 @@ async def get_db():
             yield session
         finally:
             await session.close()
+
+
+async def get_read_db():
+    """Dependency to get a read-only database session (never waits for writes)."""
+    async with AsyncReadSessionLocal() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
@@ -0,0 +1,62 @@
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Union
+
+from app.models.database import Phone
+
+
+def decode_json_list(value: Any) -> Optional[List[str]]:
+    if value is None or isinstance(value, list):
+        return value
+    try:
+        decoded = json.loads(value)
+    except (TypeError, json.JSONDecodeError):
+        return []
+    return decoded if isinstance(decoded, list) else []
+
+
+class PhoneRecord:
+    """
+    Read-only phone as returned by PhoneRepository lookups.
+
+    Built straight from a Core row: no identity map, no attribute
+    instrumentation, one slot per column. ``features`` and ``colors`` are
+    decoded once here instead of on every response. The bulky
+    ``specifications`` JSON and the internal ``brand_key`` are not loaded.
+    """
+
+    __slots__ = (
+        "id", "brand", "model", "price_inr", "display_size", "display_type", "display_resolution",
+        "refresh_rate", "processor", "ram_gb", "storage_gb", "rear_camera", "front_camera",
+        "battery_mah", "fast_charging_w", "wireless_charging", "os", "launch_year", "dimensions",
+        "weight_g", "features", "colors", "highlights", "image_url", "created_at",
+    )
+
+    id: int
+    brand: str
+    model: str
+    price_inr: int
+    features: Optional[List[str]]
+    colors: Optional[List[str]]
+    created_at: Optional[datetime]
+
+    def __init__(self, *values: Any):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+        self.features = decode_json_list(self.features)
+        self.colors = decode_json_list(self.colors)
+
+    @classmethod
+    def from_row(cls, row: Sequence[Any]) -> "PhoneRecord":
+        """Build from a row selected with ``PHONE_RECORD_COLUMNS``."""
+        return cls(*row)
+
+    def __repr__(self) -> str:
+        return f"PhoneRecord(id={self.id!r}, brand={self.brand!r}, model={self.model!r})"
+
+
+# Columns to select for PhoneRecord.from_row(), in slot order
+PHONE_RECORD_COLUMNS = tuple(Phone.__table__.c[name] for name in PhoneRecord.__slots__)
+
+# What services that format phones accept: ORM rows or read records
+PhoneLike = Union[Phone, PhoneRecord]
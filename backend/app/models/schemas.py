@@ -70,6 +70,23 @@ class PhoneListResponse(BaseModel):
     count: int
 
 
+class PhonePageResponse(PhoneListResponse):
+    """Response for a keyset-paginated phone list."""
+    next_cursor: Optional[str] = None
+
+
+class FacetCount(BaseModel):
+    """Number of matching phones with one facet value."""
+    value: str
+    count: int
+
+
+class FacetSearchResponse(PhoneListResponse):
+    """Response for faceted search: a page of phones, total matches and counts per facet."""
+    total: int
+    facets: Dict[str, List[FacetCount]]
+
+
 # ============ Chat Schemas ============
 
 class ChatRequest(BaseModel):
@@ -77,6 +94,8 @@ class ChatRequest(BaseModel):
     session_id: str = Field(..., min_length=1)
     message: str = Field(..., min_length=1, max_length=2000)
     context: Optional[Dict[str, Any]] = None
+    fields: Optional[List[str]] = Field(None, description="Product fields to return (id is always included)")
+    compact: bool = Field(False, description="Return products as value arrays in the order of a `fields` header")
 
 
 class ChatResponse(BaseModel):
@@ -141,6 +160,50 @@ class CompareResponse(BaseModel):
     recommendation: Optional[str] = None
 
 
+# ============ Analytics Schemas ============
+
+class LatencyStats(BaseModel):
+    """Latency percentiles in milliseconds."""
+    count: int
+    p50: Optional[float] = None
+    p95: Optional[float] = None
+    p99: Optional[float] = None
+
+
+class IntentLatency(BaseModel):
+    """Latency breakdown for one intent."""
+    total: LatencyStats
+    stages: Dict[str, LatencyStats]
+
+
+class LatencyReport(BaseModel):
+    """Per-stage and per-intent latency percentiles."""
+    window_hours: float
+    count: int
+    total: LatencyStats
+    stages: Dict[str, LatencyStats]
+    intents: Dict[str, IntentLatency]
+
+
+class RollupEntry(BaseModel):
+    """Counts and latency for one intent in one minute."""
+    minute: datetime
+    intent: str
+    count: int
+    adversarial_count: int
+    products_returned_sum: int
+    latency_sum_ms: int
+    latency_max_ms: Optional[int] = None
+    p50_ms: Optional[int] = None
+    p95_ms: Optional[int] = None
+    p99_ms: Optional[int] = None
+
+
+class RollupResponse(BaseModel):
+    """Per-minute rollups."""
+    rollups: List[RollupEntry]
+
+
 # ============ Health Schemas ============
 
 class HealthResponse(BaseModel):
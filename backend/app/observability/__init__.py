@@ -0,0 +1,15 @@
+from app.observability.logs import (
+    configure_logging,
+    shutdown_logging,
+    request_id_var,
+    begin_request,
+    end_request
+)
+
+__all__ = [
+    "configure_logging",
+    "shutdown_logging",
+    "request_id_var",
+    "begin_request",
+    "end_request"
+]
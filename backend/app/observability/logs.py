@@ -0,0 +1,148 @@
+"""Structured, queue-backed logging with per-request correlation IDs."""
+
+import atexit
+import json
+import logging
+import queue
+import random
+import uuid
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, Tuple
+
+# Set per request by RequestContextMiddleware; "-" outside of a request
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+# Whether this request's DEBUG records are kept (see log_trace_sample_rate)
+trace_sampled_var: ContextVar[bool] = ContextVar("trace_sampled", default=True)
+
+TEXT_FORMAT = "%(asctime)s [%(name)s] %(levelname)s [%(request_id)s]: %(message)s"
+
+# Argument types that cannot change between the log call and formatting
+_IMMUTABLE_ARGS = (str, int, float, bool, type(None), bytes)
+
+_listener: Optional[QueueListener] = None
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def begin_request(request_id: Optional[str] = None, trace_sample_rate: float = 1.0) -> Tuple:
+    """Bind a correlation ID and trace-sampling decision to the current context."""
+    sampled = trace_sample_rate >= 1.0 or random.random() < trace_sample_rate
+    return (
+        request_id_var.set(request_id or new_request_id()),
+        trace_sampled_var.set(sampled),
+    )
+
+
+def end_request(tokens: Tuple):
+    request_token, sampled_token = tokens
+    request_id_var.reset(request_token)
+    trace_sampled_var.reset(sampled_token)
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Stamps records with the current request ID and drops DEBUG records of
+    requests that were not sampled for tracing.
+
+    Runs in the calling thread (filters run before the queue), where the
+    request's context variables are visible.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.INFO and not trace_sampled_var.get():
+            return False
+        record.request_id = request_id_var.get()
+        return True
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves message formatting to the listener thread.
+
+    The stock handler formats every record before queueing it. Records whose
+    arguments are immutable are queued untouched instead; only records with
+    mutable arguments (dicts, lists, objects) are rendered eagerly so they
+    log the state at call time.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        args = record.args
+        if args and not (isinstance(args, tuple) and all(isinstance(a, _IMMUTABLE_ARGS) for a in args)):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging(
+    level: str = "INFO",
+    component_levels: Optional[Dict[str, str]] = None,
+    log_format: str = "text",
+) -> QueueListener:
+    """
+    Route all logging through a queue to a background writer thread.
+
+    ``component_levels`` maps logger names to levels (e.g. ``{"app.core":
+    "DEBUG", "sqlalchemy.engine": "WARNING"}``). Safe to call again: the
+    previous listener is stopped and replaced.
+    """
+    global _listener
+
+    stream_handler = logging.StreamHandler()
+    if log_format == "json":
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, (QueueHandler, logging.StreamHandler)) and not _is_pytest_handler(handler):
+            root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level.upper())
+
+    for name, component_level in (component_levels or {}).items():
+        logging.getLogger(name).setLevel(component_level.upper())
+
+    if _listener is not None:
+        _listener.stop()
+    _listener = QueueListener(log_queue, stream_handler)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _is_pytest_handler(handler: logging.Handler) -> bool:
+    return type(handler).__module__.startswith("_pytest")
+
+
+atexit.register(shutdown_logging)
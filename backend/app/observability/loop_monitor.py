@@ -0,0 +1,118 @@
+"""Event loop lag sampling and blocking-call detection."""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Callable, Deque, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    """
+    Measures how late the event loop runs a callback that was scheduled
+    ``interval`` seconds ahead. Anything beyond the interval is time the
+    loop spent blocked on other work, i.e. added latency for every request.
+
+    With ``block_threshold`` set, a heartbeat task ticks every quarter of the
+    threshold, independently of the sampling interval, and a watchdog thread
+    checks that it keeps ticking; when no tick arrives for the threshold the
+    watchdog captures the loop thread's stack, which points at the blocking
+    call itself (``asyncio`` debug mode only names the slow callback). Stack
+    capture is meant for debugging; lag sampling is cheap enough to leave on.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.5,
+        on_sample: Optional[Callable[[float], None]] = None,
+        block_threshold: Optional[float] = None,
+        on_block: Optional[Callable[[float, str], None]] = None
+    ):
+        self.interval = interval
+        self.on_sample = on_sample
+        self.block_threshold = block_threshold
+        self.on_block = on_block or _log_blocked
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.blocked_stacks: Deque[str] = deque(maxlen=20)
+        self._task: Optional[asyncio.Task] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._heartbeat = time.perf_counter()
+        self._loop_thread_id: Optional[int] = None
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._heartbeat = time.perf_counter()
+        self._loop_thread_id = threading.get_ident()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+        if self.block_threshold is not None:
+            self._heartbeat_task = asyncio.get_running_loop().create_task(self._beat(self.block_threshold / 4))
+            self._stopping.clear()
+            self._watchdog = threading.Thread(target=self._watch, name="loop-block-watchdog", daemon=True)
+            self._watchdog.start()
+
+    async def stop(self):
+        self._stopping.set()
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+        for task in (self._task, self._heartbeat_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = None
+        self._heartbeat_task = None
+
+    async def _run(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, time.perf_counter() - expected))
+
+    async def _beat(self, tick: float):
+        while True:
+            await asyncio.sleep(tick)
+            self._heartbeat = time.perf_counter()
+
+    def record(self, lag: float):
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        if self.on_sample is not None:
+            self.on_sample(lag)
+
+    def _watch(self):
+        # The heartbeat ticks every threshold / 4, so going a whole threshold
+        # without one means the loop is stuck; poll often enough to catch it
+        # while it still is, so the stack shows the blocking call
+        poll = self.block_threshold / 8
+        reported_heartbeat = None
+        while not self._stopping.wait(poll):
+            heartbeat = self._heartbeat
+            stalled = time.perf_counter() - heartbeat
+            if stalled < self.block_threshold or heartbeat == reported_heartbeat:
+                continue
+
+            # One report per stall: the loop is still on the same heartbeat
+            reported_heartbeat = heartbeat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = "".join(traceback.format_stack(frame))
+            self.blocked_stacks.append(stack)
+            self.on_block(stalled, stack)
+
+
+def _log_blocked(stalled: float, stack: str):
+    logger.warning("[LOOP] Event loop blocked for %.0fms; loop thread stack:\n%s", stalled * 1000, stack)
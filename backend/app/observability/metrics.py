@@ -0,0 +1,387 @@
+"""In-process metrics with Prometheus text exposition and multi-worker merging."""
+
+import json
+import math
+import os
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Seconds; covers sub-millisecond cache hits up to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    @abstractmethod
+    def snapshot(self) -> dict:
+        """This worker's values, JSON-serializable, keyed by _key(labels)."""
+
+    @staticmethod
+    def _key(labels: LabelValues) -> str:
+        # JSON-safe key for the snapshot files
+        return "\x1f".join(labels)
+
+
+class Counter(_Metric):
+    """
+    Monotonic counter per label set.
+
+    Updates are plain dict operations with no locking: the event loop is
+    single threaded, and a worker thread racing an increment can at worst
+    lose that one increment.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def set_total(self, *labels: str, value: float):
+        """For counters mirrored from another component's own tally."""
+        self._values[labels] = value
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def snapshot(self) -> dict:
+        return {self._key(labels): value for labels, value in self._values.items()}
+
+
+class Gauge(_Metric):
+    """
+    Point-in-time value per label set.
+
+    ``multiprocess_mode`` says how workers combine: ``"sum"`` (e.g. requests
+    in flight) or ``"max"`` (e.g. event loop lag).
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 multiprocess_mode: str = "sum"):
+        super().__init__(name, documentation, labelnames)
+        self.multiprocess_mode = multiprocess_mode
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, *labels: str, value: float):
+        self._values[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) - amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    @contextmanager
+    def track_inprogress(self, *labels: str) -> Iterator[None]:
+        self.inc(*labels)
+        try:
+            yield
+        finally:
+            self.dec(*labels)
+
+    def snapshot(self) -> dict:
+        return {self._key(labels): value for labels, value in self._values.items()}
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram per label set (bucket counts, sum, count)."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket..., +Inf count, sum]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, *labels: str, value: float):
+        series = self._values.get(labels)
+        if series is None:
+            series = self._values[labels] = [0.0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(*labels, value=time.perf_counter() - start)
+
+    def count(self, *labels: str) -> int:
+        series = self._values.get(labels)
+        return int(sum(series[:-1])) if series else 0
+
+    def snapshot(self) -> dict:
+        return {self._key(labels): list(series) for labels, series in self._values.items()}
+
+
+class MetricsRegistry:
+    """
+    Holds this process's metrics and renders them in Prometheus text format.
+
+    With several uvicorn workers each process only sees its own requests.
+    When ``multiproc_dir`` is set, every worker writes a snapshot of its
+    metrics to ``<multiproc_dir>/<pid>.json`` (periodically and on every
+    scrape), and whichever worker serves ``/metrics`` merges all snapshots:
+    counters and histograms are summed; gauges are summed or maxed per their
+    mode, and only counted for workers that are still alive.
+    """
+
+    def __init__(self, multiproc_dir: Optional[str] = None):
+        self.multiproc_dir = multiproc_dir
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._derived: List[Callable[[Dict[str, dict]], None]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+              multiprocess_mode: str = "sum") -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames, multiprocess_mode))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], None]):
+        """Register a callback that refreshes mirrored metrics before each snapshot."""
+        self._collectors.append(collector)
+
+    def add_derived(self, derive: Callable[[Dict[str, dict]], None]):
+        """Register a callback that fills metrics computed from the merged values (e.g. ratios)."""
+        self._derived.append(derive)
+
+    def _register(self, metric):
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def snapshot(self) -> dict:
+        for collector in self._collectors:
+            collector()
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def write_snapshot(self):
+        """Persist this worker's metrics for the other workers' scrapes."""
+        if not self.multiproc_dir:
+            return
+        directory = Path(self.multiproc_dir)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{os.getpid()}.json"
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.snapshot(), separators=(",", ":")))
+        os.replace(tmp_path, path)
+
+    def collect(self) -> Dict[str, dict]:
+        """This worker's values, merged with the other workers' snapshots if enabled."""
+        if not self.multiproc_dir:
+            return self.snapshot()
+
+        self.write_snapshot()
+        merged: Dict[str, dict] = {}
+        for path in Path(self.multiproc_dir).glob("*.json"):
+            try:
+                snapshot = json.loads(path.read_text())
+                pid = int(path.stem)
+            except (OSError, ValueError):
+                continue
+            alive = _pid_alive(pid)
+            for name, values in snapshot.items():
+                metric = self._metrics.get(name)
+                if metric is None:
+                    continue
+                if isinstance(metric, Gauge) and not alive:
+                    continue
+                _merge_into(metric, merged.setdefault(name, {}), values)
+        return merged
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        collected = self.collect()
+        for derive in self._derived:
+            derive(collected)
+        lines: List[str] = []
+        for name, metric in self._metrics.items():
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for key, value in sorted(collected.get(name, {}).items()):
+                labels = _split_key(key)
+                if isinstance(metric, Histogram):
+                    lines.extend(_histogram_lines(metric, labels, value))
+                else:
+                    lines.append(f"{name}{_format_labels(metric.labelnames, labels)} {_format_value(value)}")
+        lines.append("")
+        return "\n".join(lines)
+
+
+def _merge_into(metric: _Metric, merged: dict, values: dict):
+    for key, value in values.items():
+        current = merged.get(key)
+        if current is None:
+            merged[key] = list(value) if isinstance(value, list) else value
+        elif isinstance(metric, Histogram):
+            merged[key] = [a + b for a, b in zip(current, value)]
+        elif isinstance(metric, Gauge) and metric.multiprocess_mode == "max":
+            merged[key] = max(current, value)
+        else:
+            merged[key] = current + value
+
+
+def _histogram_lines(metric: Histogram, labels: LabelValues, series: List[float]) -> List[str]:
+    lines = []
+    cumulative = 0.0
+    for bound, bucket_count in zip(metric.buckets + (math.inf,), series[:-1]):
+        cumulative += bucket_count
+        le = "+Inf" if bound == math.inf else repr(bound)
+        bucket_labels = _format_labels(metric.labelnames + ("le",), labels + (le,))
+        lines.append(f"{metric.name}_bucket{bucket_labels} {_format_value(cumulative)}")
+    label_text = _format_labels(metric.labelnames, labels)
+    lines.append(f"{metric.name}_sum{label_text} {_format_value(series[-1])}")
+    lines.append(f"{metric.name}_count{label_text} {_format_value(cumulative)}")
+    return lines
+
+
+def _split_key(key: str) -> LabelValues:
+    return tuple(key.split("\x1f")) if key else ()
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# ============ Application metrics ============
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.",
+    ("method", "route", "status")
+)
+LLM_CALL_DURATION = REGISTRY.histogram(
+    "llm_call_duration_seconds", "HuggingFaceService call latency by method.", ("method",)
+)
+LLM_CALL_ERRORS = REGISTRY.counter(
+    "llm_call_errors_total", "HuggingFaceService calls that raised, by method.", ("method",)
+)
+DB_QUERY_DURATION = REGISTRY.histogram(
+    "db_query_duration_seconds", "SQL statement execution time by statement kind.", ("statement",)
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    "cache_lookups_total", "Cache lookups by cache and result (hit/miss).", ("cache", "result")
+)
+CACHE_HIT_RATIO = REGISTRY.gauge(
+    "cache_hit_ratio", "Cache hit ratio by cache, computed from cache_lookups_total of all workers.", ("cache",)
+)
+EVENT_LOOP_LAG = REGISTRY.gauge(
+    "event_loop_lag_seconds", "Most recent event loop scheduling delay (worst worker).",
+    multiprocess_mode="max"
+)
+CHAT_IN_FLIGHT = REGISTRY.gauge(
+    "chat_requests_in_flight", "Chat turns currently being processed (all workers)."
+)
+
+
+def _derive_cache_hit_ratio(collected: Dict[str, dict]):
+    lookups: Dict[str, Dict[str, float]] = {}
+    for key, value in collected.get(CACHE_LOOKUPS.name, {}).items():
+        cache, result = _split_key(key)
+        lookups.setdefault(cache, {})[result] = value
+
+    ratios = {}
+    for cache, results in lookups.items():
+        total = results.get("hit", 0.0) + results.get("miss", 0.0)
+        ratios[_Metric._key((cache,))] = results.get("hit", 0.0) / total if total else 0.0
+    collected[CACHE_HIT_RATIO.name] = ratios
+
+
+REGISTRY.add_derived(_derive_cache_hit_ratio)
+
+
+_STATEMENT_KINDS = frozenset({"SELECT", "INSERT", "UPDATE", "DELETE", "PRAGMA", "BEGIN", "COMMIT", "ROLLBACK"})
+
+
+def instrument_engine(engine):
+    """Time every SQL statement executed through ``engine`` (sync or async)."""
+    from sqlalchemy import event
+
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    # The start time lives on the statement's execution context, so a statement
+    # that fails (and never reaches after_cursor_execute) leaves nothing behind
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_start = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_query_start", None)
+        if start is None:
+            return
+        kind = statement.lstrip()[:8].split(None, 1)[0].upper() if statement else ""
+        DB_QUERY_DURATION.observe(kind if kind in _STATEMENT_KINDS else "OTHER",
+                                  value=time.perf_counter() - start)
+
+
+def configure_metrics(multiproc_dir: Optional[str] = None):
+    REGISTRY.multiproc_dir = multiproc_dir
+
+
+async def write_snapshots_periodically(interval: float):
+    """Keep this worker's snapshot fresh for scrapes served by other workers."""
+    import asyncio
+
+    while True:
+        await asyncio.sleep(interval)
+        REGISTRY.write_snapshot()
@@ -0,0 +1,83 @@
+"""Lightweight per-turn span tracing stored with QueryAnalytics."""
+
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+
+class Trace:
+    """
+    Stage durations and counters for one chat turn.
+
+    ``stages`` maps a span name to accumulated milliseconds (a stage that
+    runs twice, e.g. two LLM calls, is summed). ``meta`` holds counters and
+    flags such as token counts and cache hits.
+    """
+
+    __slots__ = ("stages", "meta", "_start")
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.meta: Dict[str, Any] = {}
+        self._start = time.perf_counter()
+
+    @property
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000
+
+    def add_stage(self, name: str, duration_ms: float):
+        self.stages[name] = self.stages.get(name, 0.0) + duration_ms
+
+    def count(self, name: str, amount: int = 1):
+        self.meta[name] = self.meta.get(name, 0) + amount
+
+    def stages_json(self) -> str:
+        return json.dumps({name: round(ms, 2) for name, ms in self.stages.items()}, separators=(",", ":"))
+
+    def meta_json(self) -> Optional[str]:
+        return json.dumps(self.meta, separators=(",", ":")) if self.meta else None
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+
+def start_trace() -> Trace:
+    """Begin a trace for the current task; spans recorded below it land in it."""
+    trace = Trace()
+    _current_trace.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time a stage of the current trace. A no-op outside of a trace."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add_stage(name, (time.perf_counter() - start) * 1000)
+
+
+def annotate(**values: Any):
+    """Set flags on the current trace (e.g. ``safety_cache_hit=True``)."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.meta.update(values)
+
+
+def count(name: str, amount: int = 1):
+    """Add to a counter on the current trace (e.g. token counts)."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.count(name, amount)
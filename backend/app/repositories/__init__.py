@@ -1,4 +1,5 @@
 from app.repositories.phone_repository import PhoneRepository
 from app.repositories.conversation_repository import ConversationRepository
+from app.repositories.analytics_repository import AnalyticsRepository
 
-__all__ = ["PhoneRepository", "ConversationRepository"]
+__all__ = ["PhoneRepository", "ConversationRepository", "AnalyticsRepository"]
@@ -0,0 +1,113 @@
+from typing import Any, Dict, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from datetime import datetime, timedelta
+import json
+
+from app.models.database import QueryAnalytics, QueryRollup
+from app.utils.helpers import percentile
+
+
+class AnalyticsRepository:
+    """Repository for query analytics reads."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_recent_timings(self, since: datetime, limit: int = 10000) -> List[tuple]:
+        """(intent, response_time_ms, stage_timings JSON) of the newest rows since ``since``."""
+        result = await self.db.execute(
+            select(QueryAnalytics.intent, QueryAnalytics.response_time_ms, QueryAnalytics.stage_timings)
+            .where(QueryAnalytics.created_at >= since)
+            .order_by(QueryAnalytics.id.desc())
+            .limit(limit)
+        )
+        return result.all()
+
+    async def get_rollups(self, since: datetime, intent: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Per-minute rollups since ``since``, oldest first; one entry per minute and intent.
+
+        Counts and sums are added up across workers; percentiles are the
+        worst worker's (rollup rows are per worker and percentiles don't add).
+        """
+        query = select(QueryRollup).where(QueryRollup.minute >= since)
+        if intent:
+            query = query.where(QueryRollup.intent == intent)
+        result = await self.db.execute(query.order_by(QueryRollup.minute, QueryRollup.intent))
+
+        merged: Dict[tuple, Dict[str, Any]] = {}
+        for rollup in result.scalars():
+            entry = merged.get((rollup.minute, rollup.intent))
+            if entry is None:
+                merged[(rollup.minute, rollup.intent)] = {
+                    "minute": rollup.minute,
+                    "intent": rollup.intent,
+                    "count": rollup.count,
+                    "adversarial_count": rollup.adversarial_count,
+                    "products_returned_sum": rollup.products_returned_sum,
+                    "latency_sum_ms": rollup.latency_sum_ms,
+                    "latency_max_ms": rollup.latency_max_ms,
+                    "p50_ms": rollup.p50_ms,
+                    "p95_ms": rollup.p95_ms,
+                    "p99_ms": rollup.p99_ms,
+                }
+                continue
+            for field in ("count", "adversarial_count", "products_returned_sum", "latency_sum_ms"):
+                entry[field] += getattr(rollup, field)
+            for field in ("latency_max_ms", "p50_ms", "p95_ms", "p99_ms"):
+                values = [v for v in (entry[field], getattr(rollup, field)) if v is not None]
+                entry[field] = max(values) if values else None
+
+        return list(merged.values())
+
+    async def get_latency_report(self, hours: float = 24, limit: int = 10000) -> Dict[str, Any]:
+        """p50/p95/p99 of the total and of every stage, overall and per intent."""
+        rows = await self.get_recent_timings(datetime.utcnow() - timedelta(hours=hours), limit)
+
+        total: List[float] = []
+        stages: Dict[str, List[float]] = {}
+        intents: Dict[str, Dict[str, Any]] = {}
+
+        for intent, response_time_ms, stage_timings in rows:
+            intent_bucket = intents.setdefault(intent or "unknown", {"total": [], "stages": {}})
+            if response_time_ms is not None:
+                total.append(response_time_ms)
+                intent_bucket["total"].append(response_time_ms)
+
+            for stage, duration in _parse_timings(stage_timings).items():
+                stages.setdefault(stage, []).append(duration)
+                intent_bucket["stages"].setdefault(stage, []).append(duration)
+
+        return {
+            "window_hours": hours,
+            "count": len(rows),
+            "total": latency_stats(total),
+            "stages": {stage: latency_stats(values) for stage, values in sorted(stages.items())},
+            "intents": {
+                intent: {
+                    "total": latency_stats(bucket["total"]),
+                    "stages": {stage: latency_stats(values) for stage, values in sorted(bucket["stages"].items())}
+                }
+                for intent, bucket in sorted(intents.items())
+            }
+        }
+
+
+def latency_stats(values: List[float]) -> Dict[str, Optional[float]]:
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+    }
+
+
+def _parse_timings(raw: Optional[str]) -> Dict[str, float]:
+    if not raw:
+        return {}
+    try:
+        timings = json.loads(raw)
+    except ValueError:
+        return {}
+    return timings if isinstance(timings, dict) else {}
@@ -0,0 +1,29 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+
+
+class CatalogVersioned(ABC):
+    """
+    In-memory state derived from the phones table at one catalog version.
+
+    Reads are served only to callers that read that same version; storing
+    for any other version first drops everything and adopts it. Versions
+    are compared for equality, not order: a recreated or restored database
+    can go back to a lower version, which is as much a change as a higher
+    one. A request still reading the snapshot before a write may switch the
+    state back briefly, but never sees or leaves entries of another version.
+    """
+
+    version: Optional[int] = None
+
+    def is_current(self, version: Optional[int]) -> bool:
+        return version == self.version
+
+    def _adopt(self, version: Optional[int]):
+        if version != self.version:
+            self.clear()
+            self.version = version
+
+    @abstractmethod
+    def clear(self):
+        """Drop all state built for the current version."""
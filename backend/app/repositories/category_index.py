@@ -0,0 +1,132 @@
+import logging
+from typing import Any, Dict, Mapping, Optional, Sequence, Set, Tuple
+
+from app.repositories.catalog_version import CatalogVersioned
+
+logger = logging.getLogger(__name__)
+
+FLAGSHIP_MIN_PRICE = 60000
+BUDGET_MAX_PRICE = 20000
+BATTERY_MIN_MAH = 5000
+
+
+class CategoryRule:
+    """
+    Declarative category membership over phone columns.
+
+    A phone belongs to the category when every ``at_least`` and ``at_most``
+    bound holds (NULL never does) and, if ``text_contains`` is given, any of
+    a column's terms appears in it, case-insensitively. Members are ranked by
+    ``rank_by``, highest first.
+    """
+
+    def __init__(
+        self,
+        rank_by: str,
+        at_least: Optional[Mapping[str, int]] = None,
+        at_most: Optional[Mapping[str, int]] = None,
+        text_contains: Optional[Mapping[str, Sequence[str]]] = None
+    ):
+        self.rank_by = rank_by
+        self.at_least = dict(at_least or {})
+        self.at_most = dict(at_most or {})
+        self.text_contains = {
+            column: tuple(term.lower() for term in terms) for column, terms in (text_contains or {}).items()
+        }
+
+    @property
+    def columns(self) -> Set[str]:
+        return {self.rank_by, *self.at_least, *self.at_most, *self.text_contains}
+
+    def matches(self, phone: Any) -> bool:
+        for column, bound in self.at_least.items():
+            value = getattr(phone, column)
+            if value is None or value < bound:
+                return False
+        for column, bound in self.at_most.items():
+            value = getattr(phone, column)
+            if value is None or value > bound:
+                return False
+        for column, terms in self.text_contains.items():
+            value = (getattr(phone, column) or "").lower()
+            if not any(term in value for term in terms):
+                return False
+        return True
+
+    def rank(self, phones: Sequence[Any]) -> Tuple[int, ...]:
+        """IDs of the member phones, best ranked first."""
+        members = [phone for phone in phones if self.matches(phone)]
+        members.sort(key=lambda phone: getattr(phone, self.rank_by) or 0, reverse=True)
+        return tuple(phone.id for phone in members)
+
+
+# New categories only need an entry here; they are served by
+# PhoneRepository.get_category() and /products/category/{name}
+CATEGORY_RULES: Dict[str, CategoryRule] = {
+    "flagship": CategoryRule(rank_by="price_inr", at_least={"price_inr": FLAGSHIP_MIN_PRICE}),
+    "budget": CategoryRule(rank_by="price_inr", at_least={"price_inr": 0}, at_most={"price_inr": BUDGET_MAX_PRICE}),
+    "gaming": CategoryRule(rank_by="refresh_rate", at_least={"refresh_rate": 120, "ram_gb": 8}),
+    "camera": CategoryRule(
+        rank_by="price_inr",
+        text_contains={"highlights": ("camera", "photo", "leica", "zeiss", "hasselblad")}
+    ),
+    "battery": CategoryRule(rank_by="battery_mah", at_least={"battery_mah": BATTERY_MIN_MAH}),
+}
+
+
+class CategoryIndex(CatalogVersioned):
+    """
+    Ranked phone IDs of every category, materialized for one catalog version.
+
+    Rebuilt from a single pass over the catalog the first time a category is
+    read after a catalog change; until the next change a category lookup is
+    a slice of its ID list. Kept for the version of the latest rebuild (see
+    CatalogVersioned).
+    """
+
+    def __init__(self, rules: Optional[Dict[str, CategoryRule]] = None):
+        self.rules = rules if rules is not None else CATEGORY_RULES
+        self.version: Optional[int] = None
+        self.rebuilds = 0
+        self._members: Dict[str, Tuple[int, ...]] = {}
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        """Phone columns the rules read, besides ``id``."""
+        return tuple(sorted(set().union(*(rule.columns for rule in self.rules.values()))))
+
+    def get(self, version: int, category: str) -> Optional[Tuple[int, ...]]:
+        """The category's ranked IDs, or None if not built for this version."""
+        if not self.is_current(version):
+            return None
+        return self._members[category]
+
+    def rebuild(self, version: int, phones: Sequence[Any]) -> Dict[str, Tuple[int, ...]]:
+        members = {category: rule.rank(phones) for category, rule in self.rules.items()}
+        self.rebuilds += 1
+        self._adopt(version)
+        self._members = members
+        logger.info("[CATEGORIES] Rebuilt %d categories from %d phones for catalog version %d",
+                    len(members), len(phones), version)
+        return members
+
+    def clear(self):
+        self._members = {}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "rebuilds": self.rebuilds,
+            "members": {category: len(ids) for category, ids in self._members.items()},
+        }
+
+
+_category_index: Optional[CategoryIndex] = None
+
+
+def get_category_index() -> CategoryIndex:
+    """Get category index singleton."""
+    global _category_index
+    if _category_index is None:
+        _category_index = CategoryIndex()
+    return _category_index
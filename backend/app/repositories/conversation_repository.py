@@ -1,23 +1,72 @@
 from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from datetime import datetime
+from sqlalchemy import select, insert, update, delete, bindparam
+from collections import OrderedDict
+from datetime import datetime, timedelta
 import json
 
 from app.models.database import Conversation, Message
+from app.repositories.history_cache import SessionHistoryCache, get_session_history_cache
+
+
+# Hot statements, built once with bound parameters (see phone_repository)
+_GET_CONVERSATION = select(Conversation).where(Conversation.session_id == bindparam("session_id"))
+
+_GET_CONVERSATION_ID = select(Conversation.id).where(Conversation.session_id == bindparam("session_id"))
+
+_GET_RECENT_MESSAGES = (
+    select(Message)
+    .where(Message.conversation_id == bindparam("conversation_id"))
+    .order_by(Message.created_at.desc(), Message.id.desc())
+    .limit(bindparam("limit"))
+)
+
+# UPDATE reserves bind names equal to column names, hence the match_ prefixes
+_TOUCH_CONVERSATION = (
+    update(Conversation)
+    .where(Conversation.id == bindparam("match_id"), Conversation.session_id == bindparam("match_session_id"))
+    .values(last_activity=bindparam("now"))
+    .execution_options(synchronize_session=False)
+)
+
+_INSERT_MESSAGES = insert(Message)
+
+# session_id -> conversation id; conversations are never re-keyed, so a
+# resolved id stays valid until the conversation row is deleted
+_CONVERSATION_ID_CACHE_SIZE = 10000
+_conversation_ids: "OrderedDict[str, int]" = OrderedDict()
+
+
+def _cache_conversation_id(session_id: str, conversation_id: int):
+    _conversation_ids[session_id] = conversation_id
+    _conversation_ids.move_to_end(session_id)
+    if len(_conversation_ids) > _CONVERSATION_ID_CACHE_SIZE:
+        _conversation_ids.popitem(last=False)
+
+
+def forget_conversation_ids(session_ids):
+    """Drop cached ids of conversations that were deleted."""
+    for session_id in session_ids:
+        _conversation_ids.pop(session_id, None)
 
 
 class ConversationRepository:
-    """Repository for conversation data operations."""
+    """
+    Repository for conversation data operations.
+
+    Lookups go through ``read_db`` when given (a read-only session that
+    never waits for the writer), everything that writes through ``db``.
+    """
 
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, history_cache: Optional[SessionHistoryCache] = None,
+                 read_db: Optional[AsyncSession] = None):
         self.db = db
+        self.read_db = read_db if read_db is not None else db
+        self.history_cache = history_cache if history_cache is not None else get_session_history_cache()
 
     async def get_or_create_conversation(self, session_id: str) -> Conversation:
         """Get existing conversation or create new one."""
-        result = await self.db.execute(
-            select(Conversation).where(Conversation.session_id == session_id)
-        )
+        result = await self.db.execute(_GET_CONVERSATION, {"session_id": session_id})
         conversation = result.scalar_one_or_none()
 
         if not conversation:
@@ -26,13 +75,12 @@ class ConversationRepository:
             await self.db.commit()
             await self.db.refresh(conversation)
 
+        _cache_conversation_id(session_id, conversation.id)
         return conversation
 
     async def get_conversation(self, session_id: str) -> Optional[Conversation]:
         """Get conversation by session ID."""
-        result = await self.db.execute(
-            select(Conversation).where(Conversation.session_id == session_id)
-        )
+        result = await self.read_db.execute(_GET_CONVERSATION, {"session_id": session_id})
         return result.scalar_one_or_none()
 
     async def add_message(
@@ -56,8 +104,81 @@ class ConversationRepository:
 
         await self.db.commit()
         await self.db.refresh(message)
+        self.history_cache.append(session_id, [{"role": role, "content": content}])
         return message
 
+    async def add_turn(
+        self,
+        session_id: str,
+        user_content: str,
+        assistant_content: str,
+        user_metadata: Optional[dict] = None,
+        assistant_metadata: Optional[dict] = None
+    ):
+        """
+        Persist a user message and the assistant reply in one transaction.
+
+        With the conversation id cached this is one UPDATE (last_activity),
+        one multi-row INSERT and one COMMIT, instead of two add_message()
+        calls with a lookup, commit and refresh each.
+        """
+        now = datetime.utcnow()
+        conversation_id = _conversation_ids.get(session_id)
+
+        if conversation_id is not None:
+            # session_id is re-checked so a stale id can never touch another conversation
+            result = await self.db.execute(
+                _TOUCH_CONVERSATION, {"match_id": conversation_id, "match_session_id": session_id, "now": now}
+            )
+            if result.rowcount == 0:
+                # Deleted (or rolled back) since it was cached
+                _conversation_ids.pop(session_id, None)
+                conversation_id = None
+
+        if conversation_id is None:
+            conversation_id = await self._resolve_conversation_id(session_id, now)
+
+        await self.db.execute(_INSERT_MESSAGES, [
+            {
+                "conversation_id": conversation_id,
+                "role": "user",
+                "content": user_content,
+                "message_metadata": json.dumps(user_metadata) if user_metadata else None,
+                "created_at": now,
+            },
+            {
+                "conversation_id": conversation_id,
+                "role": "assistant",
+                "content": assistant_content,
+                "message_metadata": json.dumps(assistant_metadata) if assistant_metadata else None,
+                # Keep the reply strictly after the question in created_at order
+                "created_at": now + timedelta(microseconds=1),
+            },
+        ])
+        await self.db.commit()
+        self.history_cache.append(session_id, [
+            {"role": "user", "content": user_content},
+            {"role": "assistant", "content": assistant_content},
+        ])
+
+    async def _resolve_conversation_id(self, session_id: str, now: datetime) -> int:
+        """Look up or create the conversation inside the current transaction."""
+        result = await self.db.execute(_GET_CONVERSATION_ID, {"session_id": session_id})
+        conversation_id = result.scalar_one_or_none()
+
+        if conversation_id is None:
+            conversation = Conversation(session_id=session_id, created_at=now, last_activity=now)
+            self.db.add(conversation)
+            await self.db.flush()
+            conversation_id = conversation.id
+        else:
+            await self.db.execute(
+                _TOUCH_CONVERSATION, {"match_id": conversation_id, "match_session_id": session_id, "now": now}
+            )
+
+        _cache_conversation_id(session_id, conversation_id)
+        return conversation_id
+
     async def get_messages(
         self,
         session_id: str,
@@ -68,11 +189,8 @@ class ConversationRepository:
         if not conversation:
             return []
 
-        result = await self.db.execute(
-            select(Message)
-            .where(Message.conversation_id == conversation.id)
-            .order_by(Message.created_at.desc())
-            .limit(limit)
+        result = await self.read_db.execute(
+            _GET_RECENT_MESSAGES, {"conversation_id": conversation.id, "limit": limit}
         )
         messages = result.scalars().all()
         return list(reversed(messages))
@@ -83,25 +201,31 @@ class ConversationRepository:
         limit: int = 10
     ) -> List[dict]:
         """Get formatted conversation history for context."""
-        messages = await self.get_messages(session_id, limit)
-        return [
+        cached = self.history_cache.get(session_id, limit)
+        if cached is not None:
+            return cached
+
+        messages = await self.get_messages(session_id, max(limit, self.history_cache.max_messages))
+        history = [
             {"role": msg.role, "content": msg.content}
             for msg in messages
         ]
+        # At least the cache's full window was loaded; later reads are served from memory
+        self.history_cache.put(session_id, history)
+        return history[-limit:] if limit else []
 
     async def clear_conversation(self, session_id: str) -> bool:
         """Clear all messages in a conversation."""
-        conversation = await self.get_conversation(session_id)
-        if not conversation:
-            return False
-
+        conversation_id = select(Conversation.id).where(Conversation.session_id == session_id).scalar_subquery()
         result = await self.db.execute(
-            select(Message).where(Message.conversation_id == conversation.id)
+            delete(Message)
+            .where(Message.conversation_id == conversation_id)
+            .execution_options(synchronize_session=False)
         )
-        messages = result.scalars().all()
-
-        for message in messages:
-            await self.db.delete(message)
-
         await self.db.commit()
-        return True
+        self.history_cache.invalidate(session_id)
+
+        if result.rowcount:
+            return True
+        # Nothing deleted: report whether the conversation exists at all
+        return await self.get_conversation(session_id) is not None
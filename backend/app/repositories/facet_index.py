@@ -0,0 +1,207 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.models.database import normalize_brand
+from app.models.records import decode_json_list
+from app.repositories.catalog_version import CatalogVersioned
+
+# Price bands as (value, lower bound inclusive, upper bound exclusive or None)
+PRICE_BANDS: Tuple[Tuple[str, int, Optional[int]], ...] = (
+    ("under-15k", 0, 15000),
+    ("15k-30k", 15000, 30000),
+    ("30k-50k", 30000, 50000),
+    ("50k-80k", 50000, 80000),
+    ("80k-plus", 80000, None),
+)
+
+_POPCOUNT = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+
+
+def _popcounts(bitmaps: np.ndarray) -> np.ndarray:
+    """Set bits per row of packed uint8 bitmaps."""
+    if hasattr(np, "bitwise_count"):  # NumPy 2
+        return np.bitwise_count(bitmaps).sum(axis=-1, dtype=np.int64)
+    return _POPCOUNT[bitmaps].sum(axis=-1, dtype=np.int64)
+
+
+def price_band(price_inr: Optional[int]) -> Optional[str]:
+    if price_inr is None:
+        return None
+    for value, low, high in PRICE_BANDS:
+        if price_inr >= low and (high is None or price_inr < high):
+            return value
+    return None
+
+
+class Facet:
+    """
+    A facet of the catalog: the values each phone has for it.
+
+    ``values(phone)`` yields ``(key, label)`` pairs; selections are matched
+    against keys (case-insensitively), counts are reported with labels. A
+    phone matches a selection of several values if it has any of them, or
+    all of them when ``match_all`` is set (for multi-valued facets).
+    """
+
+    def __init__(self, values: Callable[[Any], Iterable[Tuple[str, str]]], match_all: bool = False):
+        self.values = values
+        self.match_all = match_all
+
+
+def _single(value: Any) -> List[Tuple[str, str]]:
+    return [] if value is None else [(str(value).casefold(), str(value))]
+
+
+FACETS: Dict[str, Facet] = {
+    "brand": Facet(lambda phone: [(normalize_brand(phone.brand), phone.brand)] if phone.brand else []),
+    "price_band": Facet(lambda phone: _single(price_band(phone.price_inr))),
+    "ram_gb": Facet(lambda phone: _single(phone.ram_gb)),
+    "refresh_rate": Facet(lambda phone: _single(phone.refresh_rate)),
+    "features": Facet(
+        lambda phone: [(feature.casefold(), feature) for feature in decode_json_list(phone.features) or []],
+        match_all=True
+    ),
+}
+
+# Phone columns the facets read, besides ``id`` and the ``price_inr`` results are ordered by
+FACET_COLUMNS = ("brand", "price_inr", "ram_gb", "refresh_rate", "features")
+
+
+class _FacetBitmaps:
+    __slots__ = ("keys", "labels", "bitmaps")
+
+    def __init__(self, keys: Dict[str, int], labels: List[str], bitmaps: np.ndarray):
+        self.keys = keys
+        self.labels = labels
+        self.bitmaps = bitmaps  # (values, ceil(phones / 8)) packed bits
+
+
+class FacetResult:
+    """Matching phone IDs in result order, and counts per facet value."""
+
+    __slots__ = ("ids", "total", "facets")
+
+    def __init__(self, ids: List[int], total: int, facets: Dict[str, List[Dict[str, Any]]]):
+        self.ids = ids
+        self.total = total
+        self.facets = facets
+
+
+class FacetIndex(CatalogVersioned):
+    """
+    Packed bitmaps of every facet value over the catalog, for one catalog version.
+
+    Bit i of a value's bitmap is set when the i-th phone (in price order,
+    highest first) has that value. A query ANDs the selected facets'
+    bitmaps into the result set; each facet's counts are the popcounts of
+    its value bitmaps ANDed with every *other* facet's selection, so the
+    counts show what picking another value of that facet would return.
+
+    Rebuilt from one pass over the catalog after it changes, for the version
+    of the latest rebuild, like CategoryIndex (see CatalogVersioned).
+    """
+
+    def __init__(self, facets: Optional[Dict[str, Facet]] = None):
+        self.facets = facets if facets is not None else FACETS
+        self.version: Optional[int] = None
+        self.rebuilds = 0
+        self._size = 0
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._all = np.zeros(0, dtype=np.uint8)
+        self._bitmaps: Dict[str, _FacetBitmaps] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    def rebuild(self, version: int, phones: Sequence[Any]) -> "FacetIndex":
+        """Index ``phones`` for ``version``; returns the index to query."""
+        self._adopt(version)
+        self._build(phones)
+        self.rebuilds += 1
+        return self
+
+    def clear(self):
+        self._size = 0
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._all = np.zeros(0, dtype=np.uint8)
+        self._bitmaps = {}
+
+    def _build(self, phones: Sequence[Any]):
+        ordered = sorted(phones, key=lambda phone: phone.price_inr or 0, reverse=True)
+        size = len(ordered)
+        bitmaps = {}
+        for name, facet in self.facets.items():
+            keys: Dict[str, int] = {}
+            labels: List[str] = []
+            rows: List[int] = []
+            positions: List[int] = []
+            for position, phone in enumerate(ordered):
+                for key, label in facet.values(phone):
+                    row = keys.get(key)
+                    if row is None:
+                        row = keys[key] = len(labels)
+                        labels.append(label)
+                    rows.append(row)
+                    positions.append(position)
+            dense = np.zeros((len(labels), size), dtype=bool)
+            dense[rows, positions] = True
+            bitmaps[name] = _FacetBitmaps(keys, labels, np.packbits(dense, axis=1))
+
+        self._size = size
+        self._ids = np.fromiter((phone.id for phone in ordered), dtype=np.int64, count=size)
+        self._all = np.packbits(np.ones(size, dtype=bool))
+        self._bitmaps = bitmaps
+
+    def search(self, selections: Dict[str, Sequence[str]], limit: int = 20, offset: int = 0) -> FacetResult:
+        """
+        Phones matching every selected facet, and counts for all facets.
+
+        ``selections`` maps facet name to the selected value keys; empty or
+        missing facets do not filter. Unknown facet names raise KeyError.
+        """
+        masks = {}
+        for name, values in selections.items():
+            facet = self._bitmaps[name]
+            if not values:
+                continue
+            rows = [facet.keys[key] for key in (str(value).casefold() for value in values) if key in facet.keys]
+            if len(rows) < len(values) and self.facets[name].match_all:
+                rows = []  # a required value no phone has
+            if not rows:
+                masks[name] = np.zeros_like(self._all)
+            elif self.facets[name].match_all:
+                masks[name] = np.bitwise_and.reduce(facet.bitmaps[rows], axis=0)
+            else:
+                masks[name] = np.bitwise_or.reduce(facet.bitmaps[rows], axis=0)
+
+        selected = self._all
+        for mask in masks.values():
+            selected = selected & mask
+
+        counts = {}
+        for name, facet in self._bitmaps.items():
+            others = self._all
+            for other, mask in masks.items():
+                if other != name:
+                    others = others & mask
+            value_counts = _popcounts(facet.bitmaps & others)
+            counts[name] = sorted(
+                ({"value": facet.labels[row], "count": int(count)} for row, count in enumerate(value_counts) if count),
+                key=lambda item: (-item["count"], item["value"])
+            )
+
+        positions = np.flatnonzero(np.unpackbits(selected, count=self._size))
+        page = self._ids[positions[offset:offset + limit]]
+        return FacetResult(ids=page.tolist(), total=int(positions.size), facets=counts)
+
+
+_facet_index: Optional[FacetIndex] = None
+
+
+def get_facet_index() -> FacetIndex:
+    """Get facet index singleton."""
+    global _facet_index
+    if _facet_index is None:
+        _facet_index = FacetIndex()
+    return _facet_index
@@ -0,0 +1,146 @@
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional
+
+from app.config import get_settings
+
+settings = get_settings()
+
+
+class _SessionEntry:
+    __slots__ = ("messages", "chars", "expires_at")
+
+    def __init__(self, max_messages: int):
+        self.messages: Deque[Dict[str, str]] = deque(maxlen=max_messages)
+        self.chars = 0
+        self.expires_at = 0.0
+
+
+class SessionHistoryCache:
+    """
+    Per-session ring buffer of the most recent conversation messages.
+
+    Filled from the database on a miss and appended to on every write, so an
+    active session reads its history without touching the database. Entries
+    expire ``ttl`` seconds after their last write; the whole cache is capped
+    both in sessions and in stored characters, evicting least recently used
+    sessions first.
+
+    ``max_messages=0`` disables the cache.
+
+    Each worker has its own cache. If a session's turns are served by
+    different workers, a worker may miss the others' turns until its entry
+    expires, so keep ``ttl`` short when running more than one worker.
+    """
+
+    def __init__(
+        self,
+        max_messages: int = 10,
+        ttl: float = 300.0,
+        max_sessions: int = 10000,
+        max_chars: int = 20_000_000
+    ):
+        self.max_messages = max_messages
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_chars = max_chars
+        self.total_chars = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, _SessionEntry]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_messages > 0
+
+    def get(self, session_id: str, limit: Optional[int] = None) -> Optional[List[Dict[str, str]]]:
+        """The last ``limit`` messages, or None if the session is not cached."""
+        limit = self.max_messages if limit is None else limit
+        entry = self._entries.get(session_id)
+        if entry is None or limit > self.max_messages:
+            self.misses += 1
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(session_id)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(session_id)
+        self.hits += 1
+        messages = list(entry.messages)
+        return [dict(m) for m in messages[-limit:]] if limit else []
+
+    def put(self, session_id: str, messages: List[Dict[str, str]]):
+        """Cache a session's history as loaded from the database (oldest first)."""
+        if not self.enabled:
+            return
+        self._remove(session_id)
+        entry = _SessionEntry(self.max_messages)
+        self._entries[session_id] = entry
+        self._extend(entry, messages)
+        self._evict()
+
+    def append(self, session_id: str, messages: List[Dict[str, str]]):
+        """Add newly written messages. Sessions that are not cached stay uncached."""
+        entry = self._entries.get(session_id)
+        if entry is None:
+            return
+        self._entries.move_to_end(session_id)
+        self._extend(entry, messages)
+        self._evict()
+
+    def invalidate(self, session_id: str):
+        self._remove(session_id)
+
+    def clear(self):
+        self._entries.clear()
+        self.total_chars = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "sessions": len(self._entries),
+            "chars": self.total_chars,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _extend(self, entry: _SessionEntry, messages: List[Dict[str, str]]):
+        chars_before = entry.chars
+        for message in messages:
+            if len(entry.messages) == entry.messages.maxlen:
+                entry.chars -= len(entry.messages[0]["content"])
+            entry.messages.append({"role": message["role"], "content": message["content"]})
+            entry.chars += len(message["content"])
+        self.total_chars += entry.chars - chars_before
+        entry.expires_at = time.monotonic() + self.ttl
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_sessions or self.total_chars > self.max_chars):
+            session_id = next(iter(self._entries))
+            self._remove(session_id)
+
+    def _remove(self, session_id: str):
+        entry = self._entries.pop(session_id, None)
+        if entry is not None:
+            self.total_chars -= entry.chars
+
+
+_session_history_cache: Optional[SessionHistoryCache] = None
+
+
+def get_session_history_cache() -> SessionHistoryCache:
+    """Get session history cache singleton."""
+    global _session_history_cache
+    if _session_history_cache is None:
+        _session_history_cache = SessionHistoryCache(
+            max_messages=settings.history_cache_messages,
+            ttl=settings.history_cache_ttl,
+            max_sessions=settings.history_cache_max_sessions,
+            max_chars=settings.history_cache_max_chars
+        )
+    return _session_history_cache
@@ -1,37 +1,198 @@
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, Awaitable, Callable, Hashable, List, Optional, Dict, Any, Tuple
+from functools import lru_cache
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_
+from sqlalchemy import select, and_, or_, bindparam, func, tuple_
 import json
 
-from app.models.database import Phone
+from app.models.database import CATALOG_STATE_ID, CatalogState, Phone, normalize_brand
+from app.models.records import PHONE_RECORD_COLUMNS, PhoneRecord
+from app.repositories.category_index import (
+    BATTERY_MIN_MAH, BUDGET_MAX_PRICE, FLAGSHIP_MIN_PRICE, CategoryIndex, get_category_index
+)
+from app.repositories.facet_index import FACET_COLUMNS, FacetIndex, FacetResult, get_facet_index
+from app.repositories.result_cache import PhoneResultCache, get_phone_result_cache
+
+
+# Hot queries are built once with bound parameters. Executing the same
+# statement object skips construction and reuses SQLAlchemy's compiled form.
+# Reads select plain columns and return PhoneRecord, not ORM Phone objects.
+_GET_ALL = select(*PHONE_RECORD_COLUMNS).offset(bindparam("offset")).limit(bindparam("limit"))
+
+_GET_BY_ID = select(*PHONE_RECORD_COLUMNS).where(Phone.id == bindparam("phone_id"))
+
+_GET_BY_IDS = select(*PHONE_RECORD_COLUMNS).where(Phone.id.in_(bindparam("phone_ids", expanding=True)))
+
+_GET_BY_BRAND_KEY = (
+    select(*PHONE_RECORD_COLUMNS)
+    .where(Phone.brand_key == bindparam("brand_key"))
+    .order_by(Phone.price_inr.desc())
+    .limit(bindparam("limit"))
+)
+
+_BRAND_KEY_EXISTS = select(Phone.id).where(Phone.brand_key == bindparam("brand_key")).limit(1)
+
+_GET_BY_BRAND_LIKE = (
+    select(*PHONE_RECORD_COLUMNS)
+    .where(Phone.brand.ilike(bindparam("brand_pattern")))
+    .order_by(Phone.price_inr.desc())
+    .limit(bindparam("limit"))
+)
+
+_GET_BY_PRICE_RANGE = (
+    select(*PHONE_RECORD_COLUMNS)
+    .where(and_(
+        Phone.price_inr >= bindparam("min_price"),
+        Phone.price_inr <= bindparam("max_price")
+    ))
+    .order_by(Phone.price_inr.desc())
+    .limit(bindparam("limit"))
+)
+
+_GET_FLAGSHIP = (
+    select(*PHONE_RECORD_COLUMNS)
+    .where(Phone.price_inr >= bindparam("min_price"))
+    .order_by(Phone.price_inr.desc())
+    .limit(bindparam("limit"))
+)
+
+_GET_BATTERY = (
+    select(*PHONE_RECORD_COLUMNS)
+    .where(Phone.battery_mah >= bindparam("min_battery"))
+    .order_by(Phone.battery_mah.desc())
+    .limit(bindparam("limit"))
+)
+
+_GET_CATALOG_VERSION = select(CatalogState.version).where(CatalogState.id == CATALOG_STATE_ID)
+
+_COUNT = select(func.count()).select_from(Phone)
+
+# Whole catalog in ID order, fetched from the server-side cursor in batches
+_EXPORT = select(*PHONE_RECORD_COLUMNS).order_by(Phone.id)
+
+_FACET_SOURCE = select(Phone.id, *(Phone.__table__.c[name] for name in FACET_COLUMNS))
+
+
+@lru_cache(maxsize=8)
+def _category_source_statement(columns: Tuple[str, ...]):
+    """The whole catalog, reduced to the columns category rules read."""
+    return select(Phone.id, *(Phone.__table__.c[name] for name in columns))
+
+
+@lru_cache(maxsize=128)
+def _search_statement(brand_match: Optional[str], min_price: bool, max_price: bool, min_ram: bool,
+                      min_battery: bool, search_text: bool, keyset: bool = False):
+    """One prebuilt search() statement per combination of filters in use."""
+    conditions = []
+
+    if keyset:
+        # Rows strictly after the cursor in (price_inr DESC, id DESC) order
+        conditions.append(tuple_(Phone.price_inr, Phone.id) < tuple_(bindparam("after_price"), bindparam("after_id")))
+
+    if brand_match == "key":
+        conditions.append(Phone.brand_key == bindparam("brand_key"))
+    elif brand_match == "like":
+        conditions.append(Phone.brand.ilike(bindparam("brand_pattern")))
+
+    if min_price:
+        conditions.append(Phone.price_inr >= bindparam("min_price"))
+
+    if max_price:
+        conditions.append(Phone.price_inr <= bindparam("max_price"))
+
+    if min_ram:
+        conditions.append(Phone.ram_gb >= bindparam("min_ram"))
+
+    if min_battery:
+        conditions.append(Phone.battery_mah >= bindparam("min_battery"))
+
+    if search_text:
+        text_pattern = bindparam("text_pattern")
+        conditions.append(or_(
+            Phone.brand.ilike(text_pattern),
+            Phone.model.ilike(text_pattern),
+            Phone.processor.ilike(text_pattern),
+            Phone.highlights.ilike(text_pattern)
+        ))
+
+    query = select(*PHONE_RECORD_COLUMNS)
+    if conditions:
+        query = query.where(and_(*conditions))
+    return query.order_by(Phone.price_inr.desc(), Phone.id.desc()).offset(bindparam("offset")).limit(bindparam("limit"))
+
+
+def _records(result) -> List[PhoneRecord]:
+    return [PhoneRecord.from_row(row) for row in result]
 
 
 class PhoneRepository:
-    """Repository for phone data operations."""
+    """
+    Repository for phone data operations. Lookups return PhoneRecord.
+
+    Lookup results are cached in a PhoneResultCache, category members come
+    from a CategoryIndex and facet searches from a FacetIndex, all for the
+    catalog version this repository read first (once per instance, i.e. per
+    request).
+    """
 
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, result_cache: Optional[PhoneResultCache] = None,
+                 category_index: Optional[CategoryIndex] = None, facet_index: Optional[FacetIndex] = None):
         self.db = db
+        self.result_cache = result_cache if result_cache is not None else get_phone_result_cache()
+        self.category_index = category_index if category_index is not None else get_category_index()
+        self.facet_index = facet_index if facet_index is not None else get_facet_index()
+        self._catalog_version: Optional[int] = None
+
+    async def _cached(self, key: Hashable, fetch: Callable[[], Awaitable[List[PhoneRecord]]]) -> List[PhoneRecord]:
+        if not self.result_cache.enabled:
+            return await fetch()
+        version = await self._current_version()
+        phones = self.result_cache.get(version, key)
+        if phones is None:
+            phones = await fetch()
+            self.result_cache.put(version, key, phones)
+        return phones
+
+    async def _current_version(self) -> int:
+        if self._catalog_version is None:
+            await self.get_catalog_version()
+        return self._catalog_version
 
-    async def get_all(self, limit: int = 100, offset: int = 0) -> List[Phone]:
+    async def _fetch(self, statement, params: Dict[str, Any]) -> List[PhoneRecord]:
+        return _records(await self.db.execute(statement, params))
+
+    async def get_all(self, limit: int = 100, offset: int = 0) -> List[PhoneRecord]:
         """Get all phones with pagination."""
-        result = await self.db.execute(
-            select(Phone).offset(offset).limit(limit)
-        )
-        return result.scalars().all()
+        params = {"limit": limit, "offset": offset}
+        return await self._cached(("all", limit, offset), lambda: self._fetch(_GET_ALL, params))
 
-    async def get_by_id(self, phone_id: int) -> Optional[Phone]:
+    async def get_by_id(self, phone_id: int) -> Optional[PhoneRecord]:
         """Get a phone by ID."""
-        result = await self.db.execute(
-            select(Phone).where(Phone.id == phone_id)
-        )
-        return result.scalar_one_or_none()
+        if self.result_cache.enabled:
+            phone = self.result_cache.get_record(await self._current_version(), phone_id)
+            if phone is not None:
+                return phone
 
-    async def get_by_ids(self, phone_ids: List[int]) -> List[Phone]:
-        """Get multiple phones by IDs."""
-        result = await self.db.execute(
-            select(Phone).where(Phone.id.in_(phone_ids))
-        )
-        return result.scalars().all()
+        result = await self.db.execute(_GET_BY_ID, {"phone_id": phone_id})
+        row = result.one_or_none()
+        if row is None:
+            return None
+        phone = PhoneRecord.from_row(row)
+        if self.result_cache.enabled:
+            self.result_cache.put_records(self._catalog_version, [phone])
+        return phone
+
+    async def get_by_ids(self, phone_ids: List[int]) -> List[PhoneRecord]:
+        """Get multiple phones by IDs (in ID order)."""
+        if self.result_cache.enabled:
+            version = await self._current_version()
+            phones = [self.result_cache.get_record(version, phone_id) for phone_id in sorted(set(phone_ids))]
+            if all(phone is not None for phone in phones):
+                return phones
+
+        phones = await self._fetch(_GET_BY_IDS, {"phone_ids": list(phone_ids)})
+        if self.result_cache.enabled:
+            self.result_cache.put_records(self._catalog_version, phones)
+        return phones
 
     async def search(
         self,
@@ -42,145 +203,197 @@ class PhoneRepository:
         min_battery: Optional[int] = None,
         features: Optional[List[str]] = None,
         search_text: Optional[str] = None,
-        limit: int = 10
-    ) -> List[Phone]:
-        """Search phones with filters."""
-        query = select(Phone)
-        conditions = []
-
-        if brand:
-            conditions.append(Phone.brand.ilike(f"%{brand}%"))
-
-        if min_price:
-            conditions.append(Phone.price_inr >= min_price)
-
-        if max_price:
-            conditions.append(Phone.price_inr <= max_price)
+        limit: int = 10,
+        offset: int = 0,
+        after: Optional[Tuple[int, int]] = None
+    ) -> List[PhoneRecord]:
+        """
+        Search phones with filters, most expensive first (ties by ID, highest first).
 
-        if min_ram:
-            conditions.append(Phone.ram_gb >= min_ram)
+        ``after`` is a ``(price_inr, id)`` keyset cursor: only phones after
+        that position are returned, however deep it is.
+        """
+        key = (
+            "search", normalize_brand(brand) if brand else None, min_price or None, max_price or None,
+            min_ram or None, min_battery or None, tuple(sorted(f.lower() for f in features)) if features else None,
+            search_text.lower() if search_text else None, limit, offset, after,
+        )
+        return await self._cached(
+            key,
+            lambda: self._search_all(
+                brand, min_price, max_price, min_ram, min_battery, features, search_text, limit, offset, after
+            )
+        )
 
-        if min_battery:
-            conditions.append(Phone.battery_mah >= min_battery)
+    async def _search_all(
+        self,
+        brand: Optional[str],
+        min_price: Optional[int],
+        max_price: Optional[int],
+        min_ram: Optional[int],
+        min_battery: Optional[int],
+        features: Optional[List[str]],
+        search_text: Optional[str],
+        limit: int,
+        offset: int,
+        after: Optional[Tuple[int, int]]
+    ) -> List[PhoneRecord]:
+        params = {
+            "min_price": min_price, "max_price": max_price, "min_ram": min_ram, "min_battery": min_battery,
+            "text_pattern": f"%{search_text}%" if search_text else None,
+            "after_price": after[0] if after else None, "after_id": after[1] if after else None,
+            "limit": limit, "offset": offset,
+        }
+        if brand:
+            brand_key = normalize_brand(brand)
+            phones = await self._search("key", dict(params, brand_key=brand_key))
+            first_page = after is None and not offset
+            # An empty later page of a known brand is just the end of its results
+            if not phones and (first_page or not await self._brand_key_exists(brand_key)):
+                # Partial or misspelled brand: fall back to a (non-indexed) substring match
+                phones = await self._search("like", dict(params, brand_pattern=f"%{brand.strip()}%"))
+        else:
+            phones = await self._search(None, params)
 
-        if search_text:
-            search_conditions = [
-                Phone.brand.ilike(f"%{search_text}%"),
-                Phone.model.ilike(f"%{search_text}%"),
-                Phone.processor.ilike(f"%{search_text}%"),
-                Phone.highlights.ilike(f"%{search_text}%")
+        if features:
+            # Records carry features already decoded
+            return [
+                phone for phone in phones
+                if phone.features and any(
+                    any(f.lower() in pf.lower() for pf in phone.features)
+                    for f in features
+                )
             ]
-            conditions.append(or_(*search_conditions))
 
-        if conditions:
-            query = query.where(and_(*conditions))
+        return phones
 
-        query = query.order_by(Phone.price_inr.desc()).limit(limit)
-        result = await self.db.execute(query)
-        phones = result.scalars().all()
+    async def _search(self, brand_match: Optional[str], params: Dict[str, Any]) -> List[PhoneRecord]:
+        statement = _search_statement(
+            brand_match, bool(params["min_price"]), bool(params["max_price"]), bool(params["min_ram"]),
+            bool(params["min_battery"]), bool(params["text_pattern"]), params["after_id"] is not None
+        )
+        # Parameters of filters that are not in use are simply not bound
+        bound = {name: value for name, value in params.items() if value}
+        bound.update(limit=params["limit"], offset=params["offset"])
+        if params["after_id"] is not None:
+            bound.update(after_price=params["after_price"], after_id=params["after_id"])
+        result = await self.db.execute(statement, bound)
+        return _records(result)
 
-        if features:
-            filtered_phones = []
-            for phone in phones:
-                if phone.features:
-                    try:
-                        phone_features = json.loads(phone.features) if isinstance(phone.features, str) else phone.features
-                        if any(
-                            any(f.lower() in pf.lower() for pf in phone_features)
-                            for f in features
-                        ):
-                            filtered_phones.append(phone)
-                    except json.JSONDecodeError:
-                        continue
-            return filtered_phones
+    async def _brand_key_exists(self, brand_key: str) -> bool:
+        result = await self.db.execute(_BRAND_KEY_EXISTS, {"brand_key": brand_key})
+        return result.first() is not None
 
-        return phones
-
-    async def get_by_brand(self, brand: str, limit: int = 10) -> List[Phone]:
+    async def get_by_brand(self, brand: str, limit: int = 10) -> List[PhoneRecord]:
         """Get phones by brand."""
-        result = await self.db.execute(
-            select(Phone)
-            .where(Phone.brand.ilike(f"%{brand}%"))
-            .order_by(Phone.price_inr.desc())
-            .limit(limit)
-        )
-        return result.scalars().all()
+        brand_key = normalize_brand(brand)
+        return await self._cached(("brand", brand_key, limit), lambda: self._get_by_brand(brand_key, limit))
+
+    async def _get_by_brand(self, brand_key: str, limit: int) -> List[PhoneRecord]:
+        phones = await self._fetch(_GET_BY_BRAND_KEY, {"brand_key": brand_key, "limit": limit})
+        if phones:
+            return phones
+
+        # Partial or misspelled brand: fall back to a (non-indexed) substring match
+        return await self._fetch(_GET_BY_BRAND_LIKE, {"brand_pattern": f"%{brand_key}%", "limit": limit})
 
     async def get_by_price_range(
         self,
         min_price: int,
         max_price: int,
         limit: int = 10
-    ) -> List[Phone]:
+    ) -> List[PhoneRecord]:
         """Get phones within a price range."""
-        result = await self.db.execute(
-            select(Phone)
-            .where(and_(
-                Phone.price_inr >= min_price,
-                Phone.price_inr <= max_price
-            ))
-            .order_by(Phone.price_inr.desc())
-            .limit(limit)
+        params = {"min_price": min_price, "max_price": max_price, "limit": limit}
+        return await self._cached(
+            ("price_range", min_price, max_price, limit), lambda: self._fetch(_GET_BY_PRICE_RANGE, params)
         )
-        return result.scalars().all()
 
-    async def get_budget_phones(self, max_price: int = 20000, limit: int = 10) -> List[Phone]:
+    async def get_category(self, category: str, limit: int = 10) -> List[PhoneRecord]:
+        """Get the best ranked phones of a category (see category_index.CATEGORY_RULES)."""
+        if category not in self.category_index.rules:
+            raise ValueError(f"Unknown category: {category}")
+        version = await self._current_version()
+        ids = self.category_index.get(version, category)
+        if ids is None:
+            ids = (await self.refresh_categories())[category]
+
+        ids = ids[:limit]
+        phones = {phone.id: phone for phone in await self.get_by_ids(ids)} if ids else {}
+        return [phones[phone_id] for phone_id in ids if phone_id in phones]
+
+    async def refresh_categories(self) -> Dict[str, Tuple[int, ...]]:
+        """Recompute category members from one pass over the catalog."""
+        version = await self._current_version()
+        result = await self.db.execute(_category_source_statement(self.category_index.columns))
+        return self.category_index.rebuild(version, result.all())
+
+    async def facet_search(
+        self,
+        selections: Dict[str, List[str]],
+        limit: int = 20,
+        offset: int = 0
+    ) -> Tuple[List[PhoneRecord], FacetResult]:
+        """Phones matching the selected facet values (by price, highest first) and all facet counts."""
+        version = await self._current_version()
+        index = self.facet_index
+        if not index.is_current(version):
+            result = await self.db.execute(_FACET_SOURCE)
+            index = index.rebuild(version, result.all())
+
+        found = index.search(selections, limit=limit, offset=offset)
+        phones = {phone.id: phone for phone in await self.get_by_ids(found.ids)} if found.ids else {}
+        return [phones[phone_id] for phone_id in found.ids if phone_id in phones], found
+
+    async def get_budget_phones(self, max_price: int = BUDGET_MAX_PRICE, limit: int = 10) -> List[PhoneRecord]:
         """Get budget phones."""
+        if max_price == BUDGET_MAX_PRICE:
+            return await self.get_category("budget", limit)
         return await self.get_by_price_range(0, max_price, limit)
 
-    async def get_flagship_phones(self, min_price: int = 60000, limit: int = 10) -> List[Phone]:
+    async def get_flagship_phones(self, min_price: int = FLAGSHIP_MIN_PRICE, limit: int = 10) -> List[PhoneRecord]:
         """Get flagship phones."""
-        result = await self.db.execute(
-            select(Phone)
-            .where(Phone.price_inr >= min_price)
-            .order_by(Phone.price_inr.desc())
-            .limit(limit)
-        )
-        return result.scalars().all()
+        if min_price == FLAGSHIP_MIN_PRICE:
+            return await self.get_category("flagship", limit)
+        params = {"min_price": min_price, "limit": limit}
+        return await self._cached(("flagship", min_price, limit), lambda: self._fetch(_GET_FLAGSHIP, params))
 
-    async def get_gaming_phones(self, limit: int = 10) -> List[Phone]:
+    async def get_gaming_phones(self, limit: int = 10) -> List[PhoneRecord]:
         """Get phones suitable for gaming."""
-        result = await self.db.execute(
-            select(Phone)
-            .where(and_(
-                Phone.refresh_rate >= 120,
-                Phone.ram_gb >= 8
-            ))
-            .order_by(Phone.refresh_rate.desc())
-            .limit(limit)
-        )
-        return result.scalars().all()
+        return await self.get_category("gaming", limit)
 
-    async def get_camera_phones(self, limit: int = 10) -> List[Phone]:
+    async def get_camera_phones(self, limit: int = 10) -> List[PhoneRecord]:
         """Get phones with best cameras."""
-        result = await self.db.execute(
-            select(Phone)
-            .where(or_(
-                Phone.highlights.ilike("%camera%"),
-                Phone.highlights.ilike("%photo%"),
-                Phone.highlights.ilike("%leica%"),
-                Phone.highlights.ilike("%zeiss%"),
-                Phone.highlights.ilike("%hasselblad%")
-            ))
-            .order_by(Phone.price_inr.desc())
-            .limit(limit)
-        )
-        return result.scalars().all()
+        return await self.get_category("camera", limit)
 
-    async def get_battery_phones(self, min_battery: int = 5000, limit: int = 10) -> List[Phone]:
+    async def get_battery_phones(self, min_battery: int = BATTERY_MIN_MAH, limit: int = 10) -> List[PhoneRecord]:
         """Get phones with best battery life."""
-        result = await self.db.execute(
-            select(Phone)
-            .where(Phone.battery_mah >= min_battery)
-            .order_by(Phone.battery_mah.desc())
-            .limit(limit)
-        )
-        return result.scalars().all()
+        if min_battery == BATTERY_MIN_MAH:
+            return await self.get_category("battery", limit)
+        params = {"min_battery": min_battery, "limit": limit}
+        return await self._cached(("battery", min_battery, limit), lambda: self._fetch(_GET_BATTERY, params))
+
+    async def get_catalog_version(self) -> int:
+        """Version of the phones table; changes on every insert, update or delete."""
+        result = await self.db.execute(_GET_CATALOG_VERSION)
+        self._catalog_version = result.scalar_one_or_none() or 0
+        return self._catalog_version
+
+    async def stream_all(self, batch_size: int = 500) -> AsyncIterator[List[PhoneRecord]]:
+        """
+        The whole catalog in ID order, in batches, from a server-side cursor.
+
+        Memory stays bounded by ``batch_size`` however large the catalog is.
+        Bypasses the result cache.
+        """
+        result = await self.db.stream(_EXPORT.execution_options(yield_per=batch_size))
+        async for rows in result.partitions():
+            yield [PhoneRecord.from_row(row) for row in rows]
 
     async def count(self) -> int:
         """Get total count of phones."""
-        result = await self.db.execute(select(Phone))
-        return len(result.scalars().all())
+        result = await self.db.execute(_COUNT)
+        return result.scalar_one()
 
     async def create(self, phone_data: Dict[str, Any]) -> Phone:
         """Create a new phone entry."""
@@ -194,6 +407,7 @@ class PhoneRepository:
         self.db.add(phone)
         await self.db.commit()
         await self.db.refresh(phone)
+        self._catalog_version = None
         return phone
 
     async def bulk_create(self, phones_data: List[Dict[str, Any]]) -> List[Phone]:
@@ -208,4 +422,5 @@ class PhoneRepository:
 
         self.db.add_all(phones)
         await self.db.commit()
+        self._catalog_version = None
         return phones
@@ -0,0 +1,108 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence
+
+from app.config import get_settings
+from app.models.records import PhoneRecord
+from app.repositories.catalog_version import CatalogVersioned
+
+settings = get_settings()
+
+
+class PhoneResultCache(CatalogVersioned):
+    """
+    Results of PhoneRepository filter queries, stored as lists of phone IDs.
+
+    Keyed by query name and normalized arguments, least recently used
+    results evicted first. IDs resolve through one id -> PhoneRecord map, so
+    a phone that appears in many cached results is held once, and lookups by
+    ID are served from it too.
+
+    Everything belongs to one catalog version (see CatalogVersioned).
+    Callers pass the version they read, so a request that started before a
+    catalog change can neither read nor be served results of another one.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_records: int = 100_000):
+        self.max_entries = max_entries
+        self.max_records = max_records
+        self.version: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self._results: OrderedDict[Hashable, tuple[int, ...]] = OrderedDict()
+        self._records: Dict[int, PhoneRecord] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, version: int, key: Hashable) -> Optional[List[PhoneRecord]]:
+        """A new list of the cached result's records, or None."""
+        ids = self._results.get(key) if self.is_current(version) else None
+        if ids is None:
+            self.misses += 1
+            return None
+        self._results.move_to_end(key)
+        self.hits += 1
+        return [self._records[phone_id] for phone_id in ids]
+
+    def put(self, version: int, key: Hashable, phones: Sequence[PhoneRecord]):
+        if not self.enabled:
+            return
+        self._adopt(version)
+        for phone in phones:
+            self._records[phone.id] = phone
+        self._results[key] = tuple(phone.id for phone in phones)
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+        if len(self._records) > self.max_records:
+            # Cached results reference these records; start over rather than track which
+            self.clear()
+
+    def get_record(self, version: int, phone_id: int) -> Optional[PhoneRecord]:
+        phone = self._records.get(phone_id) if self.is_current(version) else None
+        if phone is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return phone
+
+    def put_records(self, version: int, phones: Sequence[PhoneRecord]):
+        if not self.enabled:
+            return
+        self._adopt(version)
+        if len(self._records) + len(phones) <= self.max_records:
+            for phone in phones:
+                self._records[phone.id] = phone
+
+    def clear(self):
+        self._results.clear()
+        self._records.clear()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "version": self.version,
+            "results": len(self._results),
+            "records": len(self._records),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_phone_result_cache: Optional[PhoneResultCache] = None
+
+
+def get_phone_result_cache() -> PhoneResultCache:
+    """Get phone result cache singleton."""
+    global _phone_result_cache
+    if _phone_result_cache is None:
+        _phone_result_cache = PhoneResultCache(
+            max_entries=settings.phone_result_cache_size,
+            max_records=settings.phone_result_cache_max_records
+        )
+    return _phone_result_cache
@@ -0,0 +1,219 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.config import get_settings
+from app.models.database import AsyncSessionLocal, QueryAnalytics, QueryRollup
+from app.utils.helpers import percentile
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+RollupKey = Tuple[datetime, str]
+
+
+class _MinuteStats:
+    """Running aggregate for one (minute, intent) bucket of this worker."""
+
+    __slots__ = ("count", "adversarial", "products", "latencies")
+
+    def __init__(self):
+        self.count = 0
+        self.adversarial = 0
+        self.products = 0
+        self.latencies: List[int] = []
+
+    def add(self, row: Dict[str, Any]):
+        self.count += 1
+        self.adversarial += 1 if row.get("was_adversarial") else 0
+        self.products += row.get("products_returned") or 0
+        if row.get("response_time_ms") is not None:
+            self.latencies.append(row["response_time_ms"])
+
+    def copy(self) -> "_MinuteStats":
+        stats = _MinuteStats()
+        stats.count = self.count
+        stats.adversarial = self.adversarial
+        stats.products = self.products
+        stats.latencies = list(self.latencies)
+        return stats
+
+    def to_row(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        return {
+            "count": self.count,
+            "adversarial_count": self.adversarial,
+            "products_returned_sum": self.products,
+            "latency_sum_ms": sum(latencies),
+            "latency_max_ms": latencies[-1] if latencies else None,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+        }
+
+
+class AnalyticsBuffer:
+    """
+    Write-behind buffer for QueryAnalytics.
+
+    ``record()`` only appends to an in-memory list, so a chat turn never
+    waits on an SQLite write lock. Rows are written in one batched INSERT
+    when ``max_batch`` rows are pending or every ``flush_interval`` seconds,
+    whichever comes first, and drained by ``stop()`` on shutdown.
+
+    Each flush also upserts per-minute, per-intent rollups (counts and
+    latency percentiles) into ``query_rollups``. Samples of the last few
+    minutes are kept in memory so a minute spanning several flushes is
+    rolled up over all of its rows; they only take in a batch once it is
+    committed. Rows arriving after their minute has left the retention
+    window are still written but no longer change its rollup.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable = AsyncSessionLocal,
+        max_batch: int = 200,
+        flush_interval: float = 2.0,
+        max_pending: int = 10000,
+        rollup_retention_minutes: int = 3
+    ):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.rollup_retention = timedelta(minutes=rollup_retention_minutes)
+        self.source = f"{os.uname().nodename}:{os.getpid()}"[:50]
+        self.dropped = 0
+        self._pending: List[Dict[str, Any]] = []
+        self._minutes: Dict[RollupKey, _MinuteStats] = {}
+        self._timer: Optional[asyncio.Task] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def record(self, **row: Any):
+        """Queue one QueryAnalytics row; never touches the database."""
+        row.setdefault("created_at", datetime.utcnow())
+        self._pending.append(row)
+
+        if len(self._pending) > self.max_pending:
+            # The database is not keeping up: shed the oldest rows, not requests
+            overflow = len(self._pending) - self.max_pending
+            del self._pending[:overflow]
+            self.dropped += overflow
+
+        self._ensure_timer()
+        if len(self._pending) >= self.max_batch and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.get_running_loop().create_task(self.flush())
+
+    def _ensure_timer(self):
+        loop = asyncio.get_running_loop()
+        if self._timer is not None and self._timer.get_loop() is not loop:
+            # Moved to a new event loop (e.g. test clients): the old timer and lock are dead
+            self._timer = None
+            self._flush_task = None
+            self._lock = asyncio.Lock()
+        if self._timer is None or self._timer.done():
+            self._timer = loop.create_task(self._run_timer())
+
+    def start(self):
+        """Start the flush timer (also started lazily by the first record())."""
+        self._ensure_timer()
+
+    async def stop(self):
+        """Stop the timer and write everything still pending."""
+        if self._timer is not None:
+            self._timer.cancel()
+            try:
+                await self._timer
+            except asyncio.CancelledError:
+                pass
+            self._timer = None
+        if self._flush_task is not None:
+            await self._flush_task
+        await self.flush()
+
+    async def _run_timer(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Write pending rows and refresh the rollups they touch. Returns rows written."""
+        async with self._lock:
+            batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+
+            # Rolled up on copies: the in-memory stats only change once the batch is committed
+            cutoff = self._rollup_cutoff()
+            touched: Dict[RollupKey, _MinuteStats] = {}
+            late = 0
+            for row in batch:
+                key = (row["created_at"].replace(second=0, microsecond=0), row.get("intent") or "unknown")
+                if key[0] < cutoff:
+                    # Its samples are evicted; a rollup of just the late rows would overwrite the full one
+                    late += 1
+                    continue
+                stats = touched.get(key)
+                if stats is None:
+                    existing = self._minutes.get(key)
+                    stats = touched[key] = existing.copy() if existing is not None else _MinuteStats()
+                stats.add(row)
+
+            try:
+                async with self.session_factory() as session:
+                    await session.execute(insert(QueryAnalytics), batch)
+                    for key, stats in touched.items():
+                        await session.execute(self._rollup_upsert(key, stats))
+                    await session.commit()
+            except Exception as e:
+                logger.warning("[ANALYTICS] Failed to write %d rows: %s", len(batch), e)
+                self.dropped += len(batch)
+                return 0
+            finally:
+                self._evict_old_minutes()
+
+            self._minutes.update(touched)
+            logger.debug("[ANALYTICS] Flushed %d rows, %d rollups, %d rows too late to roll up",
+                         len(batch), len(touched), late)
+            return len(batch)
+
+    def _rollup_upsert(self, key: RollupKey, stats: _MinuteStats):
+        minute, intent = key
+        values = stats.to_row()
+        statement = sqlite_insert(QueryRollup).values(minute=minute, intent=intent, source=self.source, **values)
+        return statement.on_conflict_do_update(
+            index_elements=["minute", "intent", "source"],
+            set_=values
+        )
+
+    def _rollup_cutoff(self) -> datetime:
+        return datetime.utcnow() - self.rollup_retention
+
+    def _evict_old_minutes(self):
+        cutoff = self._rollup_cutoff()
+        for key in [key for key in self._minutes if key[0] < cutoff]:
+            del self._minutes[key]
+
+
+_analytics_buffer: Optional[AnalyticsBuffer] = None
+
+
+def get_analytics_buffer() -> AnalyticsBuffer:
+    """Get analytics buffer singleton."""
+    global _analytics_buffer
+    if _analytics_buffer is None:
+        _analytics_buffer = AnalyticsBuffer(
+            max_batch=settings.analytics_batch_size,
+            flush_interval=settings.analytics_flush_interval
+        )
+    return _analytics_buffer
@@ -2,10 +2,12 @@ import numpy as np
 from typing import List, Optional
 from sentence_transformers import SentenceTransformer
 import pickle
+import logging
 
 from app.config import get_settings
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 
 class EmbeddingService:
@@ -25,7 +27,7 @@ class EmbeddingService:
             self.model = SentenceTransformer(self.model_name)
             self._initialized = True
         except Exception as e:
-            print(f"Failed to load embedding model: {e}")
+            logger.warning("[EMBEDDING] Failed to load embedding model: %s", e)
             self.model = None
 
     def encode(self, text: str) -> Optional[np.ndarray]:
@@ -38,7 +40,7 @@ class EmbeddingService:
             embedding = self.model.encode(text, convert_to_numpy=True)
             return embedding
         except Exception as e:
-            print(f"Encoding error: {e}")
+            logger.warning("[EMBEDDING] Encoding error: %s", e)
             return None
 
     def encode_batch(self, texts: List[str]) -> Optional[np.ndarray]:
@@ -51,7 +53,7 @@ class EmbeddingService:
             embeddings = self.model.encode(texts, convert_to_numpy=True)
             return embeddings
         except Exception as e:
-            print(f"Batch encoding error: {e}")
+            logger.warning("[EMBEDDING] Batch encoding error: %s", e)
             return None
 
     def compute_similarity(
@@ -1,15 +1,35 @@
 import json
 import re
+import asyncio
 import logging
+import functools
 from typing import Optional, Dict, Any
 from huggingface_hub import InferenceClient
 
 from app.config import get_settings
+from app.observability import tracing
+from app.observability.metrics import LLM_CALL_DURATION, LLM_CALL_ERRORS
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
 
+def _instrumented(method):
+    """Record latency and errors of a service coroutine under its method name."""
+    name = method.__name__
+
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        with LLM_CALL_DURATION.time(name):
+            try:
+                return await method(*args, **kwargs)
+            except Exception:
+                LLM_CALL_ERRORS.inc(name)
+                raise
+
+    return wrapper
+
+
 class HuggingFaceService:
 
     def __init__(self):
@@ -22,13 +42,11 @@ class HuggingFaceService:
         if self._initialized:
             return
 
-        logger.info("=" * 50)
-        logger.info(f"[HUGGINGFACE] Initializing with model: {self.model_name}")
+        logger.info("[HUGGINGFACE] Initializing with model: %s", self.model_name)
 
         if self.use_inference_api:
             hf_token = settings.hf_token
             if hf_token:
-                logger.info(f"[HUGGINGFACE] Token: {hf_token[:10]}...{hf_token[-5:]}")
                 self.client = InferenceClient(model=self.model_name, token=hf_token)
             else:
                 logger.warning("[HUGGINGFACE] No token - using free API")
@@ -38,12 +56,10 @@ class HuggingFaceService:
             logger.warning("[HUGGINGFACE] Inference API disabled!")
 
         self._initialized = True
-        logger.info("=" * 50)
 
+    @_instrumented
     async def generate(self, prompt: str, max_tokens: int = 1024, temperature: float = 0.7) -> str:
-        logger.info("*" * 50)
-        logger.info("[HUGGINGFACE] generate() called")
-        logger.info(f"[HUGGINGFACE] Prompt: {prompt[:200]}...")
+        logger.debug("[HUGGINGFACE] generate() prompt: %.200s", prompt)
 
         self.initialize()
 
@@ -54,24 +70,25 @@ class HuggingFaceService:
         messages = [{"role": "user", "content": prompt}]
 
         try:
-            logger.info(f"[HUGGINGFACE] >>> MAKING API CALL to {self.model_name} <<<")
-            response = self.client.chat_completion(
-                messages=messages,
-                max_tokens=max_tokens,
-                temperature=temperature
-            )
+            # The client is synchronous: run it off the event loop
+            with tracing.span("hf.generate"):
+                response = await asyncio.to_thread(
+                    self.client.chat_completion,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=temperature
+                )
+            self._record_usage(response)
             content = response.choices[0].message.content
-            logger.info("[HUGGINGFACE] >>> API RESPONSE RECEIVED <<<")
-            logger.info(f"[HUGGINGFACE] Response: {str(content)[:300]}...")
-            logger.info("*" * 50)
+            logger.debug("[HUGGINGFACE] Response: %.300s", content)
             return content.strip()
         except Exception as e:
-            logger.error(f"[HUGGINGFACE] API ERROR: {type(e).__name__}: {str(e)}", exc_info=True)
+            logger.error("[HUGGINGFACE] API ERROR: %s: %s", type(e).__name__, e, exc_info=True)
             raise
 
+    @_instrumented
     async def generate_chat(self, messages: list, max_tokens: int = 1024, temperature: float = 0.7) -> str:
-        logger.info("*" * 50)
-        logger.info(f"[HUGGINGFACE] generate_chat() - {len(messages)} messages")
+        logger.debug("[HUGGINGFACE] generate_chat() - %d messages", len(messages))
 
         self.initialize()
 
@@ -80,23 +97,24 @@ class HuggingFaceService:
             raise RuntimeError("HuggingFace client not initialized")
 
         try:
-            logger.info(f"[HUGGINGFACE] >>> MAKING CHAT API CALL to {self.model_name} <<<")
-            response = self.client.chat_completion(
-                messages=messages,
-                max_tokens=max_tokens,
-                temperature=temperature
-            )
+            with tracing.span("hf.generate_chat"):
+                response = await asyncio.to_thread(
+                    self.client.chat_completion,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=temperature
+                )
+            self._record_usage(response)
             content = response.choices[0].message.content
-            logger.info("[HUGGINGFACE] >>> CHAT RESPONSE RECEIVED <<<")
-            logger.info(f"[HUGGINGFACE] Response: {str(content)[:300]}...")
-            logger.info("*" * 50)
+            logger.debug("[HUGGINGFACE] Response: %.300s", content)
             return content
         except Exception as e:
-            logger.error(f"[HUGGINGFACE] CHAT ERROR: {type(e).__name__}: {str(e)}", exc_info=True)
+            logger.error("[HUGGINGFACE] CHAT ERROR: %s: %s", type(e).__name__, e, exc_info=True)
             raise
 
+    @_instrumented
     async def extract_search_parameters(self, query: str, intent: str) -> Dict[str, Any]:
-        logger.info(f"[HUGGINGFACE] extract_search_parameters() - Query: {query}, Intent: {intent}")
+        logger.debug("[HUGGINGFACE] extract_search_parameters() - Query: %s, Intent: %s", query, intent)
 
         prompt = f"""Extract search parameters from this mobile phone query.
 
@@ -109,7 +127,7 @@ Return ONLY valid JSON."""
 
         try:
             response = await self.generate(prompt, max_tokens=300, temperature=0.3)
-            logger.info(f"[HUGGINGFACE] Raw response: {response}")
+            logger.debug("[HUGGINGFACE] Raw response: %s", response)
             params = self._parse_json_response(response)
             result = {
                 "features": params.get("features", []),
@@ -119,12 +137,21 @@ Return ONLY valid JSON."""
                 "min_ram": params.get("min_ram"),
                 "search_text": params.get("search_text")
             }
-            logger.info(f"[HUGGINGFACE] Extracted params: {result}")
+            logger.debug("[HUGGINGFACE] Extracted params: %s", result)
             return result
         except Exception as e:
-            logger.error(f"[HUGGINGFACE] Parameter extraction FAILED: {e}", exc_info=True)
+            logger.error("[HUGGINGFACE] Parameter extraction FAILED: %s", e, exc_info=True)
             raise
 
+    @staticmethod
+    def _record_usage(response):
+        """Add the call and its token usage (when the API reports it) to the current trace."""
+        tracing.count("llm_calls")
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            tracing.count("prompt_tokens", getattr(usage, "prompt_tokens", 0) or 0)
+            tracing.count("completion_tokens", getattr(usage, "completion_tokens", 0) or 0)
+
     def _parse_json_response(self, response: str) -> Dict[str, Any]:
         try:
             return json.loads(response)
@@ -0,0 +1,78 @@
+from typing import Any, Dict, Optional, Tuple
+
+from app.models.schemas import PhoneResponse
+from app.repositories.catalog_version import CatalogVersioned
+
+# Per-field JSON fragments of one phone: bare values and "name":value members
+FieldFragments = Tuple[Tuple[bytes, ...], Tuple[bytes, ...]]
+
+
+class PhoneResponseCache(CatalogVersioned):
+    """
+    Validated PhoneResponse objects and their serialized JSON, per phone.
+
+    Entries belong to one catalog version, so a phone is converted and
+    serialized once per catalog change instead of on every request. List
+    responses are then assembled by joining the cached JSON fragments.
+    Sparse and compact lists use per-field fragments, kept alongside and
+    tied to the exact cached response object they were split from.
+
+    Callers pass the catalog version they read (see CatalogVersioned), so a
+    request on another snapshot is never served responses built from this
+    one, and what it stores is never served to requests on this one.
+
+    The cached PhoneResponse objects are shared between requests and must
+    not be modified.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self.version: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[int, Tuple[PhoneResponse, bytes]] = {}
+        self._fields: Dict[int, Tuple[PhoneResponse, FieldFragments]] = {}
+
+    def get(self, version: Optional[int], phone_id: int) -> Optional[Tuple[PhoneResponse, bytes]]:
+        entry = self._entries.get(phone_id) if self.is_current(version) else None
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def put(self, version: Optional[int], phone_id: int, response: PhoneResponse, body: bytes):
+        self._adopt(version)
+        if phone_id not in self._entries and len(self._entries) >= self.max_entries:
+            # Oldest first; the catalog normally fits and this never runs
+            self._entries.pop(next(iter(self._entries)))
+        self._entries[phone_id] = (response, body)
+
+    def get_fields(self, version: Optional[int], response: PhoneResponse) -> Optional[FieldFragments]:
+        """Field fragments split from this very response object, if any."""
+        entry = self._fields.get(response.id) if self.is_current(version) else None
+        return entry[1] if entry is not None and entry[0] is response else None
+
+    def put_fields(self, version: Optional[int], response: PhoneResponse, fragments: FieldFragments):
+        self._adopt(version)
+        if response.id not in self._fields and len(self._fields) >= self.max_entries:
+            self._fields.pop(next(iter(self._fields)))
+        self._fields[response.id] = (response, fragments)
+
+    def clear(self):
+        self._entries.clear()
+        self._fields.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "version": self.version,
+            "phones": len(self._entries),
+            "field_sets": len(self._fields),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -1,15 +1,82 @@
-from typing import List, Dict, Any, Optional
+from contextvars import ContextVar
+from operator import itemgetter
+from typing import Iterable, List, Dict, Any, Optional, Tuple
 import json
 
-from app.models.database import Phone
-from app.models.schemas import PhoneResponse, ComparisonSpec
+from app.models.records import PhoneLike
+from app.models.schemas import ChatResponse, PhoneResponse, ComparisonSpec
+from app.services.phone_response_cache import FieldFragments, PhoneResponseCache
+
+PHONE_FIELDS: Tuple[str, ...] = tuple(PhoneResponse.model_fields)
+_FIELD_POSITIONS = {name: position for position, name in enumerate(PHONE_FIELDS)}
+
+# The catalog version the current request read; the service itself is shared
+_request_catalog_version: ContextVar[Optional[int]] = ContextVar("request_catalog_version", default=None)
+
+
+def _json_bytes(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class FieldSelection:
+    """
+    The PhoneResponse fields a product list carries, and whether each phone
+    is a JSON object or a compact array of values in ``fields`` order (named
+    once, in a ``"fields"`` header next to ``"products"``).
+
+    ``id`` is always included, first unless listed elsewhere; ``None``
+    fields means all of them.
+    """
+
+    __slots__ = ("fields", "positions", "pick", "compact", "header")
+
+    def __init__(self, fields: Optional[Iterable[str]] = None, compact: bool = False):
+        names = PHONE_FIELDS if fields is None else tuple(dict.fromkeys(fields))
+        unknown = [name for name in names if name not in _FIELD_POSITIONS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(PHONE_FIELDS)}")
+        if "id" not in names:
+            names = ("id",) + names
+        self.fields = names
+        self.positions = tuple(_FIELD_POSITIONS[name] for name in names)
+        # Selected fragments of one phone, as a tuple even for a single field
+        if len(names) > 1:
+            self.pick = itemgetter(*self.positions)
+        else:
+            self.pick = lambda fragments, position=self.positions[0]: (fragments[position],)
+        self.compact = compact
+        self.header = b',"fields":' + _json_bytes(list(names)) if compact else b""
+
+    @classmethod
+    def parse(cls, fields: Optional[str], compact: bool = False) -> Optional["FieldSelection"]:
+        """From a comma-separated ``fields`` parameter; None when full objects are wanted."""
+        names = [name.strip() for name in fields.split(",") if name.strip()] if fields else []
+        if not names and not compact:
+            return None
+        return cls(names or None, compact)
 
 
 class ProductService:
     """Service for product-related operations."""
 
-    def phone_to_response(self, phone: Phone) -> PhoneResponse:
-        """Convert Phone model to PhoneResponse schema."""
+    def __init__(self, response_cache: Optional[PhoneResponseCache] = None):
+        self.response_cache = response_cache if response_cache is not None else PhoneResponseCache()
+
+    def sync_catalog_version(self, version: int):
+        """
+        Record the catalog version the current request read.
+
+        Responses for this request are then cached and reused only under that
+        version. Without one, whatever version the cache holds is assumed.
+        """
+        _request_catalog_version.set(version)
+
+    def _catalog_version(self) -> Optional[int]:
+        version = _request_catalog_version.get()
+        return self.response_cache.version if version is None else version
+
+    def build_phone_response(self, phone: PhoneLike) -> PhoneResponse:
+        """Convert a Phone model or PhoneRecord to a new PhoneResponse (uncached)."""
         features = None
         colors = None
 
@@ -53,11 +120,86 @@ class ProductService:
             created_at=phone.created_at
         )
 
-    def phones_to_response(self, phones: List[Phone]) -> List[PhoneResponse]:
-        """Convert list of Phone models to list of PhoneResponse schemas."""
-        return [self.phone_to_response(phone) for phone in phones]
-
-    def generate_comparison(self, phones: List[Phone]) -> List[ComparisonSpec]:
+    def _cached_response(self, phone: PhoneLike, store: bool = True) -> Tuple[PhoneResponse, bytes]:
+        version = self._catalog_version()
+        entry = self.response_cache.get(version, phone.id)
+        if entry is None:
+            response = self.build_phone_response(phone)
+            entry = (response, response.__pydantic_serializer__.to_json(response))
+            if store:
+                self.response_cache.put(version, phone.id, *entry)
+        return entry
+
+    def phone_to_response(self, phone: PhoneLike) -> PhoneResponse:
+        """PhoneResponse for a phone, shared through the response cache (do not modify)."""
+        return self._cached_response(phone)[0]
+
+    def phones_to_response(self, phones: List[PhoneLike]) -> List[PhoneResponse]:
+        """Convert a list of phones to a list of PhoneResponse schemas."""
+        return [self._cached_response(phone)[0] for phone in phones]
+
+    def phone_json(self, phone: PhoneLike, store: bool = True) -> bytes:
+        """
+        A phone serialized as a PhoneResponse JSON object.
+
+        With ``store=False`` a miss is not added to the response cache (for
+        one-off bulk reads such as exports).
+        """
+        return self._cached_response(phone, store)[1]
+
+    def _field_fragments(self, response: PhoneResponse) -> FieldFragments:
+        version = self._catalog_version()
+        fragments = self.response_cache.get_fields(version, response)
+        if fragments is None:
+            data = response.__pydantic_serializer__.to_python(response, mode="json")
+            values = tuple(_json_bytes(data[name]) for name in PHONE_FIELDS)
+            members = tuple(_json_bytes(name) + b":" + value for name, value in zip(PHONE_FIELDS, values))
+            fragments = (values, members)
+            self.response_cache.put_fields(version, response, fragments)
+        return fragments
+
+    def products_json(self, responses: List[PhoneResponse], selection: FieldSelection) -> bytes:
+        """
+        The ``"products"`` member of a list body with only the selected
+        fields, joined from per-field JSON fragments (plus the ``"fields"``
+        header for compact selections).
+        """
+        pick = selection.pick
+        if selection.compact:
+            items = [b",".join(pick(self._field_fragments(response)[0])) for response in responses]
+            products = b'"products":[[' + b"],[".join(items) + b"]]" if items else b'"products":[]'
+        else:
+            items = [b",".join(pick(self._field_fragments(response)[1])) for response in responses]
+            products = b'"products":[{' + b"},{".join(items) + b"}]" if items else b'"products":[]'
+        return products + selection.header
+
+    def phone_list_json(
+        self,
+        phones: List[PhoneLike],
+        extra: Optional[Dict[str, Any]] = None,
+        selection: Optional[FieldSelection] = None
+    ) -> bytes:
+        """
+        A PhoneListResponse body, joined from the phones' cached JSON fragments.
+
+        ``extra`` adds further top-level fields (plain JSON-serializable
+        values); ``selection`` narrows or compacts the products.
+        """
+        if selection is None:
+            products = b'"products":[' + b",".join([self._cached_response(phone)[1] for phone in phones]) + b"]"
+        else:
+            products = self.products_json([self._cached_response(phone)[0] for phone in phones], selection)
+        body = b"{" + products + b',"count":' + str(len(phones)).encode()
+        for key, value in (extra or {}).items():
+            body += b"," + json.dumps({key: value}, ensure_ascii=False, separators=(",", ":"))[1:-1].encode()
+        return body + b"}"
+
+    def chat_response_json(self, response: ChatResponse, selection: FieldSelection) -> bytes:
+        """A ChatResponse body with its products narrowed or compacted by ``selection``."""
+        body = response.__pydantic_serializer__.to_json(response, exclude={"products"})
+        return body[:-1] + b"," + self.products_json(response.products, selection) + b"}"
+
+    def generate_comparison(self, phones: List[PhoneLike]) -> List[ComparisonSpec]:
         """Generate comparison specifications for phones."""
         if len(phones) < 2:
             return []
@@ -134,7 +276,7 @@ class ProductService:
 
         return comparisons
 
-    def generate_comparison_summary(self, phones: List[Phone]) -> str:
+    def generate_comparison_summary(self, phones: List[PhoneLike]) -> str:
         """Generate a summary for phone comparison."""
         if len(phones) < 2:
             return "Need at least 2 phones to compare."
@@ -165,7 +307,7 @@ class ProductService:
 
         return " ".join(summary_parts)
 
-    def format_phone_context(self, phones: List[Phone]) -> str:
+    def format_phone_context(self, phones: List[PhoneLike]) -> str:
         """Format phones for LLM context."""
         if not phones:
             return "No phones available."
@@ -0,0 +1,181 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, select
+
+from app.config import get_settings
+from app.models.database import AsyncSessionLocal, Conversation, Message
+from app.repositories.conversation_repository import forget_conversation_ids
+from app.repositories.history_cache import SessionHistoryCache, get_session_history_cache
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class SessionJanitor:
+    """
+    Deletes conversations idle for longer than ``ttl``.
+
+    Expired conversations are purged in batches of ``batch_size``: one
+    SELECT of candidate ids, then one DELETE for their messages and one for
+    the conversations. Each batch is its own short transaction, so
+    concurrent chat turns only ever wait for a single batch. Both DELETEs
+    re-check ``last_activity``, so a session that became active again after
+    it was selected is left alone.
+
+    With ``archive_dir`` set, each batch is first appended to a gzip NDJSON
+    file per day (one conversation with its messages per line); a batch is
+    only deleted once its archive write succeeded. A session revived between
+    the two may appear in an archive while still being kept.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable = AsyncSessionLocal,
+        ttl: timedelta = timedelta(days=7),
+        interval: float = 600.0,
+        batch_size: int = 500,
+        archive_dir: Optional[str] = None,
+        history_cache: Optional[SessionHistoryCache] = None
+    ):
+        self.session_factory = session_factory
+        self.ttl = ttl
+        self.interval = interval
+        self.batch_size = batch_size
+        self.archive_dir = archive_dir
+        self.history_cache = history_cache if history_cache is not None else get_session_history_cache()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.purge_expired()
+            except Exception as e:
+                logger.warning("[JANITOR] Purge failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+    async def purge_expired(self, now: Optional[datetime] = None) -> int:
+        """Purge every conversation idle since before ``now - ttl``. Returns conversations deleted."""
+        cutoff = (now or datetime.utcnow()) - self.ttl
+        purged = 0
+        while True:
+            selected, deleted = await self._purge_batch(cutoff)
+            purged += deleted
+            if selected < self.batch_size:
+                break
+            # Let chat turns waiting on the write lock in between batches
+            await asyncio.sleep(0)
+
+        if purged:
+            logger.info("[JANITOR] Purged %d conversations idle since %s", purged, cutoff.isoformat())
+        return purged
+
+    async def _purge_batch(self, cutoff: datetime) -> Tuple[int, int]:
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(Conversation.id, Conversation.session_id)
+                .where(Conversation.last_activity < cutoff)
+                .order_by(Conversation.last_activity)
+                .limit(self.batch_size)
+            )
+            expired = dict(result.all())
+            if not expired:
+                return 0, 0
+
+            if self.archive_dir:
+                await self._archive(session, expired)
+
+            still_expired = (
+                select(Conversation.id)
+                .where(Conversation.id.in_(list(expired)), Conversation.last_activity < cutoff)
+            )
+            await session.execute(
+                delete(Message)
+                .where(Message.conversation_id.in_(still_expired))
+                .execution_options(synchronize_session=False)
+            )
+            result = await session.execute(
+                delete(Conversation)
+                .where(Conversation.id.in_(list(expired)), Conversation.last_activity < cutoff)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+
+        session_ids = list(expired.values())
+        forget_conversation_ids(session_ids)
+        for session_id in session_ids:
+            self.history_cache.invalidate(session_id)
+        return len(expired), result.rowcount
+
+    async def _archive(self, session, expired: Dict[int, str]):
+        conversations = (await session.execute(
+            select(Conversation).where(Conversation.id.in_(list(expired)))
+        )).scalars().all()
+        messages = (await session.execute(
+            select(Message)
+            .where(Message.conversation_id.in_(list(expired)))
+            .order_by(Message.conversation_id, Message.created_at, Message.id)
+        )).scalars().all()
+
+        by_conversation: Dict[int, List[dict]] = {}
+        for message in messages:
+            by_conversation.setdefault(message.conversation_id, []).append({
+                "role": message.role,
+                "content": message.content,
+                "metadata": json.loads(message.message_metadata) if message.message_metadata else None,
+                "created_at": message.created_at.isoformat() if message.created_at else None,
+            })
+
+        lines = [
+            json.dumps({
+                "session_id": conversation.session_id,
+                "created_at": conversation.created_at.isoformat() if conversation.created_at else None,
+                "last_activity": conversation.last_activity.isoformat() if conversation.last_activity else None,
+                "messages": by_conversation.get(conversation.id, []),
+            })
+            for conversation in conversations
+        ]
+        path = os.path.join(self.archive_dir, f"conversations-{datetime.utcnow():%Y%m%d}.ndjson.gz")
+        await asyncio.to_thread(_append_gzip_lines, path, lines)
+
+
+def _append_gzip_lines(path: str, lines: List[str]):
+    # Each call appends a gzip member; gzip readers decode concatenated members as one stream
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with gzip.open(path, "at", encoding="utf-8") as f:
+        for line in lines:
+            f.write(line + "\n")
+
+
+_session_janitor: Optional[SessionJanitor] = None
+
+
+def get_session_janitor() -> SessionJanitor:
+    """Get session janitor singleton."""
+    global _session_janitor
+    if _session_janitor is None:
+        _session_janitor = SessionJanitor(
+            ttl=timedelta(hours=settings.session_ttl_hours),
+            interval=settings.session_janitor_interval,
+            batch_size=settings.session_purge_batch_size,
+            archive_dir=settings.session_archive_dir
+        )
+    return _session_janitor
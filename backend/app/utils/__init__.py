@@ -1,9 +1,12 @@
 from app.utils.prompts import SYSTEM_PROMPT, ADVERSARIAL_DETECTION_PROMPT
 from app.utils.helpers import format_price, parse_price
+from app.utils.query_analysis import QueryAnalysis, analyze_query
 
 __all__ = [
     "SYSTEM_PROMPT",
     "ADVERSARIAL_DETECTION_PROMPT",
     "format_price",
-    "parse_price"
+    "parse_price",
+    "QueryAnalysis",
+    "analyze_query"
 ]
@@ -1,7 +1,10 @@
 """Utility helper functions."""
 
+import math
 import re
-from typing import Optional
+from typing import List, Optional, Union
+
+from app.utils.query_analysis import QueryAnalysis, analyze_query
 
 
 def format_price(price_inr: int) -> str:
@@ -40,6 +43,14 @@ def parse_price(price_str: str) -> Optional[int]:
         return None
 
 
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (0-100) of an already sorted list; None if empty."""
+    if not sorted_values:
+        return None
+    rank = math.ceil(q / 100 * len(sorted_values))
+    return sorted_values[min(max(rank, 1), len(sorted_values)) - 1]
+
+
 def truncate_text(text: str, max_length: int = 200) -> str:
     """Truncate text with ellipsis if too long."""
     if len(text) <= max_length:
@@ -75,16 +86,7 @@ def extract_numbers(text: str) -> list:
     return [int(n) for n in re.findall(r'\d+', text)]
 
 
-def is_valid_phone_query(query: str) -> bool:
+def is_valid_phone_query(query: Union[str, QueryAnalysis]) -> bool:
     """Check if query is related to phones."""
-    phone_keywords = [
-        'phone', 'mobile', 'smartphone', 'device',
-        'camera', 'battery', 'display', 'screen',
-        'processor', 'ram', 'storage', 'android', 'ios',
-        'samsung', 'oneplus', 'google', 'pixel', 'xiaomi',
-        'realme', 'vivo', 'oppo', 'nothing', 'iqoo', 'poco',
-        'buy', 'compare', 'recommend', 'suggest', 'best',
-        'budget', 'flagship', 'gaming', 'cheap', 'affordable'
-    ]
-    query_lower = query.lower()
-    return any(keyword in query_lower for keyword in phone_keywords)
+    analysis = query if isinstance(query, QueryAnalysis) else analyze_query(query)
+    return analysis.has_any("phone_query")
@@ -0,0 +1,216 @@
+"""One-shot lexical analysis of a user message, shared by the chat pipeline."""
+
+import re
+import hashlib
+from typing import Dict, FrozenSet, Optional, Tuple
+
+
+INTENT_KEYWORDS = {
+    "compare_phones": [
+        "compare", "vs", "versus", "difference", "better",
+        "which one", "between", "or"
+    ],
+    "explain_feature": [
+        "what is", "what's", "explain", "meaning", "means",
+        "how does", "why", "ois", "eis", "amoled", "oled",
+        "refresh rate", "mah", "processor", "chipset"
+    ],
+    "get_details": [
+        "tell me about", "details", "specs", "specifications",
+        "more about", "info", "information"
+    ],
+    "filter_by_brand": [
+        "samsung", "oneplus", "google", "pixel", "xiaomi",
+        "redmi", "realme", "vivo", "oppo", "nothing", "iqoo",
+        "poco", "motorola", "moto"
+    ],
+    "budget_search": [
+        "under", "below", "budget", "cheap", "affordable",
+        "around", "range", "less than", "within"
+    ],
+    "search_phones": [
+        "best", "recommend", "suggest", "looking for", "need",
+        "want", "find", "show", "give me", "phone", "mobile"
+    ],
+    "chitchat": [
+        "hello", "hi", "hey", "thanks", "thank you", "bye",
+        "good", "okay", "ok", "help"
+    ]
+}
+
+FEATURE_KEYWORDS = {
+    "camera": ["camera", "photo", "photography", "video", "megapixel", "mp"],
+    "gaming": ["gaming", "game", "gamer", "pubg", "fps"],
+    "battery": ["battery", "mah", "backup", "long lasting", "endurance"],
+    "fast_charging": ["fast charging", "quick charge", "turbo charge", "supercharge"],
+    "display": ["display", "screen", "amoled", "oled", "120hz", "144hz"],
+    "compact": ["compact", "small", "one hand", "one-hand", "lightweight"],
+    "5g": ["5g", "5 g"],
+    "flagship": ["flagship", "premium", "high end", "high-end", "best"]
+}
+
+# Words that turn a price mention into an upper bound or a range
+PRICE_CAP_KEYWORDS = ["under", "below", "less than", "within", "upto", "up to"]
+PRICE_AROUND_KEYWORDS = ["around"]
+
+# Terms that put an off-topic-looking query back into phone context (safety filter)
+PHONE_CONTEXT_KEYWORDS = [
+    "phone", "mobile", "smartphone", "device", "app",
+    "battery", "camera", "display", "screen", "processor",
+    "ram", "storage", "android", "ios", "samsung", "oneplus",
+    "google", "pixel", "xiaomi", "realme", "vivo", "oppo"
+]
+
+# Terms that mark a query as phone shopping related
+PHONE_QUERY_KEYWORDS = [
+    'phone', 'mobile', 'smartphone', 'device',
+    'camera', 'battery', 'display', 'screen',
+    'processor', 'ram', 'storage', 'android', 'ios',
+    'samsung', 'oneplus', 'google', 'pixel', 'xiaomi',
+    'realme', 'vivo', 'oppo', 'nothing', 'iqoo', 'poco',
+    'buy', 'compare', 'recommend', 'suggest', 'best',
+    'budget', 'flagship', 'gaming', 'cheap', 'affordable'
+]
+
+LEXICONS: Dict[str, Tuple[str, ...]] = {
+    **{f"intent:{name}": tuple(terms) for name, terms in INTENT_KEYWORDS.items()},
+    **{f"feature:{name}": tuple(terms) for name, terms in FEATURE_KEYWORDS.items()},
+    "price_cap": tuple(PRICE_CAP_KEYWORDS),
+    "price_around": tuple(PRICE_AROUND_KEYWORDS),
+    "phone_context": tuple(PHONE_CONTEXT_KEYWORDS),
+    "phone_query": tuple(PHONE_QUERY_KEYWORDS),
+}
+
+# Every distinct term is checked once per message, whichever lexicons share it
+_ALL_TERMS: Tuple[str, ...] = tuple(sorted({term for terms in LEXICONS.values() for term in terms}))
+
+# Changes whenever a lexicon is edited; part of downstream cache versions
+LEXICON_VERSION = hashlib.sha1(repr(sorted(LEXICONS.items())).encode("utf-8")).hexdigest()[:12]
+
+PRICE_PATTERN = re.compile(
+    r'(?:under|below|around|within|less than|budget of?|upto|up to)?\s*'
+    r'(?:rs\.?|inr|₹)?\s*(\d[\d,]*k?)\s*'
+    r'(?:rs\.?|inr|₹)?',
+    re.IGNORECASE
+)
+
+BRAND_PATTERN = re.compile(
+    r'\b(samsung|oneplus|one plus|google|pixel|xiaomi|mi|redmi|'
+    r'realme|vivo|oppo|nothing|iqoo|poco|motorola|moto)\b',
+    re.IGNORECASE
+)
+
+RAM_PATTERN = re.compile(r'(\d+)\s*gb\s*(?:ram)?', re.IGNORECASE)
+
+# analyze_query() works on lowercased text, so it uses case-sensitive twins of
+# the patterns above. Only the amount group of PRICE_PATTERN is ever used and
+# its prefix/suffix are optional, so matching the amount alone is equivalent.
+_PRICE_AMOUNT = re.compile(r'\d[\d,]*k?')
+_BRAND = re.compile(BRAND_PATTERN.pattern)
+_RAM = re.compile(RAM_PATTERN.pattern)
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9₹]+')
+
+BRAND_ALIASES = {
+    "one plus": "OnePlus",
+    "oneplus": "OnePlus",
+    "mi": "Xiaomi",
+    "redmi": "Xiaomi",
+    "moto": "Motorola",
+    "pixel": "Google"
+}
+
+
+class QueryAnalysis:
+    """
+    Normalized text, tokens and lexicon hits for a single user message.
+
+    Computed once per message by analyze_query() and passed to the safety
+    filter, intent classifier and query processor so none of them rescans
+    the raw text. ``key`` is the canonical cache key for the message.
+    """
+
+    __slots__ = ("raw", "normalized", "tokens", "hits", "prices", "brands", "ram_gb")
+
+    def __init__(
+        self,
+        raw: str,
+        normalized: str,
+        tokens: Tuple[str, ...],
+        hits: Dict[str, FrozenSet[str]],
+        prices: Tuple[int, ...],
+        brands: Tuple[str, ...],
+        ram_gb: Optional[int]
+    ):
+        self.raw = raw
+        self.normalized = normalized
+        self.tokens = tokens
+        self.hits = hits
+        self.prices = prices
+        self.brands = brands
+        self.ram_gb = ram_gb
+
+    @property
+    def key(self) -> str:
+        """Canonical cache key (same as normalize_query(raw))."""
+        return self.normalized
+
+    def hits_for(self, lexicon: str) -> FrozenSet[str]:
+        """Terms of the named lexicon that occur in the message."""
+        return self.hits.get(lexicon, frozenset())
+
+    def has_any(self, lexicon: str) -> bool:
+        return lexicon in self.hits
+
+    def __repr__(self) -> str:
+        return f"QueryAnalysis({self.normalized[:50]!r}, prices={self.prices}, brands={self.brands}, ram_gb={self.ram_gb})"
+
+
+def parse_price_token(price_str: str) -> int:
+    """Convert a matched price token ('30,000', '25k', '15') to rupees."""
+    price_str = price_str.replace(",", "")
+    if price_str.lower().endswith("k"):
+        return int(price_str[:-1]) * 1000
+
+    price = int(price_str)
+    if price < 1000:
+        price *= 1000
+    return price
+
+
+def normalize_query(query: str) -> str:
+    """Canonical form of a message, used as QueryAnalysis.key and for cache keys."""
+    return (query or "").lower().strip()
+
+
+def analyze_query(query: str) -> QueryAnalysis:
+    """Scan a message once and collect everything the pipeline needs from it."""
+    normalized = normalize_query(query)
+
+    matched = {term for term in _ALL_TERMS if term in normalized}
+    hits = {}
+    if matched:
+        for name, terms in LEXICONS.items():
+            found = matched.intersection(terms)
+            if found:
+                hits[name] = frozenset(found)
+
+    prices = tuple(
+        parse_price_token(amount)
+        for amount in _PRICE_AMOUNT.findall(normalized)
+    )
+    brands = tuple(
+        BRAND_ALIASES.get(brand, brand.title())
+        for brand in _BRAND.findall(normalized)
+    )
+    ram_match = _RAM.search(normalized)
+
+    return QueryAnalysis(
+        raw=query,
+        normalized=normalized,
+        tokens=tuple(TOKEN_PATTERN.findall(normalized)),
+        hits=hits,
+        prices=prices,
+        brands=brands,
+        ram_gb=int(ram_match.group(1)) if ram_match else None
+    )
@@ -0,0 +1,105 @@
+"""Benchmark read latency of phone lookups while chat turns are being written."""
+
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base, create_engines
+from app.repositories.conversation_repository import ConversationRepository
+from app.repositories.history_cache import SessionHistoryCache
+from app.repositories.phone_repository import PhoneRepository
+from app.utils.helpers import percentile
+
+PHONES_PATH = Path(__file__).parent.parent / "app" / "data" / "phones.json"
+
+
+async def seed(session_factory, copies: int):
+    phones = json.loads(PHONES_PATH.read_text())
+    async with session_factory() as db:
+        rows = []
+        for _ in range(copies):
+            for phone in phones:
+                row = dict(phone)
+                row.pop("id", None)
+                rows.append(row)
+        await PhoneRepository(db).bulk_create(rows)
+
+
+async def writer(session_factory, stop: asyncio.Event, counts: dict):
+    """Persist chat turns back to back, a fresh session per turn as per request."""
+    cache = SessionHistoryCache()
+    while not stop.is_set():
+        async with session_factory() as db:
+            repo = ConversationRepository(db, history_cache=cache)
+            await repo.add_turn(f"bench-{counts['turns'] % 50}", "best camera phone under 40000 " * 20,
+                                "Here are some phones. " * 40)
+        counts["turns"] += 1
+
+
+async def reader(session_factory, stop: asyncio.Event, latencies: list, counts: dict):
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            async with session_factory() as db:
+                await PhoneRepository(db).get_by_price_range(15000, 40000)
+        except Exception:
+            counts["errors"] += 1
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def run(profile: str, readers: int, seconds: float, warmup: float = 1.0):
+    with tempfile.TemporaryDirectory() as tmp:
+        write_engine, read_engine = create_engines(f"sqlite+aiosqlite:///{tmp}/bench.db", profile=profile)
+        async with write_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        write_sessions = sessionmaker(write_engine, class_=AsyncSession, expire_on_commit=False)
+        read_sessions = sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
+        await seed(write_sessions, copies=40)
+
+        stop = asyncio.Event()
+        latencies = []
+        counts = {"turns": 0, "errors": 0}
+        tasks = [asyncio.create_task(writer(write_sessions, stop, counts))]
+        tasks += [asyncio.create_task(reader(read_sessions, stop, latencies, counts)) for _ in range(readers)]
+        # Connections are opened lazily: only measure once every pool is warm
+        await asyncio.sleep(warmup)
+        latencies.clear()
+        counts.update(turns=0, errors=0)
+        await asyncio.sleep(seconds)
+        stop.set()
+        await asyncio.gather(*tasks)
+
+        await write_engine.dispose()
+        if read_engine is not write_engine:
+            await read_engine.dispose()
+
+    latencies.sort()
+    print(f"{profile:<8} reads/s {len(latencies) / seconds:>7.0f}  "
+          f"p50 {percentile(latencies, 50):>6.2f}ms  p99 {percentile(latencies, 99):>7.2f}ms  "
+          f"max {latencies[-1] if latencies else 0:>8.2f}ms  errors {counts['errors']}  "
+          f"turns written {counts['turns']}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"{args.readers} concurrent readers, 1 writer, {args.seconds:.0f}s per profile, file-backed SQLite")
+    for profile in ("default", "wal"):
+        await run(profile, args.readers, args.seconds)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
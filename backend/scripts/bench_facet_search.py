@@ -0,0 +1,142 @@
+"""Benchmark faceted search latency: bitmap FacetIndex vs one SQL query per facet, up to 100k phones."""
+
+import argparse
+import json
+import random
+import sqlite3
+import statistics
+import sys
+import time
+from collections import namedtuple
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.database import normalize_brand
+from app.repositories.facet_index import FacetIndex, PRICE_BANDS
+
+PHONES_PATH = Path(__file__).parent.parent / "app" / "data" / "phones.json"
+
+Row = namedtuple("Row", "id brand price_inr ram_gb refresh_rate features")
+
+SELECTIONS = {
+    "none": {},
+    "brand": {"brand": ["samsung", "xiaomi"]},
+    "brand+ram": {"brand": ["samsung"], "ram_gb": ["8", "12"]},
+    "band+refresh": {"price_band": ["15k-30k"], "refresh_rate": ["120"]},
+    "features": {"features": ["5g", "ip68 rating"], "ram_gb": ["8"]},
+}
+
+PRICE_BAND_SQL = "CASE " + " ".join(
+    f"WHEN price_inr >= {low}" + (f" AND price_inr < {high}" if high else "") + f" THEN '{value}'"
+    for value, low, high in PRICE_BANDS
+) + " END"
+
+# Facet name -> (SQL value expression for counts, FROM clause)
+SQL_FACETS = {
+    "brand": ("brand_key", "phones"),
+    "price_band": (PRICE_BAND_SQL, "phones"),
+    "ram_gb": ("ram_gb", "phones"),
+    "refresh_rate": ("refresh_rate", "phones"),
+    "features": ("lower(feature.value)", "phones, json_each(phones.features) AS feature"),
+}
+
+
+def synthetic_catalog(size: int):
+    base = json.loads(PHONES_PATH.read_text())
+    rng = random.Random(size)
+    rows = []
+    for i in range(size):
+        phone = base[i % len(base)]
+        rows.append(Row(
+            id=i + 1,
+            brand=phone["brand"] if rng.random() < 0.9 else f"Brand{rng.randrange(200)}",
+            price_inr=max(5000, int(phone["price_inr"] * rng.uniform(0.7, 1.3))),
+            ram_gb=phone.get("ram_gb"),
+            refresh_rate=phone.get("refresh_rate"),
+            features=json.dumps((phone.get("features") or []) + [f"feature {rng.randrange(500)}"]),
+        ))
+    return rows
+
+
+def sqlite_catalog(rows):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE phones (id INTEGER PRIMARY KEY, brand TEXT, brand_key TEXT, price_inr INTEGER, "
+                 "ram_gb INTEGER, refresh_rate INTEGER, features TEXT)")
+    conn.executemany("INSERT INTO phones VALUES (?, ?, ?, ?, ?, ?, ?)",
+                     [(r.id, r.brand, normalize_brand(r.brand), r.price_inr, r.ram_gb, r.refresh_rate, r.features)
+                      for r in rows])
+    for column in ("brand_key", "price_inr", "ram_gb", "refresh_rate"):
+        conn.execute(f"CREATE INDEX ix_{column} ON phones ({column})")
+    return conn
+
+
+def sql_conditions(selections, exclude=None):
+    conditions, params = [], []
+    for name, values in selections.items():
+        if name == exclude or not values:
+            continue
+        if name == "features":
+            for value in values:
+                conditions.append("EXISTS (SELECT 1 FROM json_each(phones.features) WHERE lower(value) = ?)")
+                params.append(value)
+        else:
+            column = SQL_FACETS[name][0]
+            conditions.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(int(v) if name in ("ram_gb", "refresh_rate") else v for v in values)
+    return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+
+def sql_facet_search(conn, selections, limit=20):
+    """Page, total and every facet's counts: one query each, as the endpoint would need without bitmaps."""
+    where, params = sql_conditions(selections)
+    ids = [row[0] for row in conn.execute(
+        f"SELECT id FROM phones{where} ORDER BY price_inr DESC LIMIT {limit}", params)]
+    total = conn.execute(f"SELECT COUNT(*) FROM phones{where}", params).fetchone()[0]
+    facets = {}
+    for name, (expression, source) in SQL_FACETS.items():
+        where, params = sql_conditions(selections, exclude=name)
+        facets[name] = conn.execute(
+            f"SELECT {expression}, COUNT(*) FROM {source}{where} GROUP BY 1", params).fetchall()
+    return ids, total, facets
+
+
+def latency(call, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'phones':>7} {'selection':<13} {'bitmap p50/p95 ms':>18} {'SQL p50/p95 ms':>16} {'speedup':>8}")
+    for size in args.sizes:
+        rows = synthetic_catalog(size)
+        start = time.perf_counter()
+        index = FacetIndex().rebuild(1, rows)
+        build_ms = (time.perf_counter() - start) * 1000
+        conn = sqlite_catalog(rows)
+
+        for label, selections in SELECTIONS.items():
+            found = index.search(selections)
+            ids, total, _ = sql_facet_search(conn, selections)
+            assert found.total == total, (label, found.total, total)
+
+            bitmap = latency(lambda: index.search(selections), args.iterations)
+            sql = latency(lambda: sql_facet_search(conn, selections), max(3, args.iterations // 10))
+            print(f"{size:>7} {label:<13} {bitmap[0]:>8.2f} /{bitmap[1]:>7.2f} {sql[0]:>7.1f} /{sql[1]:>6.1f} "
+                  f"{sql[0] / bitmap[0]:>7.0f}x")
+        print(f"{size:>7} index rebuild {build_ms:.0f} ms")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
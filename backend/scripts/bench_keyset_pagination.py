@@ -0,0 +1,70 @@
+"""Benchmark page latency by depth: OFFSET pagination vs (price_inr, id) keyset cursors."""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base
+from app.repositories.phone_repository import PhoneRepository
+from app.repositories.result_cache import PhoneResultCache
+
+PHONES_PATH = Path(__file__).parent.parent / "app" / "data" / "phones.json"
+
+
+async def page_ms(call, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        await call()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--page", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    phones = json.loads(PHONES_PATH.read_text())
+    async with session_factory() as db:
+        repo = PhoneRepository(db)
+        for start in range(0, args.rows, 5000):
+            await repo.bulk_create([
+                dict({k: v for k, v in phones[i % len(phones)].items() if k != "id"}, price_inr=10000 + i % 90000)
+                for i in range(start, min(start + 5000, args.rows))
+            ])
+
+    print(f"{args.rows} phones, pages of {args.page}, uncached")
+    print(f"{'depth':>7} {'offset ms':>10} {'cursor ms':>10}")
+    async with session_factory() as db:
+        repo = PhoneRepository(db, result_cache=PhoneResultCache(max_entries=0))
+        last_page = max(args.rows - args.page, 0)
+        for depth in sorted({d for d in (0, 1000, 10000, 50000, last_page) if d <= last_page}):
+            # Position of the row just before the page, as a client's cursor would hold it
+            previous = (await repo.search(limit=1, offset=depth - 1))[0] if depth else None
+            after = (previous.price_inr, previous.id) if previous else None
+            by_offset = await repo.search(limit=args.page, offset=depth)
+            by_cursor = await repo.search(limit=args.page, after=after)
+            assert [p.id for p in by_offset] == [p.id for p in by_cursor]
+
+            offset_ms = await page_ms(lambda: repo.search(limit=args.page, offset=depth), args.repeats)
+            cursor_ms = await page_ms(lambda: repo.search(limit=args.page, after=after), args.repeats)
+            print(f"{depth:>7} {offset_ms:>10.2f} {cursor_ms:>10.2f}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
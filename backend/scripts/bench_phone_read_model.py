@@ -0,0 +1,92 @@
+"""Benchmark memory and throughput of loading phones as ORM objects vs PhoneRecord."""
+
+import argparse
+import asyncio
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base, Phone
+from app.repositories.phone_repository import PhoneRepository
+from app.services.product_service import ProductService
+
+PHONES_PATH = Path(__file__).parent.parent / "app" / "data" / "phones.json"
+
+
+async def load_orm(db: AsyncSession, limit: int):
+    """The previous read path: full ORM entities in the session's identity map."""
+    result = await db.execute(select(Phone).limit(limit))
+    return result.scalars().all()
+
+
+async def load_records(db: AsyncSession, limit: int):
+    return await PhoneRepository(db).get_all(limit=limit)
+
+
+async def memory(session_factory, load, rows: int) -> float:
+    """Bytes allocated per phone while holding ``rows`` loaded phones."""
+    async with session_factory() as db:
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        phones = await load(db, rows)
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        assert len(phones) == rows
+    return (after - before) / rows
+
+
+async def throughput(session_factory, load, page: int, seconds: float, to_response: bool) -> float:
+    """Pages per second, each loaded in a fresh session as per request."""
+    service = ProductService()
+    pages = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        async with session_factory() as db:
+            phones = await load(db, page)
+            if to_response:
+                service.phones_to_response(phones)
+        pages += 1
+    return pages / seconds
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--page", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    phones = json.loads(PHONES_PATH.read_text())
+    copies = -(-args.rows // len(phones))
+    async with session_factory() as db:
+        await PhoneRepository(db).bulk_create([
+            {k: v for k, v in phone.items() if k != "id"} for _ in range(copies) for phone in phones
+        ])
+
+    print(f"{args.rows} phones held in memory; pages of {args.page} for throughput, in-memory SQLite")
+    print(f"{'path':<12} {'bytes/phone':>12} {'load pages/s':>13} {'load+response pages/s':>22}")
+    for label, load in (("ORM Phone", load_orm), ("PhoneRecord", load_records)):
+        per_phone = await memory(session_factory, load, args.rows)
+        load_rate = await throughput(session_factory, load, args.page, args.seconds, to_response=False)
+        response_rate = await throughput(session_factory, load, args.page, args.seconds, to_response=True)
+        print(f"{label:<12} {per_phone:>12.0f} {load_rate:>13.0f} {response_rate:>22.0f}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,82 @@
+"""Benchmark CPU per product list response: per-request schema serialization vs cached JSON fragments."""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base
+from app.models.schemas import PhoneListResponse
+from app.repositories.phone_repository import PhoneRepository
+from app.services.product_service import ProductService
+
+PHONES_PATH = Path(__file__).parent.parent / "app" / "data" / "phones.json"
+
+RESPONSE_FIELD = create_response_field(name="Response_get_products", type_=PhoneListResponse)
+
+
+async def schema_body(service: ProductService, phones) -> bytes:
+    """The previous path: new PhoneResponses, then FastAPI's response_model validation and JSONResponse."""
+    responses = [service.build_phone_response(phone) for phone in phones]
+    content = await serialize_response(
+        field=RESPONSE_FIELD, response_content=PhoneListResponse(products=responses, count=len(responses))
+    )
+    return JSONResponse(content).body
+
+
+async def cached_body(service: ProductService, phones) -> bytes:
+    return service.phone_list_json(phones)
+
+
+async def cpu_per_request(render, service, phones, iterations: int) -> float:
+    """CPU microseconds per rendered list response."""
+    for _ in range(20):
+        await render(service, phones)
+    start = time.process_time()
+    for _ in range(iterations):
+        await render(service, phones)
+    return (time.process_time() - start) / iterations * 1e6
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    phones = json.loads(PHONES_PATH.read_text())
+    copies = -(-100 // len(phones))
+    async with session_factory() as db:
+        repo = PhoneRepository(db)
+        await repo.bulk_create([{k: v for k, v in p.items() if k != "id"} for _ in range(copies) for p in phones])
+        version = await repo.get_catalog_version()
+
+    service = ProductService()
+    service.sync_catalog_version(version)
+    print(f"{'page':>5} {'schema us/req':>14} {'cached us/req':>14} {'speedup':>8}")
+    for page in (10, 20, 50, 100):
+        async with session_factory() as db:
+            records = await PhoneRepository(db).get_all(limit=page)
+        assert json.loads(await schema_body(service, records)) == json.loads(await cached_body(service, records))
+        before = await cpu_per_request(schema_body, service, records, args.iterations)
+        after = await cpu_per_request(cached_body, service, records, args.iterations)
+        print(f"{page:>5} {before:>14.1f} {after:>14.1f} {before / after:>7.1f}x")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,138 @@
+"""Benchmark queries per second of hot repository methods: per-call statements, prebuilt ones, result cache."""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base, Conversation, Message, Phone, normalize_brand
+from app.repositories.conversation_repository import ConversationRepository
+from app.repositories.history_cache import SessionHistoryCache
+from app.repositories.phone_repository import PhoneRepository
+from app.repositories.result_cache import PhoneResultCache
+
+PHONES_PATH = Path(__file__).parent.parent / "app" / "data" / "phones.json"
+
+
+# The same queries, constructed on every call as the repositories did before
+async def legacy_get_by_id(db, phone_id):
+    return (await db.execute(select(Phone).where(Phone.id == phone_id))).scalar_one_or_none()
+
+
+async def legacy_get_by_ids(db, phone_ids):
+    return (await db.execute(select(Phone).where(Phone.id.in_(phone_ids)))).scalars().all()
+
+
+async def legacy_get_by_brand(db, brand, limit=10):
+    return (await db.execute(
+        select(Phone).where(Phone.brand_key == normalize_brand(brand)).order_by(Phone.price_inr.desc()).limit(limit)
+    )).scalars().all()
+
+
+async def legacy_get_by_price_range(db, min_price, max_price, limit=10):
+    return (await db.execute(
+        select(Phone)
+        .where(and_(Phone.price_inr >= min_price, Phone.price_inr <= max_price))
+        .order_by(Phone.price_inr.desc())
+        .limit(limit)
+    )).scalars().all()
+
+
+async def legacy_get_gaming_phones(db, limit=10):
+    return (await db.execute(
+        select(Phone).where(and_(Phone.refresh_rate >= 120, Phone.ram_gb >= 8))
+        .order_by(Phone.refresh_rate.desc()).limit(limit)
+    )).scalars().all()
+
+
+async def legacy_search(db, min_price, max_price, min_ram, limit=10):
+    conditions = [Phone.price_inr >= min_price, Phone.price_inr <= max_price, Phone.ram_gb >= min_ram]
+    return (await db.execute(
+        select(Phone).where(and_(*conditions)).order_by(Phone.price_inr.desc()).limit(limit)
+    )).scalars().all()
+
+
+async def legacy_get_messages(db, session_id, limit=20):
+    conversation = (await db.execute(
+        select(Conversation).where(Conversation.session_id == session_id)
+    )).scalar_one_or_none()
+    result = await db.execute(
+        select(Message).where(Message.conversation_id == conversation.id)
+        .order_by(Message.created_at.desc(), Message.id.desc()).limit(limit)
+    )
+    return list(reversed(result.scalars().all()))
+
+
+def phone_cases(db, phones):
+    return {
+        "get_by_id": (lambda i: legacy_get_by_id(db, i % 25 + 1), lambda i: phones.get_by_id(i % 25 + 1)),
+        "get_by_ids": (lambda i: legacy_get_by_ids(db, [1, 2, i % 25 + 1]), lambda i: phones.get_by_ids([1, 2, i % 25 + 1])),
+        "get_by_brand": (lambda i: legacy_get_by_brand(db, "Samsung"), lambda i: phones.get_by_brand("Samsung")),
+        "get_by_price_range": (lambda i: legacy_get_by_price_range(db, 10000 + i % 10, 40000),
+                               lambda i: phones.get_by_price_range(10000 + i % 10, 40000)),
+        "get_gaming_phones": (lambda i: legacy_get_gaming_phones(db), lambda i: phones.get_gaming_phones()),
+        "search": (lambda i: legacy_search(db, 15000, 40000, 8),
+                   lambda i: phones.search(min_price=15000, max_price=40000, min_ram=8)),
+    }
+
+
+def cases(db):
+    """name -> (per-call statement, prebuilt statement, prebuilt behind the result cache)."""
+    uncached = phone_cases(db, PhoneRepository(db, result_cache=PhoneResultCache(max_entries=0)))
+    cached = phone_cases(db, PhoneRepository(db, result_cache=PhoneResultCache()))
+    conversations = ConversationRepository(db, history_cache=SessionHistoryCache())
+    all_cases = {name: (legacy, current, cached[name][1]) for name, (legacy, current) in uncached.items()}
+    get_messages = lambda i: conversations.get_messages("bench")
+    all_cases["get_messages"] = (lambda i: legacy_get_messages(db, "bench"), get_messages, None)
+    return all_cases
+
+
+async def qps(call, iterations: int) -> float:
+    for i in range(50):
+        await call(i)
+    start = time.perf_counter()
+    for i in range(iterations):
+        await call(i)
+    return iterations / (time.perf_counter() - start)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    # In-memory database: what is left besides SQLite is statement and ORM overhead
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    phones = json.loads(PHONES_PATH.read_text())
+    for phone in phones:
+        phone.pop("id", None)
+    async with session_factory() as db:
+        await PhoneRepository(db).bulk_create(phones)
+        repo = ConversationRepository(db, history_cache=SessionHistoryCache())
+        for n in range(10):
+            await repo.add_turn("bench", f"question {n}", f"answer {n}")
+
+    print(f"{'method':<20} {'per-call q/s':>13} {'prebuilt q/s':>13} {'speedup':>8} {'cached q/s':>11}")
+    async with session_factory() as db:
+        for name, (legacy, current, cached) in cases(db).items():
+            before = await qps(legacy, args.iterations)
+            after = await qps(current, args.iterations)
+            hits = f"{await qps(cached, args.iterations):>11.0f}" if cached else f"{'-':>11}"
+            print(f"{name:<20} {before:>13.0f} {after:>13.0f} {after / before:>7.2f}x {hits}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+"""Benchmark SafetyFilter throughput on worst-case (2000 character) inputs."""
+
+import argparse
+import logging
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.safety_filter import SafetyFilter
+
+
+WORDS = (
+    "best phone camera battery under samsung display gaming compare price with good "
+    "oneplus pixel amoled refresh rate charging storage budget flagship compact"
+).split()
+
+
+def make_inputs(count: int, length: int, seed: int = 7) -> list:
+    """Phone-related filler text: nothing matches, so every pattern is tried everywhere."""
+    rng = random.Random(seed)
+    inputs = []
+    for _ in range(count):
+        text = " ".join(rng.choice(WORDS) for _ in range(length // 4))
+        inputs.append(text[:length])
+    return inputs
+
+
+def legacy_scan(safety_filter: SafetyFilter, compiled: dict, query: str) -> bool:
+    """Per-pattern sequential scan, as check_input() worked before the automata."""
+    query_lower = query.lower().strip()
+    if any(p.search(query_lower) for p in compiled["allow"]):
+        return True
+    if any(p.search(query_lower) for p in compiled["adversarial"]):
+        return False
+    sum(1 for p in compiled["off_topic"] if p.search(query_lower))
+    sum(1 for c in query if c in safety_filter.SUSPICIOUS_CHARACTERS)
+    return not any(re.search(p, query, re.IGNORECASE) for p in safety_filter.ENCODING_PATTERNS)
+
+
+def timed(label: str, func, inputs: list, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(inputs)
+    elapsed = time.perf_counter() - start
+    total = len(inputs) * repeat
+    print(f"{label:<28} {total / elapsed:>10,.0f} msgs/s  {elapsed / total * 1e6:>8.1f} us/msg")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=500)
+    parser.add_argument("--length", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    safety_filter = SafetyFilter(cache_size=0)  # measure the matcher, not the verdict cache
+    compiled = {
+        "allow": [re.compile(p, re.IGNORECASE) for p in SafetyFilter.PHONE_RELATED_ALLOW],
+        "adversarial": [re.compile(p, re.IGNORECASE) for p in SafetyFilter.ADVERSARIAL_PATTERNS],
+        "off_topic": [re.compile(p, re.IGNORECASE) for p in SafetyFilter.OFF_TOPIC_PATTERNS],
+    }
+    inputs = make_inputs(args.count, args.length)
+
+    print(f"{args.count} inputs x {args.length} chars, {args.repeat} rounds")
+    timed("legacy per-pattern scan", lambda qs: [legacy_scan(safety_filter, compiled, q) for q in qs],
+          inputs, args.repeat)
+    timed("check_input (automata)", lambda qs: [safety_filter.check_input(q) for q in qs],
+          inputs, args.repeat)
+    timed("check_batch", safety_filter.check_batch, inputs, args.repeat)
+
+    cached_filter = SafetyFilter(cache_size=len(inputs))
+    timed("check_input (verdict cache)", lambda qs: [cached_filter.check_input(q) for q in qs],
+          inputs, args.repeat)
+    print(f"verdict cache: {cached_filter.verdict_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
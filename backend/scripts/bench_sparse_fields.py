@@ -0,0 +1,46 @@
+"""Benchmark payload size and serialization time of full, sparse and compact product lists."""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.product_service import FieldSelection, ProductService
+
+PHONES_PATH = Path(__file__).parent.parent / "app" / "data" / "phones.json"
+GRID_FIELDS = "brand,model,price_inr,image_url,ram_gb,storage_gb"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--page", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=2000)
+    args = parser.parse_args()
+
+    rows = json.loads(PHONES_PATH.read_text())
+    phones = [type("Phone", (), dict(row, id=i + 1, created_at=None))() for i, row in
+              enumerate(rows[i % len(rows)] for i in range(args.page))]
+
+    service = ProductService()
+    service.sync_catalog_version(1)
+    modes = {
+        "full": None,
+        "sparse": FieldSelection.parse(GRID_FIELDS),
+        "compact": FieldSelection.parse(GRID_FIELDS, compact=True),
+    }
+    print(f"pages of {args.page}, warm response cache, grid fields: {GRID_FIELDS}")
+    print(f"{'mode':<8} {'bytes':>7} {'us/page':>8}")
+    for label, selection in modes.items():
+        body = service.phone_list_json(phones, selection=selection)
+        start = time.perf_counter()
+        for _ in range(args.repeats):
+            service.phone_list_json(phones, selection=selection)
+        elapsed = (time.perf_counter() - start) / args.repeats * 1e6
+        print(f"{label:<8} {len(body):>7} {elapsed:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
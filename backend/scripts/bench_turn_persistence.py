@@ -0,0 +1,78 @@
+"""Benchmark DB round-trips and latency of persisting one chat turn."""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base
+from app.repositories.conversation_repository import ConversationRepository
+
+
+class RoundTripCounter:
+    """Counts statements and commits sent to the driver."""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._bump)
+        event.listen(engine.sync_engine, "commit", self._bump)
+
+    def _bump(self, *args, **kwargs):
+        self.count += 1
+
+
+async def legacy_turn(repo: ConversationRepository, session_id: str):
+    """Two add_message() calls, as the agent persisted a turn before add_turn()."""
+    await repo.add_message(session_id, "user", "best camera phone under 40000", {"intent": "search_phones"})
+    await repo.add_message(session_id, "assistant", "Here are some phones.", {"intent": "search_phones", "product_ids": [1, 2]})
+
+
+async def add_turn(repo: ConversationRepository, session_id: str):
+    await repo.add_turn(session_id, "best camera phone under 40000", "Here are some phones.",
+                        user_metadata={"intent": "search_phones"},
+                        assistant_metadata={"intent": "search_phones", "product_ids": [1, 2]})
+
+
+async def run(label: str, persist, sessions: int, turns: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp}/bench.db")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        counter = RoundTripCounter(engine)
+        session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+        counter.count = 0
+        start = time.perf_counter()
+        for s in range(sessions):
+            for _ in range(turns):
+                # A fresh session per turn, as each request gets its own
+                async with session_factory() as db:
+                    await persist(ConversationRepository(db), f"{label}-{s}")
+        elapsed = time.perf_counter() - start
+        await engine.dispose()
+
+    total = sessions * turns
+    print(f"{label:<22} {counter.count / total:>6.1f} round-trips/turn  {elapsed / total * 1000:>7.2f} ms/turn")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{args.sessions} sessions x {args.turns} turns, file-backed SQLite")
+    await run("2x add_message", legacy_turn, args.sessions, args.turns)
+    await run("add_turn", add_turn, args.sessions, args.turns)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
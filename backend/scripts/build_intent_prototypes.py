@@ -0,0 +1,41 @@
+"""Script to rebuild intent prototype centroids from labelled examples."""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.intent_prototypes import IntentPrototypes
+from app.services.embedding_service import get_embedding_service
+
+
+DATA_DIR = Path(__file__).parent.parent / "app" / "data"
+
+
+def build_prototypes(examples_path: Path, output_path: Path):
+    """Embed labelled examples and save per-intent centroids."""
+    with open(examples_path, "r") as f:
+        examples = json.load(f)
+
+    print(f"Embedding {sum(len(v) for v in examples.values())} examples for {len(examples)} intents...")
+    prototypes = IntentPrototypes.from_examples(examples, get_embedding_service())
+    prototypes.save(str(output_path))
+
+    print(f"Saved prototypes (version {prototypes.version}, dim {prototypes.dimension}) to {output_path}")
+    print("Set INTENT_PROTOTYPES_PATH to this file to enable embedding-based intent routing.")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--examples", type=Path, default=DATA_DIR / "intent_examples.json")
+    parser.add_argument("--output", type=Path, default=DATA_DIR / "intent_prototypes.npz")
+    args = parser.parse_args()
+
+    build_prototypes(args.examples, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Tests for the access log middleware."""
+
+import logging
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.middleware import AccessLogMiddleware
+
+
+def make_app(**options) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/json")
+    async def json_route():
+        return {"source": "catalog", "items": list(range(500))}
+
+    @app.get("/stream")
+    async def stream_route():
+        async def chunks():
+            for i in range(5):
+                yield f"chunk-{i}\n"
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    app.add_middleware(AccessLogMiddleware, **options)
+    return app
+
+
+def access_messages(caplog) -> list:
+    return [r.getMessage() for r in caplog.records if r.name == "app.access"]
+
+
+class TestAccessLogMiddleware:
+    """Tests for AccessLogMiddleware."""
+
+    def test_logs_source_and_truncates_body(self, caplog):
+        caplog.set_level(logging.INFO, logger="app.access")
+        client = TestClient(make_app(body_limit=40))
+
+        response = client.get("/json")
+        assert response.json()["items"][-1] == 499  # client still gets the full body
+
+        [message] = access_messages(caplog)
+        assert message.startswith("GET /json -> status=200 source=catalog")
+        assert message.endswith("...(truncated)")
+        assert len(message.split("body=", 1)[1]) == 40 + len("...(truncated)")
+
+    def test_streaming_passes_through(self, caplog):
+        caplog.set_level(logging.INFO, logger="app.access")
+        client = TestClient(make_app())
+
+        with client.stream("GET", "/stream") as response:
+            chunks = list(response.iter_text())
+        assert "".join(chunks) == "".join(f"chunk-{i}\n" for i in range(5))
+
+        [message] = access_messages(caplog)
+        assert "bytes=40" in message
+        assert "chunk-4" in message
+
+    def test_unsampled_requests_skip_body(self, caplog):
+        caplog.set_level(logging.INFO, logger="app.access")
+        client = TestClient(make_app(sample_rate=0.0))
+
+        client.get("/json")
+        [message] = access_messages(caplog)
+        assert "status=200" in message
+        assert "body=" not in message
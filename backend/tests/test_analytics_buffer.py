@@ -0,0 +1,173 @@
+"""Tests for the write-behind analytics buffer and rollups."""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base, QueryAnalytics, QueryRollup
+from app.repositories.analytics_repository import AnalyticsRepository
+from app.services.analytics_buffer import AnalyticsBuffer
+
+
+async def make_session_factory():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine, sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def count_rows(session_factory, model) -> int:
+    async with session_factory() as db:
+        return await db.scalar(select(func.count()).select_from(model))
+
+
+def record(buffer: AnalyticsBuffer, intent: str = "search_phones", ms: int = 100, **row):
+    buffer.record(query="q", intent=intent, products_returned=2, response_time_ms=ms,
+                  was_adversarial=intent == "adversarial", **row)
+
+
+class TestAnalyticsBuffer:
+    """Tests for AnalyticsBuffer."""
+
+    @pytest.mark.asyncio
+    async def test_size_trigger_writes_one_batch(self):
+        engine, session_factory = await make_session_factory()
+        buffer = AnalyticsBuffer(session_factory, max_batch=3, flush_interval=60)
+
+        record(buffer)
+        record(buffer)
+        assert await count_rows(session_factory, QueryAnalytics) == 0
+
+        record(buffer)
+        await buffer._flush_task
+        assert await count_rows(session_factory, QueryAnalytics) == 3
+
+        await buffer.stop()
+        await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_time_trigger_and_drain_on_stop(self):
+        engine, session_factory = await make_session_factory()
+        buffer = AnalyticsBuffer(session_factory, max_batch=100, flush_interval=0.05)
+
+        record(buffer)
+        await asyncio.sleep(0.15)
+        assert await count_rows(session_factory, QueryAnalytics) == 1
+
+        record(buffer)
+        record(buffer)
+        await buffer.stop()
+        assert buffer.pending == 0
+        assert await count_rows(session_factory, QueryAnalytics) == 3
+
+        await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_overflow_sheds_oldest_rows(self):
+        buffer = AnalyticsBuffer(max_batch=100, max_pending=5)
+        for ms in range(8):
+            record(buffer, ms=ms)
+        assert buffer.pending == 5
+        assert buffer.dropped == 3
+        assert buffer._pending[0]["response_time_ms"] == 3
+        buffer._pending.clear()
+        await buffer.stop()
+
+
+class TestRollups:
+    """Tests for per-minute rollups."""
+
+    @pytest.mark.asyncio
+    async def test_minute_spanning_flushes_is_rolled_up_whole(self):
+        engine, session_factory = await make_session_factory()
+        buffer = AnalyticsBuffer(session_factory, max_batch=1000, flush_interval=60)
+        minute = datetime.utcnow().replace(second=0, microsecond=0)
+
+        for ms in range(1, 51):
+            record(buffer, ms=ms, created_at=minute + timedelta(seconds=1))
+        record(buffer, intent="adversarial", ms=1, created_at=minute)
+        await buffer.flush()
+        for ms in range(51, 101):
+            record(buffer, ms=ms, created_at=minute + timedelta(seconds=30))
+        await buffer.flush()
+
+        async with session_factory() as db:
+            rollups = await AnalyticsRepository(db).get_rollups(minute)
+        await buffer.stop()
+        await engine.dispose()
+
+        by_intent = {r["intent"]: r for r in rollups}
+        search = by_intent["search_phones"]
+        assert search["count"] == 100
+        assert (search["p50_ms"], search["p95_ms"], search["p99_ms"]) == (50, 95, 99)
+        assert search["latency_max_ms"] == 100
+        assert by_intent["adversarial"]["adversarial_count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_is_not_rolled_up(self):
+        engine, session_factory = await make_session_factory()
+        # No tables: the first flush fails
+        broken_engine = create_async_engine("sqlite+aiosqlite://")
+        buffer = AnalyticsBuffer(sessionmaker(broken_engine, class_=AsyncSession), max_batch=1000, flush_interval=60)
+        minute = datetime.utcnow().replace(second=0, microsecond=0)
+
+        for _ in range(3):
+            record(buffer, created_at=minute)
+        assert await buffer.flush() == 0
+        buffer.session_factory = session_factory
+        record(buffer, created_at=minute)
+        assert await buffer.flush() == 1
+
+        async with session_factory() as db:
+            [rollup] = await AnalyticsRepository(db).get_rollups(minute)
+        raw = await count_rows(session_factory, QueryAnalytics)
+        await buffer.stop()
+        await engine.dispose()
+        await broken_engine.dispose()
+
+        assert buffer.dropped == 3
+        assert rollup["count"] == raw == 1
+
+    @pytest.mark.asyncio
+    async def test_late_rows_do_not_overwrite_evicted_minute(self):
+        engine, session_factory = await make_session_factory()
+        buffer = AnalyticsBuffer(session_factory, max_batch=1000, flush_interval=60)
+        minute = datetime.utcnow().replace(second=0, microsecond=0)
+
+        for _ in range(5):
+            record(buffer, created_at=minute)
+        await buffer.flush()
+        # The minute leaves the retention window, then a straggler for it arrives
+        buffer.rollup_retention = timedelta(0)
+        record(buffer, created_at=minute)
+        assert await buffer.flush() == 1
+
+        async with session_factory() as db:
+            [rollup] = await AnalyticsRepository(db).get_rollups(minute)
+        raw = await count_rows(session_factory, QueryAnalytics)
+        await buffer.stop()
+        await engine.dispose()
+
+        assert raw == 6
+        assert rollup["count"] == 5
+
+    @pytest.mark.asyncio
+    async def test_rollups_from_several_workers_are_merged(self):
+        engine, session_factory = await make_session_factory()
+        minute = datetime.utcnow().replace(second=0, microsecond=0)
+
+        async with session_factory() as db:
+            for source, count, p95 in (("a:1", 10, 200), ("b:2", 5, 400)):
+                db.add(QueryRollup(minute=minute, intent="search_phones", source=source, count=count,
+                                   latency_sum_ms=count * 100, p95_ms=p95))
+            await db.commit()
+            [merged] = await AnalyticsRepository(db).get_rollups(minute)
+        await engine.dispose()
+
+        assert merged["count"] == 15
+        assert merged["latency_sum_ms"] == 1500
+        assert merged["p95_ms"] == 400
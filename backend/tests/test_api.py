@@ -1,5 +1,7 @@
 """Tests for API endpoints."""
 
+import json
+
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
@@ -116,6 +118,76 @@ class TestProductEndpoints:
             data = response.json()
             assert data["id"] == product_id
 
+    def test_conditional_get_returns_304(self, client):
+        """Catalog reads carry an ETag and honour If-None-Match."""
+        response = client.get("/api/v1/products", params={"limit": 5})
+        etag = response.headers["etag"]
+        assert "max-age" in response.headers["cache-control"]
+
+        cached = client.get("/api/v1/products", params={"limit": 5}, headers={"If-None-Match": f'"x", W/{etag}'})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["etag"] == etag
+
+        other = client.get("/api/v1/products", params={"limit": 6}, headers={"If-None-Match": etag})
+        assert other.status_code == 200
+        assert other.headers["etag"] != etag
+
+    def test_declared_category(self, client):
+        """Any category in CATEGORY_RULES is served; others are 404."""
+        response = client.get("/api/v1/products/category/battery", params={"limit": 5})
+        assert response.status_code == 200
+        for product in response.json()["products"]:
+            assert product["battery_mah"] >= 5000
+
+        assert client.get("/api/v1/products/category/unknown").status_code == 404
+
+    def test_facet_search(self, client):
+        """Faceted search returns results, a total and counts per facet."""
+        response = client.get("/api/v1/products/facets", params={"ram_gb": ["8", "12"], "limit": 5})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["count"] == len(data["products"]) <= 5
+        assert data["total"] >= data["count"]
+        assert set(data["facets"]) == {"brand", "price_band", "ram_gb", "refresh_rate", "features"}
+        for product in data["products"]:
+            assert product["ram_gb"] in (8, 12)
+
+    def test_cursor_pagination(self, client):
+        """Following next_cursor walks the catalog without repeats."""
+        first = client.get("/api/v1/products", params={"limit": 3}).json()
+        if first["next_cursor"] is None:
+            return
+        second = client.get("/api/v1/products", params={"limit": 3, "cursor": first["next_cursor"]}).json()
+
+        ids = [p["id"] for p in first["products"] + second["products"]]
+        assert len(ids) == len(set(ids))
+        prices = [p["price_inr"] for p in first["products"] + second["products"]]
+        assert prices == sorted(prices, reverse=True)
+
+        assert client.get("/api/v1/products", params={"cursor": "not a cursor"}).status_code == 400
+
+    def test_sparse_and_compact_fields(self, client):
+        """fields= narrows products and compact=true turns them into arrays under a fields header."""
+        full = client.get("/api/v1/products", params={"limit": 3}).json()
+        sparse = client.get("/api/v1/products", params={"limit": 3, "fields": "brand,price_inr"}).json()
+        compact = client.get("/api/v1/products/brand/Samsung", params={"fields": "model", "compact": "true"}).json()
+
+        assert sparse["products"] == [{k: p[k] for k in ("id", "brand", "price_inr")} for p in full["products"]]
+        assert sparse["next_cursor"] == full["next_cursor"]
+        assert compact["fields"] == ["id", "model"]
+        assert all(len(row) == 2 for row in compact["products"])
+        assert client.get("/api/v1/products", params={"fields": "brand,secret"}).status_code == 400
+
+    def test_export_ndjson(self, client):
+        """The export streams one product per line."""
+        response = client.get("/api/v1/products/export", params={"batch_size": 5})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        ids = [line["id"] for line in lines]
+        assert ids == sorted(ids)
+
     def test_get_product_not_found(self, client):
         """Test getting non-existent product."""
         response = client.get("/api/v1/products/999999")
@@ -190,3 +262,29 @@ class TestProductEndpoints:
         assert response.status_code == 200
         data = response.json()
         assert "products" in data
+
+
+class TestAnalyticsEndpoints:
+    """Tests for analytics endpoints."""
+
+    def test_latency_report(self, client):
+        """Test latency report shape."""
+        response = client.get("/api/v1/analytics/latency?hours=1")
+        assert response.status_code == 200
+        data = response.json()
+        assert "stages" in data
+        assert "intents" in data
+        assert set(data["total"]) == {"count", "p50", "p95", "p99"}
+
+
+class TestMetricsEndpoint:
+    """Tests for the Prometheus metrics endpoint."""
+
+    def test_metrics(self, client):
+        """Test metrics are exposed in Prometheus text format."""
+        client.get("/api/v1/products/category/flagship")
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert 'route="/api/v1/products/category/flagship"' in response.text
+        assert "# TYPE chat_requests_in_flight gauge" in response.text
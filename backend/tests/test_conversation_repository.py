@@ -0,0 +1,65 @@
+"""Tests for ConversationRepository turn persistence."""
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base
+from app.repositories import conversation_repository
+from app.repositories.conversation_repository import ConversationRepository
+
+
+async def make_session_factory():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine, sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+class TestAddTurn:
+    """Tests for ConversationRepository.add_turn()."""
+
+    @pytest.mark.asyncio
+    async def test_turns_are_persisted_in_order(self):
+        engine, session_factory = await make_session_factory()
+        async with session_factory() as db:
+            repo = ConversationRepository(db)
+            await repo.add_turn("turn-order", "hi", "hello!", user_metadata={"intent": "chitchat"})
+            await repo.add_turn("turn-order", "camera phone?", "Try the Pixel 8.")
+
+            history = await repo.get_conversation_history("turn-order")
+        await engine.dispose()
+
+        assert [m["role"] for m in history] == ["user", "assistant", "user", "assistant"]
+        assert [m["content"] for m in history] == ["hi", "hello!", "camera phone?", "Try the Pixel 8."]
+
+    @pytest.mark.asyncio
+    async def test_cached_conversation_id_saves_round_trips(self):
+        engine, session_factory = await make_session_factory()
+        statements = []
+        event.listen(engine.sync_engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement.split()[0]))
+
+        async with session_factory() as db:
+            repo = ConversationRepository(db)
+            await repo.add_turn("cached-id", "q1", "a1")
+            statements.clear()
+            await repo.add_turn("cached-id", "q2", "a2")
+        await engine.dispose()
+
+        assert statements == ["UPDATE", "INSERT"]
+
+    @pytest.mark.asyncio
+    async def test_stale_cached_id_is_not_reused(self):
+        # Same session id cached from another database whose conversation id is taken here
+        conversation_repository._cache_conversation_id("stale-id", 1)
+        engine, session_factory = await make_session_factory()
+        async with session_factory() as db:
+            repo = ConversationRepository(db)
+            await repo.add_turn("someone-else", "q", "a")  # gets conversation id 1
+            await repo.add_turn("stale-id", "mine", "reply")
+
+            assert [m["content"] for m in await repo.get_conversation_history("someone-else")] == ["q", "a"]
+            assert [m["content"] for m in await repo.get_conversation_history("stale-id")] == ["mine", "reply"]
+        await engine.dispose()
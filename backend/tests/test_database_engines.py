@@ -0,0 +1,72 @@
+"""Tests for the SQLite engine profile."""
+
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.models.database import Base, create_engines
+
+
+async def make_engines(tmp_path, profile="wal"):
+    writer, reader = create_engines(f"sqlite+aiosqlite:///{tmp_path}/engines.db", profile=profile,
+                                    busy_timeout_ms=200, write_timeout=1.0)
+    async with writer.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return writer, reader
+
+
+class TestCreateEngines:
+    """Tests for create_engines()."""
+
+    @pytest.mark.asyncio
+    async def test_wal_profile_splits_reader_and_writer(self, tmp_path):
+        writer, reader = await make_engines(tmp_path)
+        async with writer.connect() as conn:
+            journal_mode = (await conn.execute(text("PRAGMA journal_mode"))).scalar_one()
+            busy_timeout = (await conn.execute(text("PRAGMA busy_timeout"))).scalar_one()
+        async with reader.connect() as conn:
+            query_only = (await conn.execute(text("PRAGMA query_only"))).scalar_one()
+        await writer.dispose()
+        await reader.dispose()
+
+        assert reader is not writer
+        assert journal_mode == "wal"
+        assert busy_timeout == 200
+        assert query_only == 1
+        assert writer.pool.size() == 1
+
+    @pytest.mark.asyncio
+    async def test_reader_rejects_writes(self, tmp_path):
+        writer, reader = await make_engines(tmp_path)
+        with pytest.raises(OperationalError):
+            async with reader.begin() as conn:
+                await conn.execute(text("INSERT INTO conversations (session_id) VALUES ('x')"))
+        await writer.dispose()
+        await reader.dispose()
+
+    @pytest.mark.asyncio
+    async def test_reads_do_not_wait_for_open_write_transaction(self, tmp_path):
+        writer, reader = await make_engines(tmp_path)
+        async with writer.connect() as write_conn:
+            # Without WAL an exclusive write transaction locks out every reader
+            await write_conn.execute(text("BEGIN EXCLUSIVE"))
+            await write_conn.execute(text("INSERT INTO conversations (session_id) VALUES ('pending')"))
+
+            async with reader.connect() as read_conn:
+                count = await asyncio.wait_for(
+                    read_conn.execute(text("SELECT COUNT(*) FROM conversations")), timeout=1.0
+                )
+                assert count.scalar_one() == 0
+
+            await write_conn.execute(text("COMMIT"))
+        await writer.dispose()
+        await reader.dispose()
+
+    def test_memory_and_default_profile_share_one_engine(self, tmp_path):
+        writer, reader = create_engines("sqlite+aiosqlite://")
+        assert writer is reader
+
+        writer, reader = create_engines(f"sqlite+aiosqlite:///{tmp_path}/plain.db", profile="default")
+        assert writer is reader
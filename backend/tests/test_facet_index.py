@@ -0,0 +1,95 @@
+"""Tests for the facet bitmap index and faceted search."""
+
+import pytest
+
+from app.repositories.facet_index import FacetIndex, price_band
+from app.repositories.phone_repository import PhoneRepository
+from app.repositories.result_cache import PhoneResultCache
+from tests.test_phone_repository import PHONES, seeded_repo_factory
+
+
+class Row:
+    def __init__(self, id, brand, price_inr, ram_gb=None, refresh_rate=None, features=None):
+        self.id, self.brand, self.price_inr = id, brand, price_inr
+        self.ram_gb, self.refresh_rate, self.features = ram_gb, refresh_rate, features
+
+
+ROWS = [
+    Row(1, "Samsung", 90000, 12, 120, '["5G", "IP68 rating"]'),
+    Row(2, "Samsung", 25000, 8, 120, '["5G"]'),
+    Row(3, "Xiaomi", 20000, 8, 90, '["5G", "IR blaster"]'),
+    Row(4, "Apple", 70000, 8, 60, '["IP68 rating"]'),
+    Row(5, "xiaomi ", 12000, 6, None, None),
+]
+
+
+def facet_counts(result, name):
+    return {item["value"]: item["count"] for item in result.facets[name]}
+
+
+class TestFacetIndex:
+    """Tests for FacetIndex.search()."""
+
+    def test_filters_and_orders_by_price(self):
+        index = FacetIndex().rebuild(1, ROWS)
+        result = index.search({"brand": ["samsung", "XIAOMI"], "ram_gb": ["8"]})
+
+        assert result.ids == [2, 3]
+        assert result.total == 2
+
+    def test_counts_apply_every_other_facet(self):
+        index = FacetIndex().rebuild(1, ROWS)
+        result = index.search({"brand": ["Samsung"], "features": ["5g"]})
+
+        assert result.ids == [1, 2]
+        # Brand counts ignore the brand selection but keep the feature one
+        assert facet_counts(result, "brand") == {"Samsung": 2, "Xiaomi": 1}
+        assert facet_counts(result, "features") == {"5G": 2, "IP68 rating": 1}
+        assert facet_counts(result, "price_band") == {"80k-plus": 1, "15k-30k": 1}
+
+    def test_features_must_all_match(self):
+        index = FacetIndex().rebuild(1, ROWS)
+
+        assert index.search({"features": ["5G", "IP68 rating"]}).ids == [1]
+        assert index.search({"features": ["5G", "no such feature"]}).total == 0
+        assert index.search({"brand": ["Nokia"]}).total == 0
+
+    def test_pagination_and_no_selection(self):
+        index = FacetIndex().rebuild(1, ROWS)
+        result = index.search({}, limit=2, offset=1)
+
+        assert result.ids == [4, 2]
+        assert result.total == len(ROWS)
+        assert facet_counts(result, "ram_gb") == {"8": 3, "12": 1, "6": 1}
+
+    def test_rebuild_adopts_any_version(self):
+        index = FacetIndex()
+        assert index.rebuild(5, ROWS) is index
+        assert index.rebuild(4, ROWS[:1]) is index
+
+        assert not index.is_current(5)
+        assert index.version == 4 and len(index) == 1
+
+    def test_price_bands(self):
+        assert [price_band(p) for p in (0, 14999, 15000, 79999, 80000, None)] == [
+            "under-15k", "under-15k", "15k-30k", "50k-80k", "80k-plus", None
+        ]
+
+
+class TestFacetSearch:
+    """Tests for PhoneRepository.facet_search() and count()."""
+
+    @pytest.mark.asyncio
+    async def test_matches_python_reference(self):
+        engine, session_factory = await seeded_repo_factory()
+        async with session_factory() as db:
+            repo = PhoneRepository(db, result_cache=PhoneResultCache(max_entries=0), facet_index=FacetIndex())
+            phones, found = await repo.facet_search({"ram_gb": ["8", "12"], "features": ["5G"]}, limit=100)
+            count = await repo.count()
+        await engine.dispose()
+
+        expected = [p for p in PHONES if p.get("ram_gb") in (8, 12) and "5G" in (p.get("features") or [])]
+        assert sorted(p.model for p in phones) == sorted(p["model"] for p in expected)
+        assert found.total == len(expected)
+        assert [p.price_inr for p in phones] == sorted((p.price_inr for p in phones), reverse=True)
+        assert count == len(PHONES)
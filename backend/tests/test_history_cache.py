@@ -0,0 +1,144 @@
+"""Tests for the per-session history cache."""
+
+import pytest
+from sqlalchemy import event
+
+from app.repositories.conversation_repository import ConversationRepository
+from app.repositories.history_cache import SessionHistoryCache
+from tests.test_conversation_repository import make_session_factory
+
+
+def turn(i):
+    return [{"role": "user", "content": f"q{i}"}, {"role": "assistant", "content": f"a{i}"}]
+
+
+class TestSessionHistoryCache:
+    """Tests for SessionHistoryCache bounds and expiry."""
+
+    def test_keeps_only_last_messages(self):
+        cache = SessionHistoryCache(max_messages=4)
+        cache.put("s", [])
+        for i in range(5):
+            cache.append("s", turn(i))
+
+        assert [m["content"] for m in cache.get("s")] == ["q3", "a3", "q4", "a4"]
+        assert [m["content"] for m in cache.get("s", limit=1)] == ["a4"]
+        assert cache.total_chars == 8
+
+    def test_append_does_not_populate_uncached_sessions(self):
+        cache = SessionHistoryCache()
+        cache.append("s", turn(0))
+
+        assert cache.get("s") is None
+        assert len(cache) == 0
+
+    def test_limit_beyond_window_is_a_miss(self):
+        cache = SessionHistoryCache(max_messages=4)
+        cache.put("s", turn(0))
+
+        assert cache.get("s", limit=6) is None
+
+    def test_entries_expire_after_ttl(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr("app.repositories.history_cache.time.monotonic", lambda: now[0])
+        cache = SessionHistoryCache(ttl=60)
+        cache.put("s", turn(0))
+
+        now[0] += 59
+        assert cache.get("s") is not None
+        now[0] += 2
+        assert cache.get("s") is None
+        assert cache.total_chars == 0
+
+    def test_evicts_least_recently_used_sessions(self):
+        cache = SessionHistoryCache(max_sessions=2)
+        cache.put("a", turn(0))
+        cache.put("b", turn(0))
+        cache.get("a")
+        cache.put("c", turn(0))
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+
+    def test_character_cap_bounds_memory(self):
+        cache = SessionHistoryCache(max_chars=100)
+        cache.put("old", [{"role": "user", "content": "x" * 60}])
+        cache.put("new", [{"role": "user", "content": "y" * 60}])
+
+        assert cache.get("old") is None
+        assert cache.total_chars == 60
+
+    def test_returns_copies(self):
+        cache = SessionHistoryCache()
+        cache.put("s", turn(0))
+        cache.get("s")[0]["content"] = "changed"
+
+        assert cache.get("s")[0]["content"] == "q0"
+
+
+class TestRepositoryIntegration:
+    """ConversationRepository reads history through the cache."""
+
+    @pytest.mark.asyncio
+    async def test_active_session_history_skips_database(self):
+        engine, session_factory = await make_session_factory()
+        statements = []
+        event.listen(engine.sync_engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement.split()[0]))
+
+        async with session_factory() as db:
+            repo = ConversationRepository(db, history_cache=SessionHistoryCache())
+            assert await repo.get_conversation_history("active") == []
+            await repo.add_turn("active", "q1", "a1")
+            statements.clear()
+
+            history = await repo.get_conversation_history("active")
+            await repo.add_turn("active", "q2", "a2")
+            history_after = await repo.get_conversation_history("active")
+        await engine.dispose()
+
+        assert [m["content"] for m in history] == ["q1", "a1"]
+        assert [m["content"] for m in history_after] == ["q1", "a1", "q2", "a2"]
+        assert "SELECT" not in statements
+
+    @pytest.mark.asyncio
+    async def test_zero_messages_disables_cache(self):
+        engine, session_factory = await make_session_factory()
+        cache = SessionHistoryCache(max_messages=0)
+        async with session_factory() as db:
+            repo = ConversationRepository(db, history_cache=cache)
+            assert await repo.get_conversation_history("off") == []
+            await repo.add_turn("off", "q1", "a1")
+            history = await repo.get_conversation_history("off")
+        await engine.dispose()
+
+        assert [m["content"] for m in history] == ["q1", "a1"]
+        assert len(cache) == 0 and cache.total_chars == 0
+
+    @pytest.mark.asyncio
+    async def test_miss_loads_from_database(self):
+        engine, session_factory = await make_session_factory()
+        async with session_factory() as db:
+            await ConversationRepository(db, history_cache=SessionHistoryCache()).add_turn("cold", "q1", "a1")
+
+            cache = SessionHistoryCache()
+            history = await ConversationRepository(db, history_cache=cache).get_conversation_history("cold")
+        await engine.dispose()
+
+        assert [m["content"] for m in history] == ["q1", "a1"]
+        assert [m["content"] for m in cache.get("cold")] == ["q1", "a1"]
+
+    @pytest.mark.asyncio
+    async def test_clear_conversation_invalidates(self):
+        engine, session_factory = await make_session_factory()
+        cache = SessionHistoryCache()
+        async with session_factory() as db:
+            repo = ConversationRepository(db, history_cache=cache)
+            await repo.get_conversation_history("cleared")
+            await repo.add_turn("cleared", "q1", "a1")
+            await repo.clear_conversation("cleared")
+
+            assert cache.get("cleared") is None
+            assert await repo.get_conversation_history("cleared") == []
+        await engine.dispose()
@@ -1,7 +1,9 @@
 """Tests for the intent classifier."""
 
 import pytest
+import numpy as np
 from app.core.intent_classifier import IntentClassifier, get_intent_classifier
+from app.core.intent_prototypes import IntentPrototypes
 
 
 class TestIntentClassifier:
@@ -136,6 +138,88 @@ class TestIntentClassifier:
         assert result["confidence"] < 0.8
 
 
+class StubEmbeddingService:
+    """Deterministic bag-of-words embeddings for prototype tests."""
+
+    VOCAB = ["compare", "vs", "explain", "what", "hello", "thanks", "phone", "camera"]
+
+    def encode(self, text):
+        words = text.lower().replace("?", "").split()
+        return np.array([float(words.count(w)) for w in self.VOCAB], dtype=np.float32)
+
+    def encode_batch(self, texts):
+        return np.vstack([self.encode(t) for t in texts])
+
+
+class TestIntentPrototypes:
+    """Tests for embedding-prototype intent routing."""
+
+    @pytest.fixture
+    def embedder(self):
+        return StubEmbeddingService()
+
+    @pytest.fixture
+    def prototypes(self, embedder):
+        examples = {
+            "compare_phones": ["compare phone vs phone", "compare camera"],
+            "explain_feature": ["explain camera", "what camera"],
+            "chitchat": ["hello", "thanks"],
+        }
+        return IntentPrototypes.from_examples(examples, embedder)
+
+    def test_prototype_overrides_keyword_false_positive(self, embedder, prototypes):
+        """'ok' and 'okay' both hit chitchat keywords; the prototype should win."""
+        classifier = IntentClassifier(prototypes=prototypes)
+        query = "okay explain camera"
+        assert IntentClassifier().classify(query)["intent"] == "chitchat"
+
+        result = classifier.classify(query, embedding=embedder.encode(query))
+        assert result["intent"] == "explain_feature"
+        assert 0.5 <= result["confidence"] <= 0.95
+
+    def test_falls_back_to_keywords_without_embedding(self, prototypes):
+        classifier = IntentClassifier(prototypes=prototypes)
+        assert classifier.classify("Hello")["intent"] == "chitchat"
+
+    def test_falls_back_below_threshold(self, embedder, prototypes):
+        classifier = IntentClassifier(prototypes=prototypes, prototype_threshold=0.99)
+        query = "okay explain camera"
+        result = classifier.classify(query, embedding=embedder.encode(query))
+        assert result["intent"] == "chitchat"
+
+    def test_dimension_mismatch_falls_back(self, prototypes):
+        classifier = IntentClassifier(prototypes=prototypes)
+        result = classifier.classify("Hello", embedding=np.ones(3))
+        assert result["intent"] == "chitchat"
+
+    def test_price_rule_still_applies(self, embedder, prototypes):
+        classifier = IntentClassifier(prototypes=prototypes)
+        query = "what camera phone under 20000"
+        result = classifier.classify(query, embedding=embedder.encode(query))
+        assert result["intent"] == "budget_search"
+        assert result["extracted_params"]["price_max"] == 20000
+
+    def test_hot_swap(self, embedder, prototypes):
+        classifier = IntentClassifier()
+        query = "explain camera"
+        assert not classifier.has_prototypes
+
+        classifier.set_prototypes(prototypes)
+        assert classifier.classify(query, embedding=embedder.encode(query))["intent"] == "explain_feature"
+
+        classifier.set_prototypes(None)
+        assert not classifier.has_prototypes
+
+    def test_save_and_load(self, tmp_path, prototypes):
+        path = tmp_path / "prototypes.npz"
+        prototypes.save(str(path))
+
+        loaded = IntentPrototypes.load(str(path))
+        assert loaded.intents == prototypes.intents
+        assert loaded.version == prototypes.version
+        assert np.allclose(loaded.centroids, prototypes.centroids)
+
+
 class TestIntentClassifierSingleton:
     """Test intent classifier singleton."""
 
@@ -0,0 +1,82 @@
+"""Tests for the structured logging layer."""
+
+import logging
+import queue
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.middleware import RequestContextMiddleware
+from app.observability.logs import (
+    DeferredQueueHandler,
+    RequestContextFilter,
+    begin_request,
+    end_request,
+    request_id_var
+)
+
+
+def make_record(level: int, msg: str, args) -> logging.LogRecord:
+    return logging.LogRecord("app.test", level, __file__, 1, msg, args, None)
+
+
+class TestQueueLogging:
+    """Tests for the queue handler and context filter."""
+
+    def test_immutable_args_are_formatted_later(self):
+        log_queue = queue.SimpleQueue()
+        handler = DeferredQueueHandler(log_queue)
+
+        handler.handle(make_record(logging.INFO, "intent=%s took %dms", ("search_phones", 12)))
+        record = log_queue.get_nowait()
+        assert record.msg == "intent=%s took %dms"
+        assert record.getMessage() == "intent=search_phones took 12ms"
+
+    def test_mutable_args_are_rendered_at_call_time(self):
+        log_queue = queue.SimpleQueue()
+        handler = DeferredQueueHandler(log_queue)
+        params = {"brand": "Samsung"}
+
+        handler.handle(make_record(logging.INFO, "params=%s", (params,)))
+        params["brand"] = "Google"
+        assert log_queue.get_nowait().getMessage() == "params={'brand': 'Samsung'}"
+
+    def test_filter_stamps_request_id_and_samples_debug(self):
+        log_filter = RequestContextFilter()
+
+        tokens = begin_request("abc123", trace_sample_rate=0.0)
+        try:
+            info = make_record(logging.INFO, "kept", None)
+            assert log_filter.filter(info)
+            assert info.request_id == "abc123"
+            assert not log_filter.filter(make_record(logging.DEBUG, "dropped", None))
+        finally:
+            end_request(tokens)
+
+        assert request_id_var.get() == "-"
+        assert log_filter.filter(make_record(logging.DEBUG, "outside a request", None))
+
+
+class TestRequestContextMiddleware:
+    """Tests for RequestContextMiddleware."""
+
+    def make_client(self) -> TestClient:
+        app = FastAPI()
+
+        @app.get("/whoami")
+        async def whoami():
+            return {"request_id": request_id_var.get()}
+
+        app.add_middleware(RequestContextMiddleware)
+        return TestClient(app)
+
+    def test_incoming_id_is_propagated(self):
+        response = self.make_client().get("/whoami", headers={"X-Request-ID": "req-42"})
+        assert response.json()["request_id"] == "req-42"
+        assert response.headers["x-request-id"] == "req-42"
+
+    def test_invalid_id_is_replaced(self):
+        response = self.make_client().get("/whoami", headers={"X-Request-ID": "bad id\nwith newline"})
+        request_id = response.json()["request_id"]
+        assert request_id != "-" and " " not in request_id
+        assert response.headers["x-request-id"] == request_id
@@ -0,0 +1,141 @@
+"""Tests for event loop lag monitoring and blocking-call detection."""
+
+import asyncio
+import json
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.agent import ShoppingAgent
+from app.core.intent_classifier import IntentClassifier
+from app.core.intent_prototypes import IntentPrototypes
+from app.core.response_generator import ResponseGenerator
+from app.models.database import Base
+from app.observability.loop_monitor import LoopLagMonitor
+from app.repositories.phone_repository import PhoneRepository
+from app.services.analytics_buffer import AnalyticsBuffer
+from app.services.huggingface_service import HuggingFaceService
+
+# Longest a single chat-path stage may hold the event loop
+MAX_BLOCK_MS = 75
+# How long each stub backend call takes, synchronously
+BACKEND_LATENCY = 0.15
+
+
+def blocking_stage():
+    time.sleep(0.2)
+
+
+class TestLoopLagMonitor:
+    """Tests for LoopLagMonitor."""
+
+    @pytest.mark.asyncio
+    async def test_detects_blocking_call_and_captures_stack(self):
+        monitor = LoopLagMonitor(interval=0.01, block_threshold=0.05, on_block=lambda stalled, stack: None)
+        monitor.start()
+        await asyncio.sleep(0.03)
+
+        blocking_stage()
+        await asyncio.sleep(0.03)
+        await monitor.stop()
+
+        assert monitor.max_lag >= 0.15
+        assert len(monitor.blocked_stacks) == 1
+        assert "blocking_stage" in monitor.blocked_stacks[0]
+
+
+    @pytest.mark.asyncio
+    async def test_detects_every_block_at_production_interval(self):
+        # Blocks shorter than the sampling interval, at arbitrary points in it
+        monitor = LoopLagMonitor(interval=0.5, block_threshold=0.1, on_block=lambda stalled, stack: None)
+        monitor.start()
+        for pause in (0.05, 0.2, 0.35, 0.12, 0.27, 0.44):
+            await asyncio.sleep(pause)
+            blocking_stage()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+        assert len(monitor.blocked_stacks) == 6
+        assert all("blocking_stage" in stack for stack in monitor.blocked_stacks)
+
+
+class StubChatClient:
+    """Synchronous, slow stand-in for the HF InferenceClient."""
+
+    def chat_completion(self, messages, max_tokens, temperature):
+        time.sleep(BACKEND_LATENCY)
+        prompt = messages[-1]["content"]
+        content = '{"features": [], "price_max": null}' if "Extract JSON" in prompt else "Here are some phones."
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+
+class SlowEmbeddingService:
+    """Synchronous, slow bag-of-words embedder."""
+
+    VOCAB = ["compare", "camera", "phone", "hello"]
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text):
+        self.calls += 1
+        time.sleep(BACKEND_LATENCY)
+        words = text.lower().split()
+        return np.array([float(words.count(w)) + 0.1 for w in self.VOCAB], dtype=np.float32)
+
+
+class TestChatPathDoesNotBlock:
+    """The chat path must keep slow backends off the event loop."""
+
+    @pytest.mark.asyncio
+    async def test_no_stage_blocks_the_loop(self):
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        phones = json.loads((Path(__file__).parent.parent / "app" / "data" / "phones.json").read_text())
+        llm_service = HuggingFaceService()
+        llm_service.client = StubChatClient()
+        llm_service._initialized = True
+        embedder = SlowEmbeddingService()
+        prototypes = IntentPrototypes(["search_phones", "compare_phones"], np.eye(2, len(embedder.VOCAB), k=1))
+
+        session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        analytics = AnalyticsBuffer(session_factory)
+
+        async with session_factory() as db:
+            repo = PhoneRepository(db)
+            for phone in phones[:15]:
+                await repo.create({k: v for k, v in phone.items() if k != "id"})
+
+            agent = ShoppingAgent(
+                db,
+                intent_classifier=IntentClassifier(prototypes=prototypes),
+                response_generator=ResponseGenerator(llm_service=llm_service),
+                llm_service=llm_service,
+                embedding_service=embedder,
+                analytics=analytics
+            )
+            # Warm up lazy imports and statement compilation
+            await agent.process_message("best camera phone", "warmup")
+
+            monitor = LoopLagMonitor(interval=0.005)
+            monitor.start()
+            for message in ["best camera phone under 40000", "compare Galaxy S24 vs Pixel 8", "Samsung phones"]:
+                response = await agent.process_message(message, "session-1")
+                assert response.response
+            await monitor.stop()
+
+            # A cached intent verdict skips the embedding model entirely
+            calls = embedder.calls
+            await agent.process_message("best camera phone", "session-2")
+            assert embedder.calls == calls
+
+        await analytics.stop()
+        await engine.dispose()
+        assert monitor.max_lag * 1000 < MAX_BLOCK_MS
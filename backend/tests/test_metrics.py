@@ -0,0 +1,85 @@
+"""Tests for the in-process metrics registry."""
+
+import json
+import os
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.observability.metrics import DB_QUERY_DURATION, MetricsRegistry, instrument_engine
+
+
+def make_registry(multiproc_dir=None):
+    registry = MetricsRegistry(multiproc_dir)
+    requests = registry.counter("requests_total", "Requests.", ("route",))
+    latency = registry.histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    in_flight = registry.gauge("in_flight", "In flight.")
+    lag = registry.gauge("lag_seconds", "Lag.", multiprocess_mode="max")
+    return registry, requests, latency, in_flight, lag
+
+
+class TestMetricsRegistry:
+    """Tests for MetricsRegistry rendering and merging."""
+
+    def test_render_prometheus_text(self):
+        registry, requests, latency, in_flight, _ = make_registry()
+        requests.inc("/a")
+        requests.inc("/a", amount=2)
+        latency.observe("/a", value=0.05)
+        latency.observe("/a", value=0.5)
+        latency.observe("/a", value=5)
+        with in_flight.track_inprogress():
+            assert in_flight.value() == 1
+
+        text = registry.render()
+        assert '# TYPE latency_seconds histogram' in text
+        assert 'requests_total{route="/a"} 3' in text
+        assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{route="/a",le="1.0"} 2' in text
+        assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in text
+        assert 'latency_seconds_count{route="/a"} 3' in text
+        assert "in_flight 0" in text
+
+    def test_merges_worker_snapshots(self, tmp_path):
+        registry, requests, latency, in_flight, lag = make_registry(str(tmp_path))
+        requests.inc("/a")
+        latency.observe("/a", value=0.05)
+        in_flight.inc()
+        lag.set(value=0.2)
+
+        # A live sibling worker (our parent process stands in for it) ...
+        sibling = {
+            "requests_total": {"/a": 4},
+            "latency_seconds": {"/a": [0, 2, 0, 1.0]},
+            "in_flight": {"": 2},
+            "lag_seconds": {"": 0.7},
+        }
+        (tmp_path / f"{os.getppid()}.json").write_text(json.dumps(sibling))
+        # ... and a worker that has exited: its counters still count, its gauges do not
+        (tmp_path / "999999999.json").write_text(json.dumps({"requests_total": {"/a": 10}, "in_flight": {"": 5}}))
+
+        text = registry.render()
+        assert 'requests_total{route="/a"} 15' in text
+        assert 'latency_seconds_count{route="/a"} 3' in text
+        assert "in_flight 3" in text
+        assert "lag_seconds 0.7" in text
+        assert (tmp_path / f"{os.getpid()}.json").exists()
+
+
+class TestInstrumentEngine:
+    """Tests for SQL statement timing."""
+
+    def test_failed_statement_does_not_skew_later_timings(self):
+        engine = create_engine("sqlite://")
+        instrument_engine(engine)
+        before = DB_QUERY_DURATION.count("SELECT")
+        with engine.connect() as conn:
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM missing"))
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+            assert "query_start" not in conn.info
+        engine.dispose()
+
+        assert DB_QUERY_DURATION.count("SELECT") == before + 2
@@ -0,0 +1,279 @@
+"""Tests for PhoneRepository queries, the PhoneRecord read model, the result cache and categories."""
+
+import json
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event, update
+
+from app.models.database import CATALOG_STATE_ID, CatalogState, Phone
+from app.models.records import PhoneRecord
+from app.repositories import phone_repository
+from app.repositories.category_index import CategoryIndex, CategoryRule
+from app.repositories.phone_repository import PhoneRepository
+from app.repositories.result_cache import PhoneResultCache
+from app.services.product_service import ProductService
+from tests.test_conversation_repository import make_session_factory
+
+PHONES = json.loads((Path(__file__).parent.parent / "app" / "data" / "phones.json").read_text())
+
+
+async def seeded_repo_factory():
+    engine, session_factory = await make_session_factory()
+    async with session_factory() as db:
+        await PhoneRepository(db).bulk_create([{k: v for k, v in p.items() if k != "id"} for p in PHONES])
+    return engine, session_factory
+
+
+class TestSearch:
+    """search() binds only the filters in use to a prebuilt statement."""
+
+    @pytest.mark.asyncio
+    async def test_filters_match_python_reference(self):
+        engine, session_factory = await seeded_repo_factory()
+        async with session_factory() as db:
+            repo = PhoneRepository(db)
+            found = await repo.search(min_price=15000, max_price=40000, min_ram=8, limit=50)
+            unfiltered = await repo.search(limit=50)
+        await engine.dispose()
+
+        expected = {p["model"] for p in PHONES if 15000 <= p["price_inr"] <= 40000 and (p.get("ram_gb") or 0) >= 8}
+        assert {p.model for p in found} == expected
+        assert [p.price_inr for p in found] == sorted((p.price_inr for p in found), reverse=True)
+        assert len(unfiltered) == len(PHONES)
+
+    @pytest.mark.asyncio
+    async def test_statement_is_reused_per_filter_combination(self):
+        phone_repository._search_statement.cache_clear()
+        engine, session_factory = await seeded_repo_factory()
+        async with session_factory() as db:
+            repo = PhoneRepository(db)
+            await repo.search(min_price=10000, max_price=20000)
+            await repo.search(min_price=20000, max_price=60000)
+            await repo.search(brand="Samsung")
+        await engine.dispose()
+
+        info = phone_repository._search_statement.cache_info()
+        assert (info.hits, info.misses) == (1, 2)
+
+    @pytest.mark.asyncio
+    async def test_brand_is_exact_and_case_insensitive_with_substring_fallback(self):
+        engine, session_factory = await seeded_repo_factory()
+        async with session_factory() as db:
+            repo = PhoneRepository(db)
+            exact = await repo.get_by_brand("SAMSUNG")
+            partial = await repo.get_by_brand("sams")
+            searched = await repo.search(brand="oneplus")
+        await engine.dispose()
+
+        samsung_count = sum(1 for p in PHONES if p["brand"] == "Samsung")
+        assert len(exact) == min(samsung_count, 10) and {p.brand for p in exact} == {"Samsung"}
+        assert [p.id for p in partial] == [p.id for p in exact]
+        assert searched and {p.brand for p in searched} == {"OnePlus"}
+
+
+class TestPhoneRecord:
+    """Lookups return slotted records with JSON columns decoded."""
+
+    @pytest.mark.asyncio
+    async def test_lookups_return_records(self):
+        engine, session_factory = await seeded_repo_factory()
+        async with session_factory() as db:
+            record = await PhoneRepository(db).get_by_id(1)
+            orm_phone = await db.get(Phone, 1)
+        await engine.dispose()
+
+        assert isinstance(record, PhoneRecord)
+        assert not hasattr(record, "__dict__")
+        assert record.features == PHONES[0]["features"]
+        assert record.colors == PHONES[0]["colors"]
+
+        service = ProductService()
+        assert service.build_phone_response(record) == service.build_phone_response(orm_phone)
+
+    def test_undecodable_json_becomes_empty_list(self):
+        values = [None] * len(PhoneRecord.__slots__)
+        values[PhoneRecord.__slots__.index("features")] = "not json"
+        record = PhoneRecord(*values)
+
+        assert record.features == []
+        assert record.colors is None
+
+
+class TestResultCache:
+    """Lookups are cached per catalog version as ID lists."""
+
+    @pytest.mark.asyncio
+    async def test_repeated_lookups_skip_the_database(self):
+        engine, session_factory = await seeded_repo_factory()
+        statements = []
+        event.listen(engine.sync_engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+        cache = PhoneResultCache()
+        async with session_factory() as db:
+            first = await PhoneRepository(db, result_cache=cache).get_by_price_range(0, 30000)
+            repo = PhoneRepository(db, result_cache=cache)
+            second = await repo.get_by_price_range(0, 30000)
+            by_brand = [await repo.get_by_brand(brand) for brand in ("Samsung", " samsung ")]
+            by_id = await repo.get_by_id(first[0].id)
+        await engine.dispose()
+
+        assert [p.id for p in second] == [p.id for p in first] and second is not first
+        assert by_brand[0] == by_brand[1]
+        assert by_id is first[0]
+        # Catalog version once per repository, then the two distinct queries
+        assert len(statements) == 4
+        assert cache.stats()["hits"] == 3
+
+    @pytest.mark.asyncio
+    async def test_catalog_change_invalidates(self):
+        engine, session_factory = await seeded_repo_factory()
+        cache = PhoneResultCache()
+        async with session_factory() as db:
+            before = await PhoneRepository(db, result_cache=cache).get_gaming_phones(limit=50)
+            await db.execute(update(Phone).where(Phone.id == before[0].id).values(refresh_rate=60))
+            await db.commit()
+            after = await PhoneRepository(db, result_cache=cache).get_gaming_phones(limit=50)
+        await engine.dispose()
+
+        assert before[0].id not in {p.id for p in after}
+        assert len(after) == len(before) - 1
+
+    def test_any_other_version_resets(self):
+        cache = PhoneResultCache()
+        record = PhoneRecord(*[1] + [None] * (len(PhoneRecord.__slots__) - 1))
+        cache.put(5, "key", [record])
+        assert cache.get(4, "key") is None and cache.version == 5
+
+        cache.put(4, "restored", [record])
+        assert cache.get(5, "key") is None
+        assert cache.get(4, "restored") == [record]
+
+    @pytest.mark.asyncio
+    async def test_lower_version_after_restore_invalidates(self):
+        engine, session_factory = await seeded_repo_factory()
+        cache, index = PhoneResultCache(), CategoryIndex()
+        async with session_factory() as db:
+            before = await PhoneRepository(db, result_cache=cache, category_index=index).get_gaming_phones(limit=50)
+            version = cache.version
+            # A restored database: different contents at a lower version
+            await db.execute(update(Phone).where(Phone.id == before[0].id).values(refresh_rate=60))
+            await db.execute(update(CatalogState).where(CatalogState.id == CATALOG_STATE_ID).values(version=version - 10))
+            await db.commit()
+            after = await PhoneRepository(db, result_cache=cache, category_index=index).get_gaming_phones(limit=50)
+        await engine.dispose()
+
+        assert before[0].id not in {p.id for p in after}
+        assert cache.version == index.version == version - 10
+
+    def test_lru_bound(self):
+        cache = PhoneResultCache(max_entries=2)
+        for key in ("a", "b", "c"):
+            cache.put(1, key, [])
+
+        assert len(cache) == 2
+        assert cache.get(1, "a") is None and cache.get(1, "c") == []
+
+
+class TestCategories:
+    """Category lookups are served from members materialized per catalog version."""
+
+    @pytest.mark.asyncio
+    async def test_members_follow_rules(self):
+        engine, session_factory = await seeded_repo_factory()
+        index = CategoryIndex()
+        async with session_factory() as db:
+            repo = PhoneRepository(db, result_cache=PhoneResultCache(max_entries=0), category_index=index)
+            camera = await repo.get_camera_phones(limit=100)
+            gaming = await repo.get_gaming_phones(limit=100)
+            budget = await repo.get_budget_phones(limit=100)
+        await engine.dispose()
+
+        terms = ("camera", "photo", "leica", "zeiss", "hasselblad")
+        assert {p.model for p in camera} == {
+            p["model"] for p in PHONES if any(t in (p.get("highlights") or "").lower() for t in terms)
+        }
+        assert {p.model for p in gaming} == {
+            p["model"] for p in PHONES if (p.get("refresh_rate") or 0) >= 120 and (p.get("ram_gb") or 0) >= 8
+        }
+        assert [p.refresh_rate for p in gaming] == sorted((p.refresh_rate for p in gaming), reverse=True)
+        assert {p.model for p in budget} == {p["model"] for p in PHONES if p["price_inr"] <= 20000}
+        assert index.rebuilds == 1
+
+    @pytest.mark.asyncio
+    async def test_rebuilt_after_catalog_change(self):
+        engine, session_factory = await seeded_repo_factory()
+        index = CategoryIndex()
+        async with session_factory() as db:
+            before = await PhoneRepository(db, category_index=index).get_category("battery", limit=100)
+            brick = {"brand": "Test", "model": "Brick", "price_inr": 9999, "battery_mah": 20000}
+            await PhoneRepository(db).create(brick)
+            after = await PhoneRepository(db, category_index=index).get_category("battery", limit=100)
+            with pytest.raises(ValueError):
+                await PhoneRepository(db, category_index=index).get_category("nonexistent")
+        await engine.dispose()
+
+        assert after[0].model == "Brick"
+        assert [p.id for p in after[1:]] == [p.id for p in before]
+        assert index.rebuilds == 2
+
+    def test_declarative_rule(self):
+        rule = CategoryRule(rank_by="ram_gb", at_least={"ram_gb": 12}, text_contains={"processor": ["Snapdragon"]})
+        phone = lambda i, ram, processor: type("P", (), {"id": i, "ram_gb": ram, "processor": processor})()
+        phones = [
+            phone(1, 12, "snapdragon 8"), phone(2, 16, "Snapdragon 8"), phone(3, 16, "Dimensity"),
+            phone(4, None, "Snapdragon"),
+        ]
+
+        assert rule.rank(phones) == (2, 1)
+        assert rule.columns == {"ram_gb", "processor"}
+
+
+class TestKeysetPagination:
+    """search(after=...) pages on (price_inr, id) and stream_all() exports everything."""
+
+    @pytest.mark.asyncio
+    async def test_pages_cover_catalog_once_despite_inserts(self):
+        engine, session_factory = await seeded_repo_factory()
+        async with session_factory() as db:
+            seen, after = [], None
+            while True:
+                page = await PhoneRepository(db).search(limit=7, after=after)
+                seen.extend(page)
+                if len(page) < 7:
+                    break
+                after = (page[-1].price_inr, page[-1].id)
+                if len(seen) == 7:
+                    # A phone sorting before the cursor must not shift later pages
+                    await PhoneRepository(db).create({"brand": "Test", "model": "Top", "price_inr": 10 ** 7})
+        await engine.dispose()
+
+        assert len(seen) == len({p.id for p in seen}) == len(PHONES)
+        keys = [(p.price_inr, p.id) for p in seen]
+        assert keys == sorted(keys, reverse=True)
+
+    @pytest.mark.asyncio
+    async def test_exhausted_brand_does_not_fall_back_to_substring(self):
+        engine, session_factory = await seeded_repo_factory()
+        async with session_factory() as db:
+            repo = PhoneRepository(db)
+            everything = await repo.search(brand="samsung", limit=100)
+            last = everything[-1]
+            beyond = await repo.search(brand="samsung", limit=10, after=(last.price_inr, last.id))
+            partial = await repo.search(brand="sams", limit=2)
+            partial_next = await repo.search(brand="sams", limit=100, after=(partial[-1].price_inr, partial[-1].id))
+        await engine.dispose()
+
+        assert beyond == []
+        assert [p.id for p in partial + partial_next] == [p.id for p in everything]
+
+    @pytest.mark.asyncio
+    async def test_stream_all_in_batches(self):
+        engine, session_factory = await seeded_repo_factory()
+        async with session_factory() as db:
+            batches = [batch async for batch in PhoneRepository(db).stream_all(batch_size=4)]
+        await engine.dispose()
+
+        assert all(len(batch) <= 4 for batch in batches)
+        ids = [p.id for batch in batches for p in batch]
+        assert ids == sorted(ids) and len(ids) == len(PHONES)
@@ -0,0 +1,196 @@
+"""Tests for the per-phone response cache and the catalog version it is keyed on."""
+
+import asyncio
+import json
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import update
+
+from app.api.routes.products import _export_lines
+from app.models.database import Phone
+from app.models.schemas import ChatResponse, PhoneListResponse
+from app.repositories.phone_repository import PhoneRepository
+from app.services import product_service
+from app.services.phone_response_cache import PhoneResponseCache
+from app.services.product_service import PHONE_FIELDS, FieldSelection, ProductService
+from tests.test_phone_repository import seeded_repo_factory
+
+
+class TestCatalogVersion:
+    """The catalog version changes with every write to the phones table."""
+
+    @pytest.mark.asyncio
+    async def test_writes_bump_version(self):
+        engine, session_factory = await seeded_repo_factory()
+        async with session_factory() as db:
+            repo = PhoneRepository(db)
+            seeded = await repo.get_catalog_version()
+            assert seeded == await repo.get_catalog_version()
+
+            await db.execute(update(Phone).where(Phone.id == 1).values(price_inr=1))
+            await db.commit()
+            updated = await repo.get_catalog_version()
+
+            await repo.create({"brand": "Test", "model": "One", "price_inr": 100})
+            created = await repo.get_catalog_version()
+        await engine.dispose()
+
+        assert updated == seeded + 1
+        assert created == updated + 1
+
+
+class TestPhoneResponseCache:
+    """Tests for PhoneResponseCache and ProductService's use of it."""
+
+    def test_other_version_drops_entries(self):
+        cache = PhoneResponseCache()
+        cache.put(1, 1, None, b"{}")
+        assert cache.get(1, 1) is not None
+
+        assert cache.get(2, 1) is None
+        cache.put(2, 2, None, b"new")
+        assert cache.get(1, 1) is None
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+    def test_lower_version_is_adopted(self):
+        cache = PhoneResponseCache()
+        cache.put(2, 1, None, b"old database")
+        # A recreated database starting below the version cached before
+        cache.put(1, 1, None, b"new database")
+
+        assert cache.get(2, 1) is None
+        assert cache.get(1, 1)[1] == b"new database"
+
+    def test_bounded_oldest_first(self):
+        cache = PhoneResponseCache(max_entries=2)
+        for phone_id in (1, 2, 3):
+            cache.put(1, phone_id, None, b"{}")
+
+        assert len(cache) == 2
+        assert cache.get(1, 1) is None and cache.get(1, 3) is not None
+
+    @pytest.mark.asyncio
+    async def test_list_json_matches_schema_serialization(self):
+        engine, session_factory = await seeded_repo_factory()
+        async with session_factory() as db:
+            phones = await PhoneRepository(db).get_all(limit=20)
+        await engine.dispose()
+
+        service = ProductService()
+        service.sync_catalog_version(1)
+        body = service.phone_list_json(phones)
+        expected = PhoneListResponse(products=[service.build_phone_response(p) for p in phones], count=len(phones))
+
+        assert json.loads(body) == jsonable_encoder(expected)
+        assert json.loads(service.phone_list_json([])) == {"products": [], "count": 0}
+
+    @pytest.mark.asyncio
+    async def test_responses_rebuilt_after_catalog_change(self):
+        engine, session_factory = await seeded_repo_factory()
+        async with session_factory() as db:
+            repo = PhoneRepository(db)
+            service = ProductService()
+
+            service.sync_catalog_version(await repo.get_catalog_version())
+            before = service.phone_to_response(await repo.get_by_id(1))
+            assert service.phone_to_response(await repo.get_by_id(1)) is before
+
+            await db.execute(update(Phone).where(Phone.id == 1).values(price_inr=1))
+            await db.commit()
+            service.sync_catalog_version(await repo.get_catalog_version())
+            record = await repo.get_by_id(1)
+        await engine.dispose()
+
+        after = service.phone_to_response(record)
+        assert after is not before
+        assert after.price_inr == 1
+        assert json.loads(service.phone_json(record))["price_inr"] == 1
+
+    @pytest.mark.asyncio
+    async def test_export_reflects_catalog_change(self, monkeypatch):
+        service = ProductService()
+        monkeypatch.setattr(product_service, "_product_service", service)
+        engine, session_factory = await seeded_repo_factory()
+        async with session_factory() as db:
+            repo = PhoneRepository(db)
+            service.sync_catalog_version(await repo.get_catalog_version())
+            service.phone_json(await repo.get_by_id(1))
+            await db.execute(update(Phone).where(Phone.id == 1).values(price_inr=1))
+            await db.commit()
+
+        lines = [line async for batch in _export_lines(10, session_factory) for line in batch.splitlines()]
+        await engine.dispose()
+
+        first = json.loads(lines[0])
+        assert (first["id"], first["price_inr"]) == (1, 1)
+
+    @pytest.mark.asyncio
+    async def test_request_on_other_version_is_not_served(self):
+        service = ProductService()
+        record = type("P", (), {**{name: None for name in PHONE_FIELDS}, "id": 1, "brand": "Test", "model": "One",
+                                "price_inr": 100})()
+
+        async def request(version):
+            service.sync_catalog_version(version)
+            return service.phone_to_response(record)
+
+        # Each request is its own task, as under the ASGI server
+        current = await asyncio.create_task(request(2))
+        stale = await asyncio.create_task(request(1))
+        assert stale is not current
+        assert await asyncio.create_task(request(2)) is not stale
+
+
+class TestFieldSelection:
+    """Sparse and compact product lists are joined from per-field fragments."""
+
+    def test_parse(self):
+        assert FieldSelection.parse(None) is None and FieldSelection.parse(" , ") is None
+        assert FieldSelection.parse("brand, model,brand").fields == ("id", "brand", "model")
+        assert FieldSelection.parse("model,id").fields == ("model", "id")
+        assert FieldSelection.parse(None, compact=True).fields == PHONE_FIELDS
+        with pytest.raises(ValueError):
+            FieldSelection.parse("brand,secret")
+
+    @pytest.mark.asyncio
+    async def test_sparse_and_compact_match_full_objects(self):
+        engine, session_factory = await seeded_repo_factory()
+        async with session_factory() as db:
+            phones = await PhoneRepository(db).get_all(limit=20)
+        await engine.dispose()
+
+        service = ProductService()
+        service.sync_catalog_version(1)
+        full = json.loads(service.phone_list_json(phones, extra={"next_cursor": None}))
+        everything = json.loads(service.phone_list_json(phones, selection=FieldSelection()))
+        sparse = json.loads(service.phone_list_json(phones, selection=FieldSelection.parse("price_inr,brand")))
+        compact = json.loads(service.phone_list_json(phones, selection=FieldSelection.parse("brand,price_inr", True)))
+
+        assert everything["products"] == full["products"]
+        assert sparse["products"] == [{k: p[k] for k in ("id", "price_inr", "brand")} for p in full["products"]]
+        assert compact["fields"] == ["id", "brand", "price_inr"]
+        assert compact["products"] == [[p["id"], p["brand"], p["price_inr"]] for p in full["products"]]
+        assert compact["count"] == full["count"]
+        ids_only = json.loads(service.phone_list_json(phones, selection=FieldSelection.parse("id", True)))
+        assert ids_only["products"] == [[p["id"]] for p in full["products"]]
+        assert json.loads(service.phone_list_json([], selection=FieldSelection.parse("id")))["products"] == []
+
+        # Fragments are split once per cached response, and redone after the catalog changes
+        assert service.response_cache.stats()["field_sets"] == len(phones)
+        service.sync_catalog_version(2)
+        service.phone_list_json(phones[:1], selection=FieldSelection.parse("brand"))
+        assert service.response_cache.stats()["field_sets"] == 1
+        assert service.response_cache.version == 2
+
+    def test_chat_response(self):
+        service = ProductService()
+        service.sync_catalog_version(1)
+        phone = service.build_phone_response(type("P", (), {
+            **{name: None for name in PHONE_FIELDS}, "id": 7, "brand": "Test", "model": "Ünï", "price_inr": 100
+        })())
+        response = ChatResponse(response="Here", products=[phone], intent="search", session_id="s")
+
+        body = json.loads(service.chat_response_json(response, FieldSelection(["model"], compact=True)))
+
+        assert body == {**jsonable_encoder(response), "products": [[7, "Ünï"]], "fields": ["id", "model"]}
@@ -0,0 +1,161 @@
+"""
+Query-plan regression tests.
+
+Every statement a repository method sends is re-run under EXPLAIN QUERY
+PLAN; a plain ``SCAN <table>`` (a full table scan without an index) fails
+the test unless the method is listed in FULL_SCAN_ALLOWED. Ordered index
+walks (``SCAN <table> USING INDEX``) that stop at LIMIT are fine.
+"""
+
+import json
+import re
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event
+
+from app.repositories.conversation_repository import ConversationRepository
+from app.repositories.history_cache import SessionHistoryCache
+from app.repositories.category_index import CategoryIndex
+from app.repositories.facet_index import FacetIndex
+from app.repositories.phone_repository import PhoneRepository
+from app.repositories.result_cache import PhoneResultCache
+from app.services.session_janitor import SessionJanitor
+from tests.test_conversation_repository import make_session_factory
+
+PHONES_PATH = Path(__file__).parent.parent / "app" / "data" / "phones.json"
+
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+# Queries that scan by design: unordered pagination over everything,
+# free-text substring matches across several columns and the
+# once-per-catalog-version passes that materialize categories and facets
+FULL_SCAN_ALLOWED = {
+    "get_all": {"phones"},
+    "search_text": {"phones"},
+    "refresh_categories": {"phones"},
+    "facet_search": {"phones"},
+    "stream_all": {"phones"},
+}
+
+PHONE_QUERIES = {
+    "get_all": lambda repo: repo.get_all(limit=10),
+    "get_by_id": lambda repo: repo.get_by_id(1),
+    "get_by_ids": lambda repo: repo.get_by_ids([1, 2, 3]),
+    "get_by_brand": lambda repo: repo.get_by_brand("samsung"),
+    "get_by_brand_fallback": lambda repo: repo.get_by_brand("sams"),
+    "get_by_price_range": lambda repo: repo.get_by_price_range(10000, 30000),
+    "get_budget_phones": lambda repo: repo.get_budget_phones(),
+    "get_flagship_phones": lambda repo: repo.get_flagship_phones(),
+    "get_gaming_phones": lambda repo: repo.get_gaming_phones(),
+    "get_camera_phones": lambda repo: repo.get_camera_phones(),
+    "get_battery_phones": lambda repo: repo.get_battery_phones(),
+    "get_battery_phones_custom": lambda repo: repo.get_battery_phones(min_battery=6000),
+    "refresh_categories": lambda repo: repo.refresh_categories(),
+    "search_brand": lambda repo: repo.search(brand="OnePlus", max_price=50000),
+    "search_filters": lambda repo: repo.search(min_price=15000, max_price=40000, min_ram=8, min_battery=5000),
+    "search_text": lambda repo: repo.search(search_text="snapdragon"),
+    "search_after": lambda repo: repo.search(limit=20, after=(30000, 5)),
+    "search_brand_after": lambda repo: repo.search(brand="samsung", after=(50000, 3)),
+    "stream_all": lambda repo: drain(repo.stream_all()),
+    "count": lambda repo: repo.count(),
+    "facet_search": lambda repo: repo.facet_search({"brand": ["samsung"]}),
+}
+
+async def drain(batches):
+    return [batch async for batch in batches]
+
+
+CONVERSATION_QUERIES = {
+    "get_or_create_conversation": lambda repo: repo.get_or_create_conversation("plan-session"),
+    "get_conversation": lambda repo: repo.get_conversation("plan-session"),
+    "add_message": lambda repo: repo.add_message("plan-session", "user", "hello"),
+    "add_turn": lambda repo: repo.add_turn("plan-session", "q", "a"),
+    "add_turn_new_session": lambda repo: repo.add_turn("plan-new-session", "q", "a"),
+    "get_messages": lambda repo: repo.get_messages("plan-session"),
+    "get_conversation_history": lambda repo: repo.get_conversation_history("plan-session"),
+    "clear_conversation": lambda repo: repo.clear_conversation("plan-session"),
+}
+
+
+async def seeded_session_factory():
+    engine, session_factory = await make_session_factory()
+    phones = json.loads(PHONES_PATH.read_text())
+    for phone in phones:
+        phone.pop("id", None)
+    async with session_factory() as db:
+        await PhoneRepository(db).bulk_create(phones)
+        await ConversationRepository(db, history_cache=SessionHistoryCache()).add_turn("plan-session", "hi", "hello")
+    return engine, session_factory
+
+
+def capture_plans(engine):
+    """Record (statement, plan details) for every statement the engine runs."""
+    plans = []
+
+    def explain(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            return
+        explain_cursor = conn.connection.dbapi_connection.cursor()
+        explain_cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        plans.append((statement, [row[3] for row in explain_cursor.fetchall()]))
+        explain_cursor.close()
+
+    event.listen(engine.sync_engine, "before_cursor_execute", explain)
+    return plans
+
+
+def full_scans(plans):
+    return {
+        match.group(1): statement
+        for statement, details in plans
+        for detail in details
+        if (match := FULL_SCAN.match(detail))
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", sorted(PHONE_QUERIES))
+async def test_phone_repository_query_plans(name):
+    engine, session_factory = await seeded_session_factory()
+    async with session_factory() as db:
+        # Uncached, so every lookup reaches the database; categories built up front
+        repo = PhoneRepository(db, result_cache=PhoneResultCache(max_entries=0), category_index=CategoryIndex(),
+                               facet_index=FacetIndex())
+        await repo.refresh_categories()
+        plans = capture_plans(engine)
+        await PHONE_QUERIES[name](repo)
+    await engine.dispose()
+
+    assert plans, f"{name} ran no queries"
+    scans = {table: sql for table, sql in full_scans(plans).items() if table not in FULL_SCAN_ALLOWED.get(name, set())}
+    assert not scans, f"{name} does a full table scan: {scans}"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", sorted(CONVERSATION_QUERIES))
+async def test_conversation_repository_query_plans(name):
+    engine, session_factory = await seeded_session_factory()
+    plans = capture_plans(engine)
+    async with session_factory() as db:
+        await CONVERSATION_QUERIES[name](ConversationRepository(db, history_cache=SessionHistoryCache()))
+    await engine.dispose()
+
+    scans = full_scans(plans)
+    assert not scans, f"{name} does a full table scan: {scans}"
+
+
+@pytest.mark.asyncio
+async def test_session_janitor_query_plans():
+    engine, session_factory = await seeded_session_factory()
+    plans = capture_plans(engine)
+    await SessionJanitor(session_factory, history_cache=SessionHistoryCache()).purge_expired()
+    await engine.dispose()
+
+    assert plans
+    assert not full_scans(plans)
+
+
+def test_detects_full_scan():
+    assert full_scans([("SELECT * FROM phones", ["SCAN phones"])]) == {"phones": "SELECT * FROM phones"}
+    assert not full_scans([("SELECT ...", ["SCAN phones USING INDEX ix_phones_price_inr"])])
@@ -0,0 +1,121 @@
+"""Tests for expiring idle sessions."""
+
+import gzip
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, func, select, update
+
+from app.models.database import Conversation, Message
+from app.repositories import conversation_repository
+from app.repositories.conversation_repository import ConversationRepository
+from app.repositories.history_cache import SessionHistoryCache
+from app.services.session_janitor import SessionJanitor
+from tests.test_conversation_repository import make_session_factory
+
+
+async def seed(session_factory, idle_hours):
+    """One turn per session, each last active ``idle_hours[session_id]`` ago."""
+    now = datetime.utcnow()
+    async with session_factory() as db:
+        repo = ConversationRepository(db, history_cache=SessionHistoryCache())
+        for session_id, hours in idle_hours.items():
+            await repo.add_turn(session_id, f"question from {session_id}", "answer", user_metadata={"intent": "chitchat"})
+            await db.execute(
+                update(Conversation)
+                .where(Conversation.session_id == session_id)
+                .values(last_activity=now - timedelta(hours=hours))
+            )
+        await db.commit()
+
+
+async def remaining_sessions(session_factory):
+    async with session_factory() as db:
+        sessions = (await db.execute(select(Conversation.session_id).order_by(Conversation.session_id))).scalars().all()
+        messages = (await db.execute(select(func.count()).select_from(Message))).scalar_one()
+    return list(sessions), messages
+
+
+class TestSessionJanitor:
+    """Tests for SessionJanitor.purge_expired()."""
+
+    @pytest.mark.asyncio
+    async def test_purges_only_idle_sessions(self):
+        engine, session_factory = await make_session_factory()
+        await seed(session_factory, {"idle-1": 30, "idle-2": 48, "active": 1})
+        cache = SessionHistoryCache()
+        cache.put("idle-1", [{"role": "user", "content": "cached"}])
+
+        janitor = SessionJanitor(session_factory, ttl=timedelta(hours=24), history_cache=cache)
+        purged = await janitor.purge_expired()
+        sessions, messages = await remaining_sessions(session_factory)
+        await engine.dispose()
+
+        assert purged == 2
+        assert sessions == ["active"]
+        assert messages == 2
+        assert cache.get("idle-1") is None
+        assert "idle-1" not in conversation_repository._conversation_ids
+
+    @pytest.mark.asyncio
+    async def test_deletes_in_bounded_set_based_batches(self):
+        engine, session_factory = await make_session_factory()
+        await seed(session_factory, {f"idle-{i}": 48 for i in range(5)})
+        statements = []
+        event.listen(engine.sync_engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement.split()[0]))
+
+        janitor = SessionJanitor(session_factory, ttl=timedelta(hours=24), batch_size=2,
+                                 history_cache=SessionHistoryCache())
+        purged = await janitor.purge_expired()
+        sessions, messages = await remaining_sessions(session_factory)
+        await engine.dispose()
+
+        assert purged == 5
+        assert (sessions, messages) == ([], 0)
+        # Batches of 2, 2 and 1: two DELETEs each, never one per row
+        assert statements.count("DELETE") == 6
+
+    @pytest.mark.asyncio
+    async def test_archives_before_deleting(self, tmp_path):
+        engine, session_factory = await make_session_factory()
+        await seed(session_factory, {"idle": 48, "active": 1})
+
+        janitor = SessionJanitor(session_factory, ttl=timedelta(hours=24), archive_dir=str(tmp_path),
+                                 history_cache=SessionHistoryCache())
+        await janitor.purge_expired()
+        await engine.dispose()
+
+        (archive,) = tmp_path.glob("conversations-*.ndjson.gz")
+        with gzip.open(archive, "rt", encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+
+        assert [r["session_id"] for r in records] == ["idle"]
+        assert [m["role"] for m in records[0]["messages"]] == ["user", "assistant"]
+        assert records[0]["messages"][0]["content"] == "question from idle"
+        assert records[0]["messages"][0]["metadata"] == {"intent": "chitchat"}
+
+
+class TestClearConversation:
+    """clear_conversation() deletes messages with one statement."""
+
+    @pytest.mark.asyncio
+    async def test_single_delete(self):
+        engine, session_factory = await make_session_factory()
+        await seed(session_factory, {"to-clear": 0, "other": 0})
+        statements = []
+        event.listen(engine.sync_engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement.split()[0]))
+
+        async with session_factory() as db:
+            repo = ConversationRepository(db, history_cache=SessionHistoryCache())
+            assert await repo.clear_conversation("to-clear") is True
+            assert await repo.clear_conversation("unknown") is False
+        sessions, messages = await remaining_sessions(session_factory)
+        await engine.dispose()
+
+        assert statements[0] == "DELETE"
+        assert statements.count("DELETE") == 2
+        assert sessions == ["other", "to-clear"]
+        assert messages == 2
@@ -0,0 +1,92 @@
+"""Tests for per-stage tracing and latency aggregation."""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base, QueryAnalytics, _upgrade_schema
+from app.observability import tracing
+from app.repositories.analytics_repository import AnalyticsRepository
+from app.utils.helpers import percentile
+
+
+class TestSpans:
+    """Tests for span recording."""
+
+    def test_spans_accumulate_in_current_trace(self):
+        trace = tracing.start_trace()
+        with tracing.span("llm"):
+            pass
+        with tracing.span("llm"):
+            pass
+        tracing.annotate(safety_cache_hit=True)
+        tracing.count("prompt_tokens", 12)
+        tracing.count("prompt_tokens", 3)
+
+        assert list(json.loads(trace.stages_json())) == ["llm"]
+        assert json.loads(trace.meta_json()) == {"safety_cache_hit": True, "prompt_tokens": 15}
+
+    def test_percentile_nearest_rank(self):
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile([7], 95) == 7
+        assert percentile([], 50) is None
+
+
+class TestLatencyReport:
+    """Tests for AnalyticsRepository.get_latency_report()."""
+
+    @pytest.mark.asyncio
+    async def test_percentiles_per_stage_and_intent(self):
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        async with sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as db:
+            for ms in range(1, 101):
+                db.add(QueryAnalytics(query="q", intent="search_phones", response_time_ms=ms,
+                                      stage_timings=json.dumps({"retrieval": ms / 10, "generation": ms})))
+            db.add(QueryAnalytics(query="q", intent="adversarial", response_time_ms=1,
+                                  stage_timings=json.dumps({"safety": 0.5})))
+            db.add(QueryAnalytics(query="old", intent="search_phones", response_time_ms=9999,
+                                  created_at=datetime.utcnow() - timedelta(days=3)))
+            await db.commit()
+
+            report = await AnalyticsRepository(db).get_latency_report(hours=24)
+
+        await engine.dispose()
+
+        assert report["count"] == 101
+        assert report["stages"]["generation"] == {"count": 100, "p50": 50, "p95": 95, "p99": 99}
+        assert report["stages"]["safety"]["count"] == 1
+        search = report["intents"]["search_phones"]
+        assert search["total"]["p99"] == 99
+        assert search["stages"]["retrieval"]["p50"] == 5.0
+        assert "safety" not in search["stages"]
+
+
+class TestSchemaUpgrade:
+    """Tests for additive schema upgrades of existing databases."""
+
+    @pytest.mark.asyncio
+    async def test_missing_columns_are_added(self):
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.execute(text(
+                "CREATE TABLE query_analytics (id INTEGER PRIMARY KEY, query TEXT NOT NULL, intent VARCHAR(100), "
+                "products_returned INTEGER, response_time_ms INTEGER, was_adversarial BOOLEAN, created_at DATETIME)"
+            ))
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(_upgrade_schema)
+
+            columns = {row[1] for row in await conn.execute(text("PRAGMA table_info(query_analytics)"))}
+            indexes = {row[1] for row in await conn.execute(text("PRAGMA index_list(query_analytics)"))}
+        await engine.dispose()
+
+        assert {"stage_timings", "trace_meta"} <= columns
+        assert "ix_query_analytics_created_at" in indexes
@@ -0,0 +1,94 @@
+"""Tests for the safety/intent verdict cache."""
+
+import numpy as np
+
+from app.core.intent_classifier import IntentClassifier
+from app.core.safety_filter import SafetyFilter
+from app.core.verdict_cache import VerdictCache
+
+
+class TestVerdictCache:
+    """Tests for VerdictCache."""
+
+    def test_lru_bound_and_stats(self):
+        cache = VerdictCache(maxsize=2)
+        assert cache.get("a", "v1") is None
+        cache.put("a", "v1", (1,))
+        cache.put("b", "v1", (2,))
+        assert cache.get("a", "v1") == (1,)  # "a" is now most recent
+        cache.put("c", "v1", (3,))
+
+        assert len(cache) == 2
+        assert cache.get("b", "v1") is None
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 2
+        assert stats["hit_rate"] == 1 / 3
+
+    def test_version_change_clears(self):
+        cache = VerdictCache()
+        cache.get("a", "v1")
+        cache.put("a", "v1", (1,))
+        assert cache.get("a", "v2") is None
+        assert len(cache) == 0
+
+        cache.put("a", "v1", (1,))  # stale version is not stored
+        assert len(cache) == 0
+
+
+class TestSafetyVerdictCache:
+    """Tests for SafetyFilter verdict caching."""
+
+    def test_repeated_query_hits_cache(self):
+        safety_filter = SafetyFilter()
+        first = safety_filter.check_input("Best camera phone under 30000")
+        second = safety_filter.check_input("  best CAMERA phone under 30000 ")
+
+        assert first == second
+        assert safety_filter.verdict_cache.stats()["hits"] == 1
+
+        second["is_safe"] = False  # callers get their own dict
+        assert safety_filter.check_input("best camera phone under 30000")["is_safe"]
+
+    def test_pattern_change_invalidates(self):
+        class CustomFilter(SafetyFilter):
+            ADVERSARIAL_PATTERNS = list(SafetyFilter.ADVERSARIAL_PATTERNS)
+
+        safety_filter = CustomFilter()
+        assert safety_filter.check_input("show me pirate phones")["is_safe"]
+
+        version = safety_filter.pattern_version
+        CustomFilter.ADVERSARIAL_PATTERNS.append(r"pirate")
+        assert safety_filter.pattern_version != version
+
+        result = safety_filter.check_input("show me pirate phones")
+        assert result["is_adversarial"]
+
+
+class TestIntentVerdictCache:
+    """Tests for IntentClassifier verdict caching."""
+
+    def test_cached_params_are_fresh_copies(self):
+        classifier = IntentClassifier()
+        first = classifier.classify("Gaming phone under 30000")
+        first["extracted_params"]["features"].append("camera")
+        first["extracted_params"]["brand"] = "Samsung"
+
+        second = classifier.classify("gaming phone under 30000")
+        assert classifier.verdict_cache.stats()["hits"] == 1
+        assert second["intent"] == "budget_search"
+        assert second["extracted_params"] == {"price_max": 30000, "features": ["gaming"]}
+
+    def test_cached_verdict_is_keyed_on_embedding_use(self):
+        classifier = IntentClassifier()
+        assert classifier.cached_verdict("Hello", embedded=True) is None
+
+        result = classifier.classify("Hello", embedding=np.ones(3), lookup=False)
+        assert classifier.cached_verdict("hello", embedded=True) == result
+        assert classifier.cached_verdict("hello") is None
+
+    def test_prototype_swap_changes_version(self):
+        classifier = IntentClassifier()
+        version = classifier.cache_version
+        classifier.prototype_threshold = 0.7
+        assert classifier.cache_version != version